@@ -1,7 +1,4 @@
 import streamlit as st
-from youtube_transcript_api import YouTubeTranscriptApi
-from youtube_transcript_api.formatters import TextFormatter
-import google.generativeai as genai
 import os
 
 # Sayfa Ayarları
@@ -17,122 +14,95 @@ st.set_page_config(
 )
 
 # Başlık ve Açıklama
-import yfinance as yf
-from datetime import datetime, timedelta, timezone
+from datetime import datetime
+from market import get_price_history, market_ticker
 
-# ... (Mevcut importlar ve ayarlar) ...
-
-def get_market_data():
-    """Anlık piyasa verilerini çeker."""
-    try:
-        tickers = {
-            "USDTRY=X": "Dolar",
-            "EURTRY=X": "Euro",
-            "XU100.IS": "BIST 100",
-            "GC=F": "Ons Altın",
-            "BTC-USD": "Bitcoin"
-        }
-        
-        # Son 5 günlük veriyi alıp, eksik verileri (hafta sonu/tatil) önceki günle dolduruyoruz (ffill)
-        data = yf.download(list(tickers.keys()), period="5d", interval="1d", progress=False)['Close'].ffill().iloc[-1]
-        
-        # Gram Altın Hesabı: (Ons * Dolar) / 31.1035
-        dolar = data["USDTRY=X"]
-        ons = data["GC=F"]
-        gram_altin = (ons * dolar) / 31.1035
-        
-        market_info = {
-            "Dolar": f"{dolar:.2f} ₺",
-            "Euro": f"{data['EURTRY=X']:.2f} ₺",
-            "Gram Altın": f"{gram_altin:.0f} ₺",
-            "BIST 100": f"{data['XU100.IS']:.0f}",
-            "Bitcoin": f"${data['BTC-USD']:.0f}"
-        }
-        return market_info
-    except Exception as e:
-        return None
-
-# ... (Mevcut kodlar) ...
+def format_age(seconds):
+    """Verinin yaşını okunur hale getirir."""
+    if seconds < 60:
+        return "az önce"
+    if seconds < 3600:
+        return f"{int(seconds // 60)} dk önce"
+    return f"{int(seconds // 3600)} sa önce"
 
 # Ana Arayüz Başlangıcı (Başlık Altına)
 st.title("📊 YouTube Ekonomi Özeti Asistanı")
 
+# Bant yenileme aralığı (sn): sadece bant yeniden çizilir, sayfanın geri kalanı çalışmaz
+MARKET_BANNER_REFRESH_SECONDS = float(os.getenv("MARKET_BANNER_REFRESH_SECONDS", "60"))
+
+# Piyasa bandının stili (bir kez yazılır; bant her yenilendiğinde tekrar gönderilmez)
+MARKET_BANNER_CSS = """
+<style>
+    .market-container {
+        display: flex;
+        flex-wrap: wrap;
+        gap: 10px;
+        padding: 10px;
+        background-color: #f0f2f6;
+        border-radius: 10px;
+        margin-bottom: 20px;
+        justify-content: space-around;
+    }
+    .market-item {
+        display: flex;
+        flex-direction: column;
+        align-items: center;
+        background: white;
+        padding: 8px 15px;
+        border-radius: 8px;
+        box-shadow: 0 2px 4px rgba(0,0,0,0.1);
+        min-width: 100px;
+    }
+    .market-label {
+        font-size: 0.8em;
+        color: #666;
+        font-weight: bold;
+    }
+    .market-value {
+        font-size: 1.1em;
+        color: #333;
+        font-weight: bold;
+    }
+    /* Dark mode uyumu için */
+    @media (prefers-color-scheme: dark) {
+        .market-container { background-color: #262730; }
+        .market-item { background-color: #0e1117; box-shadow: 0 2px 4px rgba(255,255,255,0.1); }
+        .market-label { color: #aaa; }
+        .market-value { color: #fff; }
+    }
+</style>
+"""
+
+# Banttaki kutular: (etiket, piyasa verisindeki anahtar)
+MARKET_BANNER_ITEMS = [
+    ("💵 Dolar", "Dolar"),
+    ("💶 Euro", "Euro"),
+    ("🟡 Gram Altın", "Gram Altın"),
+    ("📈 BIST 100", "BIST 100"),
+    ("🪙 Bitcoin", "Bitcoin"),
+]
+
+def market_item(label, value):
+    return f'<div class="market-item"><span class="market-label">{label}</span><span class="market-value">{value}</span></div>'
+
+@st.fragment(run_every=MARKET_BANNER_REFRESH_SECONDS)
+def market_banner():
+    """Tarih ve piyasa bandı; kendi başına periyodik yenilenir."""
+    today_date = datetime.now().strftime("%d.%m.%Y")
+    # Ağı beklemeden, arka planda yenilenen son veriyi kullan
+    market_data, market_age = market_ticker.snapshot()
+    if not market_data:
+        st.info(f"📅 Tarih: {today_date} | Piyasa verileri alınıyor...")
+        return
+    items = [market_item("📅 Tarih", today_date)]
+    items += [market_item(label, market_data[key]) for label, key in MARKET_BANNER_ITEMS]
+    items.append(market_item("🕒 Güncelleme", format_age(market_age)))
+    st.markdown(f'<div class="market-container">{"".join(items)}</div>', unsafe_allow_html=True)
+
 # Tarih ve Piyasa Bilgisi
-today_date = datetime.now().strftime("%d.%m.%Y")
-market_data = get_market_data()
-
-if market_data:
-    # CSS ile şık bir bilgi bandı
-    st.markdown(f"""
-    <style>
-        .market-container {{
-            display: flex;
-            flex-wrap: wrap;
-            gap: 10px;
-            padding: 10px;
-            background-color: #f0f2f6;
-            border-radius: 10px;
-            margin-bottom: 20px;
-            justify-content: space-around;
-        }}
-        .market-item {{
-            display: flex;
-            flex-direction: column;
-            align-items: center;
-            background: white;
-            padding: 8px 15px;
-            border-radius: 8px;
-            box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-            min-width: 100px;
-        }}
-        .market-label {{
-            font-size: 0.8em;
-            color: #666;
-            font-weight: bold;
-        }}
-        .market-value {{
-            font-size: 1.1em;
-            color: #333;
-            font-weight: bold;
-        }}
-        /* Dark mode uyumu için */
-        @media (prefers-color-scheme: dark) {{
-            .market-container {{ background-color: #262730; }}
-            .market-item {{ background-color: #0e1117; box-shadow: 0 2px 4px rgba(255,255,255,0.1); }}
-            .market-label {{ color: #aaa; }}
-            .market-value {{ color: #fff; }}
-        }}
-    </style>
-    
-    <div class="market-container">
-        <div class="market-item">
-            <span class="market-label">📅 Tarih</span>
-            <span class="market-value">{today_date}</span>
-        </div>
-        <div class="market-item">
-            <span class="market-label">💵 Dolar</span>
-            <span class="market-value">{market_data['Dolar']}</span>
-        </div>
-        <div class="market-item">
-            <span class="market-label">💶 Euro</span>
-            <span class="market-value">{market_data['Euro']}</span>
-        </div>
-        <div class="market-item">
-            <span class="market-label">🟡 Gram Altın</span>
-            <span class="market-value">{market_data['Gram Altın']}</span>
-        </div>
-        <div class="market-item">
-            <span class="market-label">📈 BIST 100</span>
-            <span class="market-value">{market_data['BIST 100']}</span>
-        </div>
-        <div class="market-item">
-            <span class="market-label">🪙 Bitcoin</span>
-            <span class="market-value">{market_data['Bitcoin']}</span>
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
-else:
-    st.info(f"📅 Tarih: {today_date} | Piyasa verileri alınıyor...")
+st.markdown(MARKET_BANNER_CSS, unsafe_allow_html=True)
+market_banner()
 
 st.markdown("---")
 
@@ -142,6 +112,8 @@ Bu uygulama, izlemeye vaktiniz olmayan uzun ekonomi videolarını sizin için iz
 Tek yapmanız gereken videonun linkini yapıştırmak!
 """)
 
+from prefetch import prefetcher, ready_summary, PREFETCH_ENABLED
+
 # Sidebar - API Anahtarı Girişi
 with st.sidebar:
     st.header("⚙️ Ayarlar")
@@ -150,303 +122,104 @@ with st.sidebar:
     if "GEMINI_API_KEY" in st.secrets:
         api_key = st.secrets["GEMINI_API_KEY"]
         st.success("✅ API Anahtarı Kayıtlı")
+        # Takip edilen kanalların yeni videolarını arka planda hazırla (sadece kayıtlı anahtarla)
+        if PREFETCH_ENABLED:
+            prefetcher.start(api_key)
     else:
         # Yoksa kullanıcıdan iste
         api_key = st.text_input("Google Gemini API Anahtarı", type="password", help="Google AI Studio'dan alacağınız API anahtarı.")
         st.markdown("[API Anahtarı Nasıl Alınır?](https://aistudio.google.com/app/apikey)")
         st.info("Bu anahtar sadece bu oturumda kullanılır.")
 
-# Fonksiyonlar
-def extract_video_id(url):
-    """YouTube URL'sinden Video ID'sini çeker."""
-    url = url.strip()
-    if "youtu.be/" in url:
-        return url.split("youtu.be/")[1].split("?")[0]
-    elif "youtube.com/shorts/" in url:
-        return url.split("shorts/")[1].split("?")[0]
-    elif "youtube.com/live/" in url:
-        return url.split("live/")[1].split("?")[0]
-    elif "v=" in url:
-        return url.split("v=")[1].split("&")[0]
+# Fonksiyonlar (Altyazı, özet ve kanal mantığı arayüzden bağımsız modüllerde; toplu araç da aynılarını kullanır)
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from transcripts import asr_jobs, extract_video_id, load_transcript
+from asr import asr_available
+from summarizer import model_router, summarize, summary_error_message
+from highlighter import StreamingHighlighter, highlight_keywords
+from mirrors import mirror_registry
+from search_index import SECTIONS, search_index
+from stances import stance_rows, stance_store
+from metrics import metrics, METRICS_HOST, METRICS_PORT
+from channels import KNOWN_CHANNELS, FOLLOWED_CHANNELS, CHANNEL_SCAN_CONCURRENCY, check_channel
+
+# Ses tanıma ilerlemesinin yenilenme aralığı (sn)
+ASR_PROGRESS_REFRESH_SECONDS = 2
+
+# Ölçüm uç noktası (METRICS_PORT ayarlıysa; süreç başına bir kez başlar)
+metrics.start_server()
+
+def get_transcript(video_url):
+    """Videonun altyazılarını çeker (Önce disk önbelleği, sonra Hibrit Yöntem).
+
+    Altyazı bulunamazsa ve yerel ses tanıma kuruluysa, ses tanıma arka planda başlatılıp ilerlemesi gösterilir.
+    """
+    text = load_transcript(video_url)
+    if text is not None:
+        return text
+    if not asr_available():
+        st.error("Altyazı kaynaklarının hepsi (yt-dlp, youtube-transcript, Invidious, Piped) denendi ancak altyazı alınamadı; yerel ses tanıma (ASR_ENGINE + ffmpeg) kurulu değil. Altyazı henüz yayınlanmamış olabilir, lütfen daha sonra tekrar deneyin.")
+        return None
+    st.warning("Altyazı kaynaklarının hepsi (yt-dlp, youtube-transcript, Invidious, Piped) denendi ancak altyazı alınamadı. Son çare olarak ses arka planda yerel ses tanımayla metne çevriliyor.")
+    asr_jobs.start(video_url)
+    asr_progress(video_url)
     return None
 
-import yt_dlp
-import requests
-import re
-import html
-
-def clean_xml_transcript(text):
-    """XML/TTML formatındaki altyazıları temizler."""
-    # 1. XML taglerini kaldır (<p...>, </p>, <br/> vb.)
-    text = re.sub(r'<[^>]+>', ' ', text)
-    # 2. HTML entity'lerini çöz (&#39; -> ' gibi)
-    text = html.unescape(text)
-    # 3. Fazla boşlukları temizle
-    text = re.sub(r'\s+', ' ', text).strip()
-    return text
+@st.fragment(run_every=ASR_PROGRESS_REFRESH_SECONDS)
+def asr_progress(video_url):
+    """Arka plandaki ses tanıma işinin ilerlemesi; sadece bu alan kendini yeniler."""
+    job = asr_jobs.status(video_url)
+    if job is None:
+        return
+    if job["state"] == "done":
+        st.success("✅ Ses metne çevrildi. Özetlemek için düğmeye tekrar basın.")
+    elif job["state"] == "failed":
+        st.error(f"Ses tanıma başarısız: {job['error']}")
+    else:
+        st.progress(job["progress"], text=f"🎙️ {job['message']}...")
+
+def summarize_text(text, api_key, placeholder=None):
+    """Metni Gemini ile özetler (önce özet önbelleği, uzun metinlerde parçalı map-reduce).
 
-def get_transcript(video_url):
-    """Videonun altyazılarını çeker (Hibrit Yöntem: yt-dlp + youtube-transcript-api)."""
-    
-    # 1. YÖNTEM: yt-dlp (Öncelikli)
-    try:
-        # User-Agent ekleyerek 429 hatasını azaltmaya çalışalım
-        ydl_opts = {
-            'writesubtitles': True,
-            'writeautomaticsub': True,
-            'skip_download': True,
-            'subtitleslangs': ['tr', 'en'],
-            'http_headers': {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
-        }
+    placeholder (st.empty()) verilirse özet, geldikçe vurgulanarak bu alana yazılır.
+    """
+    on_text = None
+    if placeholder is not None:
+        highlighter = StreamingHighlighter()
+        on_text = lambda piece: placeholder.markdown(highlighter.feed(piece), unsafe_allow_html=True)
+
+    # Gemini hız sınırı kuyruğunda beklenirse sıra ve tahmini süre gösterilir
+    queue_box = st.empty()
+
+    def on_wait(position, eta):
+        if position:
+            queue_box.info(f"⏳ Gemini kota kuyruğunda {position}. sıradasınız, tahmini bekleme ~{eta:.0f} sn")
+        else:
+            queue_box.empty()
 
-        # URL düzeltme
-        if "youtube.com" not in video_url and "youtu.be" not in video_url:
-             video_url = f"https://www.youtube.com/watch?v={video_url}"
-
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(video_url, download=False)
-            
-            subtitles = info.get('subtitles', {})
-            auto_captions = info.get('automatic_captions', {})
-            
-            selected_sub = None
-            if 'tr' in subtitles: selected_sub = subtitles['tr']
-            elif 'tr' in auto_captions: selected_sub = auto_captions['tr']
-            elif 'en' in subtitles: selected_sub = auto_captions['en'] # Changed to auto_captions for 'en'
-            elif 'en' in subtitles: selected_sub = subtitles['en']
-            
-            if selected_sub:
-                sub_url = None
-                for fmt in selected_sub:
-                    if fmt['ext'] == 'json3':
-                        sub_url = fmt['url']
-                        break
-                if not sub_url: sub_url = selected_sub[-1]['url']
-
-                response = requests.get(sub_url)
-                response.raise_for_status()
-                
-                if 'json3' in sub_url or 'fmt=json3' in sub_url:
-                    data = response.json()
-                    text_content = ""
-                    if 'events' in data:
-                        for event in data['events']:
-                            if 'segs' in event:
-                                for seg in event['segs']:
-                                    if 'utf8' in seg:
-                                        text_content += seg['utf8'] + " "
-                    return clean_xml_transcript(text_content)
-    except Exception as e:
-        print(f"yt-dlp hatası: {e}")
-        # Hata durumunda pass geçip 2. yönteme düşecek
-        pass
-
-    # 2. YÖNTEM: youtube-transcript-api (Yedek / Fallback)
     try:
-        video_id = extract_video_id(video_url)
-        if not video_id:
-            return None
-            
-        transcript_list = YouTubeTranscriptApi.list_transcripts(video_id)
-        
-        # Önce Türkçe, yoksa İngilizce, o da yoksa otomatik çeviri
-        try:
-            transcript = transcript_list.find_transcript(['tr', 'en'])
-        except:
-            # Bulamazsa herhangi birini alıp Türkçe'ye çevir
-            transcript = transcript_list.find_transcript(['en']).translate('tr')
-            
-        formatter = TextFormatter()
-        text_formatted = formatter.format_transcript(transcript.fetch())
-        return clean_xml_transcript(text_formatted)
-
-    except Exception as e:
-        print(f"youtube-transcript-api hatası: {e}")
-        pass
-
-    # 3. YÖNTEM: Invidious API (Genişletilmiş Liste)
-    import random
-    invidious_instances = [
-        "https://inv.tux.pizza",
-        "https://invidious.projectsegfau.lt",
-        "https://vid.puffyan.us",
-        "https://invidious.fdn.fr",
-        "https://invidious.drgns.space",
-        "https://invidious.perennialteks.com",
-        "https://yt.artemislena.eu",
-        "https://invidious.flokinet.to",
-        "https://invidious.privacydev.net",
-        "https://iv.ggtyler.dev",
-        "https://invidious.lunar.icu",
-        "https://yewtu.be"
-    ]
-    random.shuffle(invidious_instances) # Her seferinde farklı sırayla dene
-
-    video_id = extract_video_id(video_url)
-    if not video_id: return None
-
-    for instance in invidious_instances:
-        try:
-            # Altyazı listesini çek
-            list_url = f"{instance}/api/v1/captions/{video_id}"
-            response = requests.get(list_url, timeout=3) # Hızlı pes et, diğerine geç
-            if response.status_code != 200: continue
-            
-            captions = response.json()
-            selected_caption = None
-            
-            for cap in captions:
-                if cap['languageCode'] == 'tr':
-                    selected_caption = cap
-                    break
-            if not selected_caption:
-                for cap in captions:
-                    if cap['languageCode'] == 'en':
-                        selected_caption = cap
-                        break
-            
-            if selected_caption:
-                cap_url = f"{instance}{selected_caption['url']}"
-                cap_response = requests.get(cap_url, timeout=5)
-                
-                if cap_response.status_code == 200:
-                    lines = cap_response.text.splitlines()
-                    text_content = ""
-                    for line in lines:
-                        if "-->" not in line and line.strip() and not line.strip().isdigit() and "WEBVTT" not in line:
-                            text_content += line + " "
-                    return clean_xml_transcript(text_content)
-        except Exception:
-            continue
-
-    # 4. YÖNTEM: Piped API (Genişletilmiş Liste)
-    piped_instances = [
-        "https://pipedapi.kavin.rocks",
-        "https://pipedapi.tokhmi.xyz",
-        "https://pipedapi.moomoo.me",
-        "https://api.piped.privacy.com.de",
-        "https://pipedapi.smnz.de",
-        "https://pipedapi.adminforge.de",
-        "https://pipedapi.drgns.space",
-        "https://api.piped.projectsegfau.lt",
-        "https://pipedapi.in.projectsegfau.lt",
-        "https://pipedapi.us.projectsegfau.lt",
-        "https://lo.piped.video",
-        "https://pipedapi.ducks.party"
-    ]
-    random.shuffle(piped_instances)
-
-    for instance in piped_instances:
-        try:
-            response = requests.get(f"{instance}/streams/{video_id}", timeout=3)
-            if response.status_code != 200: continue
-            
-            data = response.json()
-            subtitles = data.get('subtitles', [])
-            
-            selected_sub = None
-            for sub in subtitles:
-                if sub['code'] == 'tr':
-                    selected_sub = sub
-                    break
-            if not selected_sub:
-                for sub in subtitles:
-                    if sub['code'] == 'en':
-                        selected_sub = sub
-                        break
-            
-            if selected_sub:
-                sub_url = selected_sub['url']
-                sub_response = requests.get(sub_url, timeout=5)
-                if sub_response.status_code == 200:
-                    lines = sub_response.text.splitlines()
-                    text_content = ""
-                    for line in lines:
-                        if "-->" not in line and line.strip() and not line.strip().isdigit() and "WEBVTT" not in line:
-                            text_content += line + " "
-                    return clean_xml_transcript(text_content)
-
-        except Exception:
-            continue
-
-    st.error("Tüm yöntemler (yt-dlp, youtube-transcript, Invidious, Piped) denendi ancak YouTube IP engellemesi aşılamadı. Lütfen daha sonra tekrar deneyin.")
-    return None
+        result = summarize(text, api_key, on_text=on_text, on_wait=on_wait)
+    except Exception as last_error:
+        # Hiçbir model çalışmadıysa (ya da akış yarıda kesildiyse)
+        st.error(summary_error_message(last_error))
+        return None
 
-def summarize_text(text, api_key):
-    """Metni Gemini ile özetler."""
-    genai.configure(api_key=api_key)
-    
-    # Denenecek modeller sırasıyla (En hızlı/ucuzdan -> pahalı/eskiye)
-    # 'models/' öneki eklemek daha garantidir
-    models_to_try = [
-        'models/gemini-1.5-flash', 
-        'models/gemini-1.5-pro', 
-        'models/gemini-2.5-pro-preview-03-25', # Kullanıcının özel modeli
-        'models/gemini-pro',
-        'models/gemini-1.0-pro'
-    ]
-    
-    last_error = None
-    
-    for model_name in models_to_try:
-        try:
-            # Modeli başlat
-            model = genai.GenerativeModel(model_name)
-            
-            prompt = f"""
-            Sen uzman bir ekonomi asistanısın. Aşağıdaki YouTube videosu metnini analiz et ve **KESİNLİKLE** aşağıdaki formatı kullanarak özetle.
-            
-            **ÖNEMLİ KURALLAR:**
-            1. Her başlık için **Markdown formatında (###)** başlık kullan.
-            2. Eğer konuşmacı o konu hakkında konuşmadıysa, o başlığın altına sadece "Yorum yok." yaz.
-            3. Asla kendi yorumunu katma, sadece konuşmacının dediklerini aktar.
-            
-            **İSTENEN FORMAT:**
-            
-            ### 🌍 GENEL PİYASA YORUMU
-            - (Konuşmacının genel beklentisi buraya)
-            
-            ### 🟡 ALTIN & GÜMÜŞ
-            - (Ons/Gram tahminleri buraya)
-            
-            ### 🪙 KRİPTO PARALAR
-            - (Bitcoin/Altcoin yorumları buraya)
-            
-            ### 📈 BORSA İSTANBUL (BIST)
-            - (Endeks ve hisse yorumları buraya)
-            
-            ### 🇺🇸 ABD BORSALARI (NASDAQ/S&P)
-            - (Yurt dışı piyasa yorumları buraya)
-            
-            ### 💵 DÖVİZ (DOLAR/EURO)
-            - (Kur tahminleri buraya)
-
-            ---
-            **Metin:**
-            {text[:15000]}
-            """
-            
-            # Deneme yap
-            response = model.generate_content(prompt)
-            st.success(f"Özetleme başarıyla tamamlandı! (Kullanılan Model: {model_name})")
-            return response.text
-            
-        except Exception as e:
-            last_error = e
-            # Hata 429 (Kota) veya 404 (Bulunamadı) ise diğer modele geç
-            continue
-            
-    # Döngü bitti ve hiçbiri çalışmadıysa
-    error_msg = f"Tüm modeller denendi ancak başarısız oldu.\nSon hata: {last_error}"
-    if "429" in str(last_error):
-        error_msg = "Tüm modeller için kota aşıldı (429). Lütfen 1-2 dakika bekleyin."
-    elif "404" in str(last_error):
-        error_msg = "Modeller bulunamadı (404). API anahtarınızın yetkilerini kontrol edin."
-        
-    st.error(error_msg)
-    return None
+    if result["shared"]:
+        st.info(f"🔗 Bu video aynı anda başka bir oturumda da özetleniyordu; o sonuç paylaşıldı. (Model: {result['model']})")
+    elif result["cached"]:
+        age_minutes = int((time.time() - result["created_at"]) / 60)
+        st.success(f"⚡ Özet önbellekten getirildi! (Model: {result['model']}, {age_minutes} dk önce üretildi)")
+    else:
+        if result["failed_chunks"]:
+            st.warning(f"⚠️ Videonun {result['total_chunks']} bölümünden {result['failed_chunks']} tanesi özetlenemedi; özet eksik olabilir.")
+        st.success(f"Özetleme başarıyla tamamlandı! (Kullanılan Model: {result['model']})")
+
+    # Konuşmacının varlık bazında yön/hedef/vade görüşleri (görüş geçmişine de kaydedildi)
+    if result["stances"]:
+        with st.expander("📌 Yapılandırılmış Görüşler"):
+            st.dataframe(stance_rows(result["stances"]), hide_index=True, width="stretch")
+    return result["summary"]
 
 # Sidebar - Model Kontrolü
 with st.sidebar:
@@ -455,354 +228,333 @@ with st.sidebar:
         if not api_key:
             st.error("Önce API Anahtarı girin.")
         else:
-            try:
-                genai.configure(api_key=api_key)
-                models = list(genai.list_models())
+            # Katalog yönlendiricide anahtar başına saklanır; düğme listeyi tazeler
+            model_router.configure(api_key)
+            models = model_router.catalog(refresh=True)
+            if models is None:
+                st.error("Model listesi alınamadı. API anahtarınızı kontrol edin.")
+            else:
                 st.success(f"{len(models)} model bulundu:")
-                for m in models:
-                    if 'generateContent' in m.supported_generation_methods:
-                        st.code(m.name)
-            except Exception as e:
-                st.error(f"Hata: {e}")
-
-def highlight_keywords(text):
-    """Metindeki önemli finansal terimleri sarı ile vurgular."""
-    keywords = ["altın", "borsa", "nasdaq", "kripto", "bist", "bitcoin", "dolar", "euro", "gümüş"]
-    
-    # Regex deseni oluştur (büyük/küçük harf duyarsız)
-    for word in keywords:
-        pattern = re.compile(f"({word})", re.IGNORECASE)
-        text = pattern.sub(r'<span style="background-color: #ffd700; color: black; padding: 0px 4px; border-radius: 3px; font-weight: bold;">\1</span>', text)
-    return text
-
-# Bilinen Kanal Bilgileri (ID ve Resim)
-KNOWN_CHANNELS = {
-    "https://www.youtube.com/@cihatecicek": {
-        "id": "UCHExW8VqaE0a3W0kwSe_BXg",
-        "image": "https://yt3.googleusercontent.com/qR4VTRrsvkQvIoHUX7rZ7cZD-HEeBjXZsYvlXvc6J0dIfPkhfQUEfCJBXG9nd9cguIo-qokd6Q=s900-c-k-c0x00ffffff-no-rj"
-    },
-    "https://www.youtube.com/@TuncSatiroglu": {
-        "id": "UCOPEaE2I8pf5vHtIIxGT0Rw",
-        "image": "https://yt3.googleusercontent.com/2fRcIUMYxzT5KVlxZKyEPuVgHFbWa-PXAsX1_7Xecw7S2GNRvdKFpb8jnxZ-mNUPG4rFYxWY=s900-c-k-c0x00ffffff-no-rj"
-    }
-}
+                for name in models:
+                    st.code(name)
+
+    # Model sağlığı (404 / kota beklemesi / gecikme)
+    with st.expander("🤖 Model Durumu"):
+        st.dataframe(model_router.status(), hide_index=True, width="stretch")
+
+    # Ayna sunucu skor tablosu (Invidious / Piped)
+    with st.expander("🛰️ Ayna Sunucu Durumu"):
+        scoreboard = mirror_registry.scoreboard()
+        if scoreboard:
+            st.dataframe(scoreboard, hide_index=True, width="stretch")
+        else:
+            st.caption("Henüz ölçüm yok. Yedek kaynaklar kullanıldıkça dolacak.")
 
-def get_channel_id(channel_url):
-    """Kanal URL'sinden Channel ID'yi (UC...) bulur."""
-    # 0. Yöntem: Bilinen Kanallardan kontrol et
-    if channel_url in KNOWN_CHANNELS:
-        return KNOWN_CHANNELS[channel_url]["id"]
+NO_SUMMARY_HELP = """
+**Ama sorun değil!** 
 
-    try:
-        # ... (Diğer yöntemler aynı kalabilir) ...
-        # 1. Yöntem: URL'de zaten ID varsa
-        if "/channel/" in channel_url:
-            return channel_url.split("/channel/")[1].split("/")[0]
-        
-        # 2. Yöntem: Sayfa kaynağından regex ile bul
-        response = requests.get(channel_url, headers={'User-Agent': 'Mozilla/5.0'})
-        if response.status_code == 200:
-            match = re.search(r'"channelId":"(UC[\w-]+)"', response.text)
-            if match:
-                return match.group(1)
-            
-            # Alternatif regex
-            match = re.search(r'itemprop="channelId" content="(UC[\w-]+)"', response.text)
-            if match:
-                return match.group(1)
-                
-        return None
-    except:
-        return None
+Yukarıdaki **"Metni İndir"** butonuna basıp indirdiğiniz dosyayı:
+1. **NotebookLM**'e
+2. **ChatGPT**'ye
+3. Veya **Claude**'a yükleyerek harika özetler alabilirsiniz.
+"""
 
-import xml.etree.ElementTree as ET
+# Her bölüm ayrı fragment: bir bölümdeki tıklama sadece o bölümü yeniden çalıştırır
+@st.fragment
+def summarize_tab(api_key):
+    """Sekme 1: linkten altyazı çekme ve özetleme."""
+    video_url = st.text_input("YouTube Video Linkini Yapıştırın:", placeholder="https://www.youtube.com/watch?v=...")
 
-def get_latest_video(channel_url, debug=False):
-    """RSS Beslemesi üzerinden kanalın BUGÜN yayınlanan videolarını bulur."""
-    try:
-        channel_id = get_channel_id(channel_url)
-        
-        if debug:
-            st.write(f"🆔 Kanal ID: {channel_id}")
-            
-        if not channel_id:
-            if debug: st.error(f"Kanal ID bulunamadı: {channel_url}")
-            return None, None
-
-        rss_url = f"https://www.youtube.com/feeds/videos.xml?channel_id={channel_id}"
-        response = requests.get(rss_url, timeout=5)
-        
-        if response.status_code != 200:
-            if debug: st.error(f"RSS çekilemedi: {response.status_code}")
-            return None, None
-
-        root = ET.fromstring(response.content)
-        ns = '{http://www.w3.org/2005/Atom}'
-        yt_ns = '{http://www.youtube.com/xml/schemas/2015}'
-        
-        found_videos = []
-        last_found_video = None
-        
-        # Türkiye saati (UTC+3)
-        tr_timezone = timezone(timedelta(hours=3))
-        now = datetime.now(tr_timezone)
-        
-        for entry in root.findall(f'{ns}entry'):
-            try:
-                title = entry.find(f'{ns}title').text
-                link = entry.find(f'{ns}link').attrib['href']
-                published_str = entry.find(f'{ns}published').text # Örn: 2025-12-01T15:30:00+00:00
-                
-                # Tarihi parse et (ISO formatı)
-                # Basit ISO parse (Z veya +00:00 için)
-                if published_str.endswith('Z'):
-                    published_str = published_str[:-1] + '+00:00'
-                
-                published_dt = datetime.fromisoformat(published_str)
-                
-                # Eğer timezone bilgisi yoksa UTC varsay
-                if published_dt.tzinfo is None:
-                    published_dt = published_dt.replace(tzinfo=timezone.utc)
-                
-                # Türkiye saatine çevir
-                published_tr = published_dt.astimezone(tr_timezone)
-                
-                if debug:
-                    st.write(f"🔍 RSS: {title} | Tarih: {published_tr.strftime('%d.%m.%Y %H:%M')} (TR)")
-                
-                # Son videoyu kaydet
-                if last_found_video is None:
-                    last_found_video = {
-                        'title': title,
-                        'date': published_tr.strftime("%d.%m.%Y %H:%M")
-                    }
-                
-                # Bugün mü?
-                if published_tr.date() == now.date():
-                    found_videos.append({
-                        'title': title,
-                        'url': link,
-                        'type': 'Video/Canlı', # RSS ayrım yapmaz ama genelde Video'dur
-                        'date': published_tr.strftime("%d.%m.%Y")
-                    })
-                    
-            except Exception as e:
-                if debug: st.warning(f"Tarih hatası: {e}")
-                continue
-
-        return found_videos, last_found_video
-
-    except Exception as e:
-        if debug: st.error(f"RSS Genel Hata: {e}")
-        return None, None
-
-# ... (UI Kısmı - Tab 2) ...
+    if not st.button("Özetle 🚀", type="primary"):
+        return
+    if not api_key:
+        st.warning("Lütfen önce sol menüden API Anahtarınızı girin.")
+        return
+    if not video_url:
+        st.warning("Lütfen bir video linki girin.")
+        return
+
+    with st.spinner("Video altyazıları çekiliyor (Yeni Motor)..."):
+        transcript_text = get_transcript(video_url)
+    if not transcript_text:
+        return
+
+    # Metni hemen göster (Özetlemeyi beklemeden)
+    st.info("✅ Altyazı başarıyla çekildi! Aşağıdan metni kopyalayabilir veya indirebilirsiniz.")
+
+    # Metni genişletilebilir bir alanda göster (Varsayılan olarak açık)
+    with st.expander("📄 Videonun Tam Metni", expanded=True):
+        st.text_area("Metin", transcript_text, height=300)
+
+    # Metni indirme butonu (indirme sayfayı yeniden çalıştırmaz)
+    st.download_button(
+        label="📥 Metni İndir (TXT)",
+        data=transcript_text,
+        file_name="video_metni.txt",
+        mime="text/plain",
+        on_click="ignore",
+    )
 
-    # Sonuçları Göster (Butona basılmasa bile hafızadan göster)
-    if st.session_state.channel_results:
-        st.markdown("---")
-        st.subheader("Sonuçlar")
-        
-        for channel_name, videos in st.session_state.channel_results.items():
-            # Kanal Başlığı ve Logosu
-            channel_url = default_channels.get(channel_name)
-            channel_img = None
-            if channel_url and channel_url in KNOWN_CHANNELS:
-                channel_img = KNOWN_CHANNELS[channel_url]["image"]
-            
-            # Başlık Alanı (Resimli)
-            col_img, col_text = st.columns([1, 6])
-            with col_img:
-                if channel_img:
-                    st.image(channel_img, width=60)
-                else:
-                    st.markdown("📺")
-            with col_text:
-                st.markdown(f"### {channel_name}")
-
-            for video_data in videos:
-                with st.container():
-                    st.markdown(f"**{video_data['title']}** <span style='color:gray; font-size:0.8em'>({video_data['date']})</span>", unsafe_allow_html=True)
-                    st.caption(f"Tür: {video_data['type']} | [İzle]({video_data['url']})")
-                    
-                    # Benzersiz key kullanarak butonu oluştur
-                    btn_key = f"btn_{video_data['url']}"
-                    
-                    if st.button(f"Bu Videoyu Özetle 📝", key=btn_key):
-                         with st.spinner(f"{channel_name} videosu özetleniyor..."):
-                            transcript_text = get_transcript(video_data['url'])
-                            if transcript_text:
-                                with st.expander("📄 Tam Metin", expanded=True):
-                                    st.text_area(f"Metin - {video_data['title']}", transcript_text, height=200)
-                                
-                                st.download_button(
-                                    label="📥 Metni İndir",
-                                    data=transcript_text,
-                                    file_name=f"{channel_name}_ozet.txt",
-                                    mime="text/plain",
-                                    key=f"dl_{video_data['url']}"
-                                )
-                                
-                                # Özetleme
-                                summary = summarize_text(transcript_text, api_key)
-                                if summary:
-                                    st.markdown(highlight_keywords(summary), unsafe_allow_html=True)
-            st.markdown("---")
+    st.markdown("---")
+    st.markdown("### 🤖 Yapay Zeka Özeti")
 
-# Ana Arayüz - Sekmeli Yapı
-tab1, tab2 = st.tabs(["📺 Video Linki ile Özetle", "📡 Otomatik Takip"])
+    # Özet geldikçe bu alana yazılır
+    summary_area = st.empty()
 
-with tab1:
-    video_url = st.text_input("YouTube Video Linkini Yapıştırın:", placeholder="https://www.youtube.com/watch?v=...")
+    # Özetlemeyi dene
+    with st.spinner("Yapay zeka özeti deniyor... (Hata verirse yukarıdaki metni kullanabilirsiniz)"):
+        summary = summarize_text(transcript_text, api_key, placeholder=summary_area)
+
+    if summary:
+        st.success("Özetleme Başarılı!")
+        summary_area.markdown(highlight_keywords(summary), unsafe_allow_html=True)
+    else:
+        st.warning("⚠️ Otomatik özetleme yapılamadı (API Kotası veya Model Hatası).")
+        st.markdown(NO_SUMMARY_HELP)
+
+@st.fragment
+def video_card(channel_name, video_data, api_key):
+    """Kanal taramasında bulunan tek video; özet düğmesi sadece bu kartı yeniden çalıştırır."""
+    with st.container():
+        st.markdown(f"**{video_data['title']}** <span style='color:gray; font-size:0.8em'>({video_data['date']})</span>", unsafe_allow_html=True)
+        st.caption(f"Tür: {video_data['type']} | [İzle]({video_data['url']})")
+
+        # Arka planda hazırlanmış özet varsa beklemeden göster
+        ready = ready_summary(video_data['url'])
+        if ready:
+            with st.expander("🤖 Hazır Özet (arka planda hazırlandı)", expanded=True):
+                st.markdown(highlight_keywords(ready["summary"]), unsafe_allow_html=True)
+        else:
+            job = prefetcher.status(video_data['url'])
+            if job and job["state"] in ("waiting", "running") and job["attempts"]:
+                st.caption(f"⏳ Arka planda hazırlanıyor ({job['error'] or 'özetleniyor'}, {job['attempts']}. deneme)")
 
-    if st.button("Özetle 🚀", type="primary"):
+        # Benzersiz key kullanarak butonu oluştur
+        if not st.button("Bu Videoyu Özetle 📝", key=f"btn_{video_data['url']}"):
+            return
         if not api_key:
             st.warning("Lütfen önce sol menüden API Anahtarınızı girin.")
-        elif not video_url:
-            st.warning("Lütfen bir video linki girin.")
-        else:
-            # video_id = extract_video_id(video_url) # Artık gerek yok, yt-dlp URL istiyor
-            
-            if video_url:
-                with st.spinner("Video altyazıları çekiliyor (Yeni Motor)..."):
-                    transcript_text = get_transcript(video_url)
-                
-                if transcript_text:
-                    # Metni hemen göster (Özetlemeyi beklemeden)
-                    st.info("✅ Altyazı başarıyla çekildi! Aşağıdan metni kopyalayabilir veya indirebilirsiniz.")
-                    
-                    # Metni genişletilebilir bir alanda göster (Varsayılan olarak açık)
-                    with st.expander("📄 Videonun Tam Metni", expanded=True):
-                        st.text_area("Metin", transcript_text, height=300)
-                    
-                    # Metni indirme butonu
-                    st.download_button(
-                        label="📥 Metni İndir (TXT)",
-                        data=transcript_text,
-                        file_name="video_metni.txt",
-                        mime="text/plain"
-                    )
-
-                    st.markdown("---")
-                    st.markdown("### 🤖 Yapay Zeka Özeti")
-                    
-                    # Özetlemeyi dene
-                    with st.spinner("Yapay zeka özeti deniyor... (Hata verirse yukarıdaki metni kullanabilirsiniz)"):
-                        summary = summarize_text(transcript_text, api_key)
-                    
-                    if summary:
-                        st.success("Özetleme Başarılı!")
-                        st.markdown(highlight_keywords(summary), unsafe_allow_html=True)
-                    else:
-                        st.warning("⚠️ Otomatik özetleme yapılamadı (API Kotası veya Model Hatası).")
-                        st.markdown("""
-                        **Ama sorun değil!** 
-                        
-                        Yukarıdaki **"Metni İndir"** butonuna basıp indirdiğiniz dosyayı:
-                        1. **NotebookLM**'e
-                        2. **ChatGPT**'ye
-                        3. Veya **Claude**'a yükleyerek harika özetler alabilirsiniz.
-                        """)
+            return
+        with st.spinner(f"{channel_name} videosu özetleniyor..."):
+            transcript_text = get_transcript(video_data['url'])
+        if not transcript_text:
+            return
+
+        with st.expander("📄 Tam Metin", expanded=True):
+            st.text_area(f"Metin - {video_data['title']}", transcript_text, height=200)
+
+        st.download_button(
+            label="📥 Metni İndir",
+            data=transcript_text,
+            file_name=f"{channel_name}_ozet.txt",
+            mime="text/plain",
+            key=f"dl_{video_data['url']}",
+            on_click="ignore",
+        )
+
+        # Özetleme (geldikçe göster)
+        summary_area = st.empty()
+        summary = summarize_text(transcript_text, api_key, placeholder=summary_area)
+        if summary:
+            summary_area.markdown(highlight_keywords(summary), unsafe_allow_html=True)
+
+def scan_channels(selected_channels, debug_mode):
+    """Seçili kanalları paralel tarar; bulunan videoları seçim sırasıyla {kanal: videolar} döner."""
+    # Her kanal için durum kutusu baştan açılır, kontroller paralel yürür
+    statuses = {
+        channel_name: st.status(f"**{channel_name}** kontrol ediliyor...")
+        for channel_name in selected_channels
+    }
+    found = {}
+    with ThreadPoolExecutor(max_workers=CHANNEL_SCAN_CONCURRENCY) as executor:
+        futures = {
+            executor.submit(check_channel, FOLLOWED_CHANNELS[channel_name], debug_mode): channel_name
+            for channel_name in selected_channels
+        }
+        # Biten kanalın durumu hemen güncellenir (Streamlit çağrıları ana thread'de)
+        for future in as_completed(futures):
+            channel_name = futures[future]
+            status = statuses[channel_name]
+            latest_videos, last_video, log = future.result()
+
+            with status:
+                for level, message in log:
+                    getattr(st, level)(message)
+
+            if latest_videos:
+                # Arama indeksi videoları takip listesindeki kanal adıyla bilsin
+                for video in latest_videos:
+                    search_index.annotate(extract_video_id(video["url"]), title=video["title"], channel=channel_name,
+                                          published=video["date"], url=video["url"])
+                count = len(latest_videos)
+                status.update(label=f"✅ {channel_name}: {count} yeni içerik bulundu!", state="complete")
+                found[channel_name] = latest_videos
             else:
-                st.error("Geçersiz YouTube linki.")
+                msg = f"❌ {channel_name}: Bugün yeni video yok."
+                if last_video:
+                    msg += f" (Son Video: '{last_video['title']}' - {last_video['date']})"
+                status.update(label=msg, state="error")
 
-with tab2:
-    st.header("Takip Edilen Kanallar")
-    st.info("Bu kanalların en son yüklediği videoları veya canlı yayınları otomatik kontrol eder.")
-    
-    # Geliştirici Modu
-    debug_mode = st.checkbox("🛠️ Geliştirici Modu (Hata Ayıklama)", help="Videoların neden bulunamadığını görmek için bunu açın.")
+    # Sonuçlar seçim sırasıyla gösterilsin
+    return {channel_name: found[channel_name] for channel_name in selected_channels if channel_name in found}
 
-    # Varsayılan Kanallar
-    default_channels = {
-        "Cihat E. Çiçek": "https://www.youtube.com/@cihatecicek",
-        "Tunç Şatıroğlu": "https://www.youtube.com/@TuncSatiroglu"
-    }
-    
+@st.fragment
+def scanner_tab(api_key, debug_mode):
+    """Sekme 2: takip edilen kanalları tarama ve sonuç kartları."""
     # Kanal Listesi
     selected_channels = st.multiselect(
         "Kontrol edilecek kanalları seçin:",
-        options=list(default_channels.keys()),
-        default=list(default_channels.keys())
+        options=list(FOLLOWED_CHANNELS.keys()),
+        default=list(FOLLOWED_CHANNELS.keys())
     )
-    
+
     # Session State Başlatma (Hafıza)
     if 'channel_results' not in st.session_state:
         st.session_state.channel_results = {}
 
     if st.button("Kanalları Kontrol Et 📡"):
         if not api_key:
-             st.warning("Lütfen önce sol menüden API Anahtarınızı girin.")
+            st.warning("Lütfen önce sol menüden API Anahtarınızı girin.")
         else:
-            st.session_state.channel_results = {} # Önceki sonuçları temizle
-            for channel_name in selected_channels:
-                channel_url = default_channels[channel_name]
-                with st.status(f"**{channel_name}** kontrol ediliyor...") as status:
-                    latest_videos, last_video = get_latest_video(channel_url, debug=debug_mode)
-                    
-                    if latest_videos:
-                        count = len(latest_videos)
-                        status.update(label=f"✅ {channel_name}: {count} yeni içerik bulundu!", state="complete")
-                        st.session_state.channel_results[channel_name] = latest_videos
-                    else:
-                        msg = f"❌ {channel_name}: Bugün yeni video yok."
-                        if last_video:
-                            msg += f" (Son Video: '{last_video['title']}' - {last_video['date']})"
-                        status.update(label=msg, state="error")
-    
-    # Sonuçları Göster (Butona basılmasa bile hafızadan göster)
-    if st.session_state.channel_results:
-        st.markdown("---")
-        st.subheader("Sonuçlar")
-        
+            st.session_state.channel_results = scan_channels(selected_channels, debug_mode)
+
     # Sonuçları Göster (Butona basılmasa bile hafızadan göster)
-    if st.session_state.channel_results:
+    if not st.session_state.channel_results:
+        return
+    st.markdown("---")
+    st.subheader("Sonuçlar")
+
+    for channel_name, videos in st.session_state.channel_results.items():
+        # Kanal Başlığı ve Logosu
+        channel_url = FOLLOWED_CHANNELS.get(channel_name)
+        channel_img = None
+        if channel_url and channel_url in KNOWN_CHANNELS:
+            channel_img = KNOWN_CHANNELS[channel_url]["image"]
+
+        # Başlık Alanı (Resimli)
+        col_img, col_text = st.columns([1, 6])
+        with col_img:
+            if channel_img:
+                st.image(channel_img, width=60)
+            else:
+                st.markdown("📺")
+        with col_text:
+            st.markdown(f"### {channel_name}")
+
+        for video_data in videos:
+            video_card(channel_name, video_data, api_key)
         st.markdown("---")
-        st.subheader("Sonuçlar")
-        
-        for channel_name, videos in st.session_state.channel_results.items():
-            # Kanal Başlığı ve Logosu
-            channel_url = default_channels.get(channel_name)
-            channel_img = None
-            if channel_url and channel_url in KNOWN_CHANNELS:
-                channel_img = KNOWN_CHANNELS[channel_url]["image"]
-            
-            # Başlık Alanı (Resimli)
-            col_img, col_text = st.columns([1, 6])
-            with col_img:
-                if channel_img:
-                    st.image(channel_img, width=60)
-                else:
-                    st.markdown("📺")
-            with col_text:
-                st.markdown(f"### {channel_name}")
-
-            for video_data in videos:
-                with st.container():
-                    st.markdown(f"**{video_data['title']}** <span style='color:gray; font-size:0.8em'>({video_data['date']})</span>", unsafe_allow_html=True)
-                    st.caption(f"Tür: {video_data['type']} | [İzle]({video_data['url']})")
-                    
-                    # Benzersiz key kullanarak butonu oluştur
-                    btn_key = f"btn_{video_data['url']}"
-                    
-                    if st.button(f"Bu Videoyu Özetle 📝", key=btn_key):
-                         with st.spinner(f"{channel_name} videosu özetleniyor..."):
-                            transcript_text = get_transcript(video_data['url'])
-                            if transcript_text:
-                                with st.expander("📄 Tam Metin", expanded=True):
-                                    st.text_area(f"Metin - {video_data['title']}", transcript_text, height=200)
-                                
-                                st.download_button(
-                                    label="📥 Metni İndir",
-                                    data=transcript_text,
-                                    file_name=f"{channel_name}_ozet.txt",
-                                    mime="text/plain",
-                                    key=f"dl_{video_data['url']}"
-                                )
-                                
-                                # Özetleme
-                                summary = summarize_text(transcript_text, api_key)
-                                if summary:
-                                    st.markdown(highlight_keywords(summary), unsafe_allow_html=True)
-            st.markdown("---")
 
+SEARCH_KINDS = {None: "Hepsi", "transcript": "📄 Altyazı", "summary": "🤖 Özet"}
+
+@st.fragment
+def search_tab():
+    """Sekme 3: daha önce çekilen altyazı ve özetlerde tam metin arama."""
+    indexed_videos, indexed_passages = search_index.stats()
+    st.caption(f"Arşivde {indexed_videos} video ({indexed_passages} parça) var. Çekilen her altyazı ve özet otomatik eklenir.")
+
+    query = st.text_input("Arşivde ara:", placeholder="ör. gram altın")
+    col_channel, col_section, col_kind = st.columns(3)
+    with col_channel:
+        channels = st.multiselect("Kanal", search_index.channels())
+    with col_section:
+        section = st.selectbox("Bölüm", [None] + list(SECTIONS), format_func=lambda key: SECTIONS[key][0] if key else "Hepsi")
+    with col_kind:
+        kind = st.selectbox("Kaynak", list(SEARCH_KINDS), format_func=SEARCH_KINDS.get)
+    dates = st.date_input("Yayın tarihi aralığı", value=(), format="DD.MM.YYYY")
+
+    if not query and not section:
+        return
+    started = time.perf_counter()
+    results = search_index.search(
+        query, channels=channels, section=section, kind=kind,
+        date_from=dates[0].isoformat() if len(dates) > 0 else None,
+        date_to=dates[1].isoformat() if len(dates) > 1 else None,
+    )
+    st.caption(f"{len(results)} sonuç · {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    for result in results:
+        details = [result["channel"] or "Bilinmeyen kanal", result["published"] or "tarih yok", SEARCH_KINDS[result["kind"]]]
+        link = result["url"]
+        if result["start_ms"] is not None:
+            seconds = result["start_ms"] // 1000
+            link = f"https://www.youtube.com/watch?v={result['video_id']}&t={seconds}s"
+            details.append(f"{seconds // 60}:{seconds % 60:02d}")
+        st.markdown(f"**[{result['title'] or result['video_id']}]({link})** <span style='color:gray; font-size:0.8em'>{' · '.join(details)}</span>", unsafe_allow_html=True)
+        st.markdown(result["snippet"], unsafe_allow_html=True)
+
+# Görüş trendi kayan penceresi (gün)
+TREND_WINDOW_DAYS = int(os.getenv("TREND_WINDOW_DAYS", "90"))
+TREND_COLUMNS = {
+    "channel": "Kanal", "asset": "Varlık", "records": "Görüş", "up": "⬆️", "down": "⬇️", "flat": "➡️",
+    "stance": "Güncel Eğilim", "evaluated": "Değerlendirilen", "hit_rate": "İsabet", "last_published": "Son Görüş",
+}
+
+@st.fragment
+def trends_tab():
+    """Sekme 4: kanal/varlık bazında görüş geçmişi, kayan görüş ve isabet oranları."""
+    table, rolling = stance_store.trend(window=f"{TREND_WINDOW_DAYS}D")
+    if table.empty:
+        st.info("Henüz görüş kaydı yok. Özetlenen her video, konuşmacının varlık bazındaki görüşleriyle buraya eklenir.")
+        return
+
+    if st.button("🎯 İsabet Oranlarını Güncelle", help="Vadesi dolan görüşleri Yahoo Finance kapanışlarıyla karşılaştırır."):
+        with st.spinner("Fiyat geçmişi çekiliyor..."):
+            prices = get_price_history()
+        if prices is None:
+            st.error("Fiyat geçmişi alınamadı, daha sonra tekrar deneyin.")
+        else:
+            st.success(f"{stance_store.evaluate(prices)} yeni görüş değerlendirildi.")
+            table, rolling = stance_store.trend(window=f"{TREND_WINDOW_DAYS}D")
+
+    assets = st.multiselect("Varlık", list(SECTIONS), format_func=lambda key: SECTIONS[key][0])
+    if assets:
+        table = table[table["asset"].isin(assets)]
+        rolling = rolling[rolling["asset"].isin(assets)]
+
+    st.dataframe(
+        table.assign(asset=table["asset"].map(lambda key: SECTIONS[key][0]))[
+            ["channel", "asset", "records", "up", "down", "flat", "stance", "evaluated", "hit_rate", "last_published"]
+        ].rename(columns=TREND_COLUMNS),
+        hide_index=True, width="stretch",
+    )
+
+    # Kayan görüş: -1 (hep düşüş) ... +1 (hep yükseliş)
+    st.caption(f"Son {TREND_WINDOW_DAYS} günlük kayan ortalama görüş (-1 düşüş, +1 yükseliş)")
+    if not rolling.empty:
+        chart = rolling.assign(series=rolling["channel"] + " · " + rolling["asset"].map(lambda key: SECTIONS[key][0]))
+        st.line_chart(chart.pivot_table(index="published", columns="series", values="stance").ffill())
+
+# Ana Arayüz - Sekmeli Yapı
+tab1, tab2, tab3, tab4 = st.tabs(["📺 Video Linki ile Özetle", "📡 Otomatik Takip", "🔎 Arşivde Ara", "📈 Görüş Trendleri"])
+
+with tab1:
+    summarize_tab(api_key)
+
+with tab2:
+    st.header("Takip Edilen Kanallar")
+    st.info("Bu kanalların en son yüklediği videoları veya canlı yayınları otomatik kontrol eder.")
+
+    # Geliştirici Modu (kenar çubuğuna da yazdığı için fragment dışında; değişince tüm sayfa yenilenir)
+    debug_mode = st.checkbox("🛠️ Geliştirici Modu (Hata Ayıklama)", help="Videoların neden bulunamadığını görmek için bunu açın.")
+
+    # Aşama süreleri ve kaynak başarıları (sadece geliştirici modunda)
+    if debug_mode:
+        with st.sidebar.expander("📊 Aşama Ölçümleri", expanded=True):
+            stage_rows = metrics.table()
+            if stage_rows:
+                st.dataframe(stage_rows, hide_index=True, width="stretch")
+                st.dataframe(metrics.counter_table(), hide_index=True, width="stretch")
+            else:
+                st.caption("Henüz ölçüm yok.")
+            if METRICS_PORT:
+                st.caption(f"Prometheus: http://{METRICS_HOST}:{METRICS_PORT}/metrics · JSON: /metrics.json")
+
+    scanner_tab(api_key, debug_mode)
+
+with tab3:
+    search_tab()
+
+with tab4:
+    # Sekme geçişi tarayıcıda kalır (yeniden çalıştırma yok); trend, veri değişmedikçe önbellekten gelir
+    trends_tab()
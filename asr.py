@@ -0,0 +1,296 @@
+"""Altyazı bulunamadığında son çare: sesi indirip yerel konuşma tanıma (ASR) ile metne çevirir.
+
+Ses bir kez indirilir, ffmpeg tek geçişte 16 kHz mono WAV'a çevirirken sessizlikleri de bulur.
+Ses, sessizlik ortalarından ~ASR_SEGMENT_SECONDS uzunluğunda parçalara bölünür ve parçalar
+işlemci çekirdekleri arasında (ProcessPoolExecutor) paralel tanınır; sonuç altyazı yolundaki gibi
+zaman damgalı bir Transcript'tir. Arayüzde arka planda çalışır (transcripts.asr_jobs); sonuç
+önbellekte "asr" kaynağıyla geçici tutulur ve altyazı yayınlanınca onunla değiştirilir.
+
+Arka uç değiştirilebilir: ASR_ENGINE "faster-whisper" (pip install faster-whisper), "stub"
+(deneme için sahte motor) ya da "paket.modul:Sinif" biçiminde AsrEngine alt sınıfı olabilir.
+Yerel dosyayla denemek için: python asr.py kayit.mp3 --engine stub
+"""
+import glob
+import importlib
+import importlib.util
+import multiprocessing
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import wave
+from abc import ABC, abstractmethod
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ProcessPoolExecutor
+
+import yt_dlp
+
+from caption_parsers import CaptionWriter
+from metrics import error_outcome, metrics
+
+# Boş bırakılırsa ses tanıma aşaması kapalıdır
+ASR_ENGINE = os.getenv("ASR_ENGINE", "faster-whisper")
+ASR_MODEL = os.getenv("ASR_MODEL", "small")
+ASR_LANGUAGE = os.getenv("ASR_LANGUAGE", "tr")
+# Paralel tanıma süreci sayısı (varsayılan: çekirdek sayısı)
+ASR_WORKERS = int(os.getenv("ASR_WORKERS", "0")) or os.cpu_count() or 1
+# Hedef parça uzunluğu (sn); sessizlik bulunamazsa parça en fazla iki katına kadar uzar
+ASR_SEGMENT_SECONDS = float(os.getenv("ASR_SEGMENT_SECONDS", "45"))
+# Bundan uzun (veya hâlâ canlı) yayınlar indirilmez
+ASR_MAX_AUDIO_MINUTES = float(os.getenv("ASR_MAX_AUDIO_MINUTES", "240"))
+# Sessizlik algılama eşiği (dB) ve en kısa sessizlik süresi (sn)
+ASR_SILENCE_DB = float(os.getenv("ASR_SILENCE_DB", "-35"))
+ASR_SILENCE_SECONDS = float(os.getenv("ASR_SILENCE_SECONDS", "0.4"))
+# Aynı anda arka planda çalışabilecek ses tanıma işi (her iş zaten tüm çekirdekleri kullanır)
+ASR_BACKGROUND_JOBS = int(os.getenv("ASR_BACKGROUND_JOBS", "1"))
+# Ses tanıma metinleri geçicidir: bu süre geçince yayınlanmış altyazı yeniden aranır (sn)
+ASR_RECHECK_SECONDS = float(os.getenv("ASR_RECHECK_SECONDS", "1800"))
+# Streamlit sunucusu çok thread'li olduğundan işçi süreçler fork yerine spawn ile başlatılır
+ASR_START_METHOD = os.getenv("ASR_START_METHOD", "spawn")
+
+SAMPLE_RATE = 16000
+# Altyazı önbelleğinde ses tanıma kayıtlarının kaynak adı
+ASR_SOURCE = "asr"
+
+SILENCE_START = re.compile(r"silence_start: (-?[\d.]+)")
+SILENCE_END = re.compile(r"silence_end: (-?[\d.]+)")
+
+
+class AsrUnavailable(Exception):
+    """Ses tanıma yapılamıyor (motor/ffmpeg yok, yayın canlı veya çok uzun)."""
+
+
+class AsrEngine(ABC):
+    """Yerel konuşma tanıma arka ucu. Her işçi süreçte bir kez oluşturulur."""
+
+    name = "base"
+
+    @classmethod
+    def available(cls):
+        return True
+
+    def __init__(self, model=ASR_MODEL, language=ASR_LANGUAGE):
+        self.model = model
+        self.language = language
+
+    @abstractmethod
+    def transcribe(self, path):
+        """16 kHz mono WAV dosyasını [(başlangıç sn, bitiş sn, metin)] listesine çevirir."""
+
+
+class StubEngine(AsrEngine):
+    """Deneme motoru: modelsiz, her parça için süresini söyleyen tek satır döner."""
+
+    name = "stub"
+
+    def transcribe(self, path):
+        with wave.open(path, "rb") as f:
+            seconds = f.getnframes() / f.getframerate()
+        return [(0.0, seconds, f"[{seconds:.1f} sn konuşma]")]
+
+
+class FasterWhisperEngine(AsrEngine):
+    """faster-whisper (CTranslate2) ile CPU'da tanıma; paralellik süreçlerden geldiği için süreç başına tek thread."""
+
+    name = "faster-whisper"
+
+    @classmethod
+    def available(cls):
+        return importlib.util.find_spec("faster_whisper") is not None
+
+    def __init__(self, model=ASR_MODEL, language=ASR_LANGUAGE):
+        super().__init__(model, language)
+        from faster_whisper import WhisperModel
+        self.whisper = WhisperModel(model, device="cpu", compute_type="int8", cpu_threads=1)
+
+    def transcribe(self, path):
+        segments, _ = self.whisper.transcribe(path, language=self.language, beam_size=1, vad_filter=False)
+        return [(segment.start, segment.end, segment.text) for segment in segments]
+
+
+ENGINES = {engine.name: engine for engine in (StubEngine, FasterWhisperEngine)}
+
+
+def engine_class(name=ASR_ENGINE):
+    """Motor adını (veya "modul:Sinif") sınıfa çevirir."""
+    if name in ENGINES:
+        return ENGINES[name]
+    module_name, _, class_name = name.partition(":")
+    if not class_name:
+        raise AsrUnavailable(f"Bilinmeyen ASR motoru: {name}")
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def asr_available(name=ASR_ENGINE):
+    """Ses tanıma aşaması çalışabilir mi (motor seçili ve kurulu, ffmpeg var)."""
+    if not name or shutil.which("ffmpeg") is None:
+        return False
+    try:
+        return engine_class(name).available()
+    except Exception:
+        return False
+
+
+def parse_silences(log, duration):
+    """ffmpeg silencedetect çıktısından [(başlangıç, bitiş)] sn listesi."""
+    starts = [float(value) for value in SILENCE_START.findall(log)]
+    ends = [float(value) for value in SILENCE_END.findall(log)]
+    # Dosya sessizlikle biterse son silence_end yazılmaz
+    ends += [duration] * (len(starts) - len(ends))
+    return [(max(0.0, start), end) for start, end in zip(starts, ends)]
+
+
+def plan_segments(duration, silences, target=ASR_SEGMENT_SECONDS):
+    """Sesi sessizlik ortalarından ~target sn'lik parçalara böler; [(başlangıç, bitiş)] sn döner.
+
+    Kesim, [target/2, 2*target] aralığındaki hedefe en yakın sessizlikten yapılır; aralıkta sessizlik
+    yoksa parça 2*target'ta kesilir.
+    """
+    cuts = sorted((start + end) / 2 for start, end in silences)
+    segments = []
+    start = 0.0
+    while duration - start > target * 2:
+        low = bisect_left(cuts, start + target / 2)
+        high = bisect_right(cuts, start + target * 2)
+        if low < high:
+            cut = min(cuts[low:high], key=lambda c: abs(c - start - target))
+        else:
+            cut = start + target * 2
+        segments.append((start, cut))
+        start = cut
+    if duration > start:
+        segments.append((start, duration))
+    return segments
+
+
+def decode_audio(source, wav_path):
+    """ffmpeg ile tek geçişte 16 kHz mono WAV'a çevirir ve sessizlikleri bulur; (süre sn, sessizlikler) döner."""
+    command = [
+        "ffmpeg", "-hide_banner", "-nostdin", "-y", "-i", source, "-vn", "-ac", "1", "-ar", str(SAMPLE_RATE),
+        "-af", f"silencedetect=noise={ASR_SILENCE_DB}dB:d={ASR_SILENCE_SECONDS}", "-c:a", "pcm_s16le", wav_path,
+    ]
+    process = subprocess.run(command, capture_output=True, text=True, errors="replace")
+    if process.returncode != 0:
+        raise RuntimeError(f"ffmpeg hatası: {process.stderr[-500:]}")
+    with wave.open(wav_path, "rb") as f:
+        duration = f.getnframes() / f.getframerate()
+    return duration, parse_silences(process.stderr, duration)
+
+
+def split_wav(wav_path, segments, directory):
+    """WAV'ı parça dosyalarına böler (PCM olduğu için yeniden kodlama yok); dosya yollarını döner."""
+    paths = []
+    with wave.open(wav_path, "rb") as source:
+        rate = source.getframerate()
+        for i, (start, end) in enumerate(segments):
+            source.setpos(int(start * rate))
+            frames = source.readframes(int(end * rate) - int(start * rate))
+            path = os.path.join(directory, f"segment_{i:05d}.wav")
+            with wave.open(path, "wb") as target:
+                target.setparams(source.getparams())
+                target.writeframes(frames)
+            paths.append(path)
+    return paths
+
+
+# İşçi süreçteki motor (süreç başına bir kez yüklenir)
+_worker_engine = None
+
+
+def _init_worker(engine_name, model, language):
+    global _worker_engine
+    _worker_engine = engine_class(engine_name)(model=model, language=language)
+
+
+def _transcribe_segment(path):
+    return _worker_engine.transcribe(path)
+
+
+def transcribe_wav(wav_path, duration, silences, engine=ASR_ENGINE, model=ASR_MODEL, language=ASR_LANGUAGE,
+                   workers=ASR_WORKERS, on_progress=None):
+    """16 kHz mono WAV'ı parçalara bölüp paralel tanır; parçaları birleştirip Transcript döner.
+
+    on_progress(mesaj, oran) her parça tanındığında çağrılır.
+    """
+    segments = plan_segments(duration, silences)
+    writer = CaptionWriter(dedupe=False)
+    with tempfile.TemporaryDirectory(prefix="youtekonomi-asr-") as directory:
+        paths = split_wav(wav_path, segments, directory)
+        workers = max(1, min(workers, len(paths)))
+        context = multiprocessing.get_context(ASR_START_METHOD)
+        with metrics.span("asr_transcribe", engine=engine):
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker,
+                                     initargs=(engine, model, language)) as executor:
+                # Sonuçlar parça sırasıyla gelir; zamanlar parçanın başlangıcına göre kaydırılır
+                for done, ((offset, _), lines) in enumerate(zip(segments, executor.map(_transcribe_segment, paths)), 1):
+                    for start, end, text in lines:
+                        writer.add((offset + start) * 1000, (end - start) * 1000, text)
+                    if on_progress is not None:
+                        on_progress(f"Metne çevriliyor ({done}/{len(paths)} parça)", 0.1 + 0.9 * done / len(paths))
+    return writer.build()
+
+
+def transcribe_file(source, engine=ASR_ENGINE, on_progress=None, **kwargs):
+    """Yerel (ya da ffmpeg'in açabildiği) ses/video dosyasını metne çevirir; Transcript döner."""
+    with tempfile.TemporaryDirectory(prefix="youtekonomi-asr-") as directory:
+        wav_path = os.path.join(directory, "audio.wav")
+        if on_progress is not None:
+            on_progress("Ses çözülüyor", 0.05)
+        with metrics.span("asr_decode"):
+            duration, silences = decode_audio(source, wav_path)
+        return transcribe_wav(wav_path, duration, silences, engine=engine, on_progress=on_progress, **kwargs)
+
+
+def download_audio(video_url, directory):
+    """Videonun en iyi ses akışını indirir; dosya yolunu döner. Canlı veya çok uzun yayınlarda AsrUnavailable."""
+    options = {
+        'format': 'bestaudio/best',
+        'outtmpl': os.path.join(directory, 'source.%(ext)s'),
+        'quiet': True,
+        'no_warnings': True,
+        'noplaylist': True,
+    }
+    with yt_dlp.YoutubeDL(options) as ydl:
+        info = ydl.extract_info(video_url, download=False)
+        if info.get('is_live'):
+            raise AsrUnavailable("Yayın hâlâ canlı; ses tanıma yayın bitince yapılabilir.")
+        if (info.get('duration') or 0) > ASR_MAX_AUDIO_MINUTES * 60:
+            raise AsrUnavailable(f"Video {ASR_MAX_AUDIO_MINUTES:.0f} dakikadan uzun.")
+        ydl.process_ie_result(info, download=True)
+    files = glob.glob(os.path.join(directory, 'source.*'))
+    if not files:
+        raise RuntimeError("Ses dosyası indirilemedi.")
+    return files[0]
+
+
+def transcript_from_asr(video_url, cancel=None, on_progress=None):
+    """5. YÖNTEM: Ses indirme + yerel konuşma tanıma (son çare; dakikalar sürebilir)"""
+    if not asr_available():
+        return None
+    try:
+        with tempfile.TemporaryDirectory(prefix="youtekonomi-asr-") as directory:
+            if on_progress is not None:
+                on_progress("Ses indiriliyor", 0.0)
+            with metrics.span("asr_download"):
+                audio_path = download_audio(video_url, directory)
+            if cancel and cancel.is_set(): return None
+            transcript = transcribe_file(audio_path, on_progress=on_progress)
+        if transcript:
+            return transcript, ASR_SOURCE, ASR_LANGUAGE
+    except Exception as e:
+        print(f"Ses tanıma hatası: {e}")
+        metrics.inc("source_error", source="asr", kind="unavailable" if isinstance(e, AsrUnavailable) else error_outcome(e))
+    return None
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Yerel ses dosyasını parçalı/paralel ses tanımayla metne çevirir")
+    parser.add_argument("source", help="Ses veya video dosyası")
+    parser.add_argument("--engine", default=ASR_ENGINE or "stub", help="faster-whisper, stub veya modul:Sinif")
+    parser.add_argument("--workers", type=int, default=ASR_WORKERS)
+    args = parser.parse_args()
+    for start_ms, duration_ms, text in transcribe_file(args.source, engine=args.engine, workers=args.workers):
+        print(f"[{start_ms / 1000:8.1f}] {text}")
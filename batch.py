@@ -0,0 +1,233 @@
+"""Youtekonomi toplu özetleme aracı (Streamlit olmadan).
+
+Örnekler:
+    python batch.py --urls linkler.txt --output sabah.jsonl
+    python batch.py --channels --format md --output bulten.md
+    python batch.py --channels --urls ekstra.txt --fetch-workers 6 --summary-workers 2
+
+Altyazı çekme (YouTube tarafı) ve özetleme (Gemini tarafı) ayrı eşzamanlılık sınırlarıyla boru hattı
+olarak çalışır: bir videonun altyazısı gelir gelmez özet kuyruğuna girer. Uzun videoların parça özetleri
+süreç genelindeki ortak havuzu paylaşır; aynı anda en fazla SUMMARY_CONCURRENCY parça çağrısı ile
+--summary-workers kadar tek parça/birleştirme çağrısı Gemini'ye gider. Çıktı dosyasında zaten
+başarıyla özetlenmiş videolar (--resume, varsayılan) atlanır.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from channels import FOLLOWED_CHANNELS, get_latest_video
+from metrics import metrics
+from search_index import search_index
+from summarizer import summarize, summary_error_message
+from transcripts import extract_video_id, load_transcript
+
+# Markdown çıktısında her videonun başına konan işaret (devam ederken okunur)
+MD_MARKER = re.compile(r'<!-- video_id: ([\w-]+) -->')
+
+
+def read_url_file(path):
+    """Her satırda bir link; boş satırlar ve # ile başlayanlar atlanır."""
+    jobs = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                jobs.append({"url": line, "title": None, "channel": None, "date": None})
+    return jobs
+
+
+def channel_jobs(channels, workers):
+    """Takip edilen kanalların bugünkü videolarını (paralel RSS kontrolüyle) iş listesine çevirir."""
+    def check(item):
+        channel_name, channel_url = item
+        latest_videos, last_video = get_latest_video(channel_url)
+        if latest_videos is None:
+            print(f"⚠️  {channel_name}: RSS okunamadı", file=sys.stderr)
+        return channel_name, latest_videos or []
+
+    jobs = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for channel_name, videos in executor.map(check, channels.items()):
+            for video in videos:
+                jobs.append({"url": video["url"], "title": video["title"], "channel": channel_name, "date": video["date"]})
+                search_index.annotate(extract_video_id(video["url"]), title=video["title"], channel=channel_name,
+                                      published=video["date"], url=video["url"])
+    return jobs
+
+
+def completed_ids(path, fmt):
+    """Çıktı dosyasında başarıyla tamamlanmış video ID'leri."""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        if fmt == "jsonl":
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if record.get("summary"):
+                    done.add(record.get("video_id"))
+        else:
+            done.update(MD_MARKER.findall(f.read()))
+    return done
+
+
+def format_markdown(record):
+    title = record["title"] or record["url"]
+    lines = [
+        f"<!-- video_id: {record['video_id']} -->",
+        f"## {title}",
+        "",
+    ]
+    meta = [part for part in (record["channel"], record["date"], f"[İzle]({record['url']})") if part]
+    lines.append(" | ".join(meta))
+    lines.append("")
+    lines.append(record["summary"].strip())
+    lines.append("")
+    lines.append("---")
+    lines.append("")
+    return "\n".join(lines)
+
+
+class ResultWriter:
+    """Sonuçları geldikçe (thread-safe) dosyaya ekler; yarıda kesilen çalışma kaldığı yerden devam edebilir."""
+
+    def __init__(self, path, fmt):
+        self.fmt = fmt
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8") if path != "-" else sys.stdout
+
+    def write(self, record):
+        if self.fmt == "jsonl":
+            text = json.dumps(record, ensure_ascii=False) + "\n"
+        elif record.get("summary"):
+            text = format_markdown(record)
+        else:
+            # Markdown çıktısına hatalar yazılmaz, tekrar çalıştırınca yeniden denenir
+            return
+        with self._lock:
+            self._file.write(text)
+            self._file.flush()
+
+    def close(self):
+        if self._file is not sys.stdout:
+            self._file.close()
+
+
+def run(jobs, api_key, writer, fetch_workers, summary_workers):
+    """Altyazı ve özet adımlarını iki ayrı havuzda boru hattı olarak çalıştırır. (başarılı, başarısız) döner."""
+    counts = {"ok": 0, "failed": 0}
+    counts_lock = threading.Lock()
+    total = len(jobs)
+
+    def finish(job, started, summary=None, model=None, error=None, stances=None):
+        record = {
+            "video_id": job["video_id"],
+            "url": job["url"],
+            "title": job["title"],
+            "channel": job["channel"],
+            "date": job["date"],
+            "summary": summary,
+            "model": model,
+            "stances": stances,
+            "error": error,
+            "seconds": round(time.monotonic() - started, 2),
+        }
+        writer.write(record)
+        with counts_lock:
+            counts["ok" if summary else "failed"] += 1
+            done = counts["ok"] + counts["failed"]
+        status = "✅" if summary else f"❌ {error}"
+        print(f"[{done}/{total}] {job['video_id']} {status} ({record['seconds']} sn)", file=sys.stderr)
+
+    def summarize_job(job, text, started):
+        try:
+            result = summarize(text, api_key)
+            finish(job, started, summary=result["summary"], model=result["model"], stances=result["stances"])
+        except Exception as e:
+            finish(job, started, error=summary_error_message(e))
+
+    with ThreadPoolExecutor(max_workers=summary_workers, thread_name_prefix="gemini") as summary_pool:
+        def fetch_job(job):
+            started = time.monotonic()
+            try:
+                # Toplu araçta beklemek sorun değil: altyazı yoksa yerel ses tanıma da denenir
+                text = load_transcript(job["url"], asr=True)
+            except Exception as e:
+                text = None
+                print(f"Altyazı hatası ({job['video_id']}): {e}", file=sys.stderr)
+            if not text:
+                finish(job, started, error="Altyazı alınamadı")
+                return
+            # Altyazı hazır: Gemini kuyruğuna gönder, YouTube işçisi bir sonraki videoya geçsin
+            summary_pool.submit(summarize_job, job, text, started)
+
+        with ThreadPoolExecutor(max_workers=fetch_workers, thread_name_prefix="youtube") as fetch_pool:
+            list(fetch_pool.map(fetch_job, jobs))
+
+    return counts["ok"], counts["failed"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="YouTube ekonomi videolarını toplu özetler.")
+    parser.add_argument("--urls", help="Her satırında bir video linki olan dosya")
+    parser.add_argument("--channels", action="store_true", help="Takip edilen kanalların bugünkü videolarını ekle")
+    parser.add_argument("--output", "-o", default="-", help="Çıktı dosyası (varsayılan: standart çıktı)")
+    parser.add_argument("--format", choices=["jsonl", "md"], default="jsonl", help="Çıktı biçimi")
+    parser.add_argument("--fetch-workers", type=int, default=4, help="Aynı anda çekilecek altyazı sayısı (YouTube tarafı)")
+    parser.add_argument("--summary-workers", type=int, default=2, help="Aynı anda yapılacak özet sayısı (Gemini tarafı); parça çağrıları ayrıca "
+                             "toplamda SUMMARY_CONCURRENCY ile sınırlıdır")
+    parser.add_argument("--no-resume", action="store_true", help="Çıktıda olan videoları da yeniden özetle")
+    parser.add_argument("--api-key", default=os.getenv("GEMINI_API_KEY"), help="Gemini API anahtarı (varsayılan: GEMINI_API_KEY)")
+    args = parser.parse_args(argv)
+
+    if not args.urls and not args.channels:
+        parser.error("--urls veya --channels verilmeli.")
+    if not args.api_key:
+        parser.error("Gemini API anahtarı gerekli (--api-key veya GEMINI_API_KEY).")
+
+    jobs = []
+    if args.channels:
+        jobs.extend(channel_jobs(FOLLOWED_CHANNELS, args.fetch_workers))
+    if args.urls:
+        jobs.extend(read_url_file(args.urls))
+
+    # Geçersiz linkleri ve tekrarları ayıkla, daha önce tamamlananları atla
+    done = set() if args.no_resume or args.output == "-" else completed_ids(args.output, args.format)
+    unique_jobs, seen = [], set()
+    for job in jobs:
+        job["video_id"] = extract_video_id(job["url"])
+        if not job["video_id"]:
+            print(f"⚠️  Geçersiz link atlandı: {job['url']}", file=sys.stderr)
+            continue
+        if job["video_id"] in seen or job["video_id"] in done:
+            continue
+        seen.add(job["video_id"])
+        unique_jobs.append(job)
+
+    skipped = len(done & {extract_video_id(job["url"]) for job in jobs})
+    print(f"{len(unique_jobs)} video özetlenecek ({skipped} tanesi zaten tamamlanmış).", file=sys.stderr)
+    if not unique_jobs:
+        return 0
+
+    # Uzun çalışmalarda aşama süreleri METRICS_PORT üzerinden izlenebilir
+    metrics.start_server()
+    writer = ResultWriter(args.output, args.format)
+    try:
+        ok, failed = run(unique_jobs, args.api_key, writer, args.fetch_workers, args.summary_workers)
+    finally:
+        writer.close()
+
+    print(f"Bitti: {ok} başarılı, {failed} başarısız.", file=sys.stderr)
+    return 0 if not failed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
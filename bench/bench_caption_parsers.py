@@ -0,0 +1,154 @@
+"""Altyazı ayrıştırıcıları için mikro kıyaslama (ağ gerektirmez).
+
+Çok saatlik canlı yayınları taklit eden json3, WebVTT (kayan otomatik altyazı) ve srv3 dosyaları üretir,
+eski yöntemle (string'e += ile ekleme + üç geçişli temizlik) yeni tek geçişli ayrıştırıcıları karşılaştırır.
+Eski yöntem sadece düz metin üretir (zaman damgası ve kayan satır ayıklaması yok; VTT'de her satır iki kez
+yazılır); yeni ayrıştırıcılar satır başına zaman damgası da tuttuğu için "hız" 1x'in altında kalabilir.
+
+Örnek:
+    python bench/bench_caption_parsers.py --hours 3 --repeat 3
+    python bench/bench_caption_parsers.py --fixtures /tmp/altyazi   # üretilen dosyaları sakla
+"""
+import argparse
+import html
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from caption_parsers import parse_json3, parse_ttml, parse_vtt  # noqa: E402
+
+WORDS = ("piyasa faiz enflasyon dolar altın borsa merkez bankası kur büyüme resesyon petrol "
+         "bitcoin tahvil getiri fed ekonomi yatırım risk &amp; beklenti veri").split()
+
+
+def fmt_clock(ms):
+    hours, ms = divmod(ms, 3600000)
+    minutes, ms = divmod(ms, 60000)
+    seconds, ms = divmod(ms, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}.{ms:03d}"
+
+
+def generate_lines(hours, seed=7):
+    """Yaklaşık 2 saniyede bir gelen 4-8 kelimelik satırlar: [(başlangıç ms, [kelimeler])]"""
+    rng = random.Random(seed)
+    lines, t = [], 0
+    while t < hours * 3600000:
+        lines.append((t, [rng.choice(WORDS) for _ in range(rng.randint(4, 8))]))
+        t += rng.randint(1500, 2500)
+    return lines
+
+
+def make_vtt(lines):
+    """YouTube otomatik altyazı biçimi: her işaret önceki satırı tekrarlar, yeni kelimeler satır içi zamanlıdır."""
+    out = ["WEBVTT", "Kind: captions", "Language: tr", ""]
+    previous = ""
+    for i, (start, words) in enumerate(lines):
+        end = lines[i + 1][0] if i + 1 < len(lines) else start + 2000
+        step = (end - start) // len(words)
+        timed = words[0] + "".join(f"<{fmt_clock(start + k * step)}><c> {w}</c>" for k, w in enumerate(words[1:], 1))
+        out.append(f"{fmt_clock(start)} --> {fmt_clock(end)} align:start position:0%")
+        out.append(previous if previous else " ")
+        out.append(timed)
+        out.append("")
+        previous = " ".join(words)
+    return "\n".join(out)
+
+
+def make_json3(lines):
+    events = []
+    for start, words in lines:
+        segs = [{"utf8": words[0]}] + [{"utf8": " " + w, "tOffsetMs": k * 200} for k, w in enumerate(words[1:], 1)]
+        events.append({"tStartMs": start, "dDurationMs": 2000, "segs": segs})
+        events.append({"tStartMs": start + 1990, "dDurationMs": 10, "aAppend": 1, "segs": [{"utf8": "\n"}]})
+    return json.dumps({"wireMagic": "pb3", "events": events})
+
+
+def make_srv3(lines):
+    out = ['<?xml version="1.0" encoding="utf-8" ?><timedtext format="3"><body>']
+    for start, words in lines:
+        spans = "".join(f'<s t="{k * 200}">{" " if k else ""}{w}</s>' for k, w in enumerate(words))
+        out.append(f'<p t="{start}" d="2000">{spans}</p>')
+    out.append("</body></timedtext>")
+    return "\n".join(out)
+
+
+def clean_xml_transcript(text):
+    """Eski üç geçişli temizlik (karşılaştırma için)."""
+    text = re.sub(r'<[^>]+>', ' ', text)
+    text = html.unescape(text)
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def legacy_json3(content):
+    data = json.loads(content)
+    text_content = ""
+    for event in data.get('events', []):
+        if 'segs' in event:
+            for seg in event['segs']:
+                if 'utf8' in seg:
+                    text_content += seg['utf8'] + " "
+    return clean_xml_transcript(text_content)
+
+
+def legacy_vtt(content):
+    text_content = ""
+    for line in content.splitlines():
+        if "-->" in line or not line.strip() or line.startswith(("WEBVTT", "Kind:", "Language:")):
+            continue
+        text_content += line + " "
+    return clean_xml_transcript(text_content)
+
+
+def legacy_srv3(content):
+    return clean_xml_transcript(content)
+
+
+def measure(func, data, repeat):
+    best, result = None, None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(data)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Altyazı ayrıştırıcı kıyaslaması")
+    parser.add_argument("--hours", type=float, default=3, help="Üretilecek yayın süresi (saat)")
+    parser.add_argument("--repeat", type=int, default=3, help="Her ölçüm kaç kez tekrarlanacak (en iyisi alınır)")
+    parser.add_argument("--fixtures", help="Üretilen dosyaların yazılacağı klasör (varsayılan: geçici klasör)")
+    args = parser.parse_args(argv)
+
+    lines = generate_lines(args.hours)
+    fixtures = {"json3": make_json3(lines), "vtt": make_vtt(lines), "srv3": make_srv3(lines)}
+    directory = args.fixtures or tempfile.mkdtemp(prefix="altyazi-bench-")
+    os.makedirs(directory, exist_ok=True)
+    for ext, content in fixtures.items():
+        with open(os.path.join(directory, f"yayin_{args.hours:g}sa.{ext}"), "w", encoding="utf-8") as f:
+            f.write(content)
+
+    cases = [
+        ("json3", legacy_json3, parse_json3),
+        ("vtt", legacy_vtt, parse_vtt),
+        ("srv3", legacy_srv3, parse_ttml),
+    ]
+    print(f"{len(lines)} satır, {args.hours:g} saat; dosyalar: {directory}")
+    print(f"{'biçim':<6} {'boyut':>9} {'eski sn':>9} {'yeni sn':>9} {'hız':>6} {'eski kar.':>10} {'yeni kar.':>10}")
+    for ext, legacy, parse in cases:
+        content = fixtures[ext]
+        old_time, old_text = measure(legacy, content, args.repeat)
+        new_time, transcript = measure(parse, content, args.repeat)
+        print(f"{ext:<6} {len(content) / 1e6:>7.1f}MB {old_time:>9.3f} {new_time:>9.3f} "
+              f"{old_time / new_time:>5.1f}x {len(old_text):>10} {len(transcript.text):>10}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,278 @@
+"""Altyazı → ayrıştırma → özet boru hattı için çevrimdışı tekrar oynatmalı kıyaslama.
+
+Yerel sahte sunucu (stub_server.py) YouTube, Invidious/Piped, RSS, piyasa ve Gemini yanıtlarını
+gecikme ve hata enjeksiyonuyla oynatır. Uygulama modülleri değiştirilmeden kullanılır; sadece ağ
+kenarındaki kütüphaneler (yt-dlp, youtube-transcript-api, yfinance, google-generativeai) sunucuya
+giden ince sarmalayıcılarla değiştirilir ve youtube.com istekleri sunucuya yönlendirilir.
+
+Her aşama için p50/p95/p99 süreleri ve başarı sayıları raporlanır:
+    get_transcript   transcripts.fetch_transcript (önbelleksiz; yarış/sıralı yedek zinciri + ayrıştırma)
+    get_latest_video channels.get_latest_video (RSS, koşullu GET)
+    get_market_data  market.get_market_data
+    summarize_text   summarizer.summarize (özet önbelleği her turda atlanır)
+
+Örnekler:
+    python bench/bench_pipeline.py --iterations 20 --scale 0.1
+    python bench/bench_pipeline.py --mode sequential --fail ytdlp=1 --fail inv/a=1
+    python bench/bench_pipeline.py --latency gemini=3000:800 --stream --json sonuc.json
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from stub_server import Fixtures, StubServer, build_faults  # noqa: E402
+
+STAGES = ["get_transcript", "get_latest_video", "get_market_data", "summarize_text"]
+MIRROR_NAMES = ["a", "b", "c"]
+
+
+def percentile(values, pct):
+    """Sıralı listede en yakın sıra yöntemiyle yüzdelik."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, int(round(pct / 100.0 * len(ordered) + 0.5)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def install_shims(base_url):
+    """Ağ kenarındaki kütüphaneleri sahte sunucuya yönlendirir (sadece bu süreçte)."""
+    import pandas as pd
+    from requests.adapters import HTTPAdapter
+
+    import market
+    import model_router
+    import summarizer
+    import transcripts
+    import yt_dlp
+    from http_client import mirror_session, session as http_session
+
+    class RedirectAdapter(HTTPAdapter):
+        """https://www.youtube.com/... isteklerini sunucunun /yt/... yoluna çevirir."""
+
+        def send(self, request, **kwargs):
+            request.url = request.url.replace("https://www.youtube.com", f"{base_url}/yt", 1)
+            return super().send(request, **kwargs)
+
+    for http in (http_session, mirror_session):
+        http.mount("https://www.youtube.com/", RedirectAdapter(max_retries=http.get_adapter("https://").max_retries))
+
+    class ReplayYoutubeDL:
+        def __init__(self, params=None):
+            self.params = params or {}
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            self.close()
+
+        def close(self):
+            pass
+
+        def extract_info(self, url, download=False, process=True, **kwargs):
+            response = http_session.get(f"{base_url}/yt/info/{transcripts.extract_video_id(url)}")
+            if response.status_code != 200:
+                raise yt_dlp.utils.DownloadError(f"HTTP Error {response.status_code}")
+            return response.json()
+
+    # caption_probe, YoutubeDL'i modül üzerinden oluşturur
+    yt_dlp.YoutubeDL = ReplayYoutubeDL
+
+    class ReplayTranscript:
+        language_code = "tr"
+
+        def __init__(self, video_id):
+            self.video_id = video_id
+
+        def fetch(self):
+            response = http_session.get(f"{base_url}/yt/api/timedtext", params={"v": self.video_id, "fmt": "list"})
+            response.raise_for_status()
+            return response.json()
+
+        def translate(self, language):
+            return self
+
+    class ReplayTranscriptApi:
+        @staticmethod
+        def list_transcripts(video_id):
+            return SimpleNamespace(find_transcript=lambda languages: ReplayTranscript(video_id))
+
+    transcripts.YouTubeTranscriptApi = ReplayTranscriptApi
+    transcripts.INVIDIOUS_INSTANCES = [f"{base_url}/inv/{name}" for name in MIRROR_NAMES]
+    transcripts.PIPED_INSTANCES = [f"{base_url}/piped/{name}" for name in MIRROR_NAMES]
+
+    def download(tickers, **kwargs):
+        response = http_session.get(f"{base_url}/market")
+        response.raise_for_status()
+        closes = response.json()
+        index = pd.date_range(end=pd.Timestamp.today().normalize(), periods=5)
+        return pd.DataFrame({("Close", ticker): [closes.get(ticker)] * len(index) for ticker in tickers}, index=index)
+
+    market.yf = SimpleNamespace(download=download)
+
+    def gemini_error(response):
+        # Kütüphanenin hata mesajlarındaki gibi durum kodu metnin başında (summary_error_message buna bakar)
+        return Exception(f"{response.status_code} {response.text}")
+
+    class ReplayModel:
+        def __init__(self, model_name, **kwargs):
+            self.model_name = model_name
+
+        def generate_content(self, prompt, stream=False, **kwargs):
+            response = http_session.post(f"{base_url}/gemini/{self.model_name}",
+                                         json={"prompt": prompt, "stream": stream}, stream=stream)
+            if response.status_code != 200:
+                raise gemini_error(response)
+            if not stream:
+                return SimpleNamespace(text=response.json()["text"])
+            return (SimpleNamespace(text=json.loads(line)["text"]) for line in response.iter_lines() if line)
+
+    def list_models(**kwargs):
+        response = http_session.get(f"{base_url}/gemini/models")
+        if response.status_code != 200:
+            raise gemini_error(response)
+        return [SimpleNamespace(name=name, supported_generation_methods=["generateContent"]) for name in response.json()]
+
+    replay_genai = SimpleNamespace(configure=lambda **kwargs: None, GenerativeModel=ReplayModel, list_models=list_models)
+    summarizer.genai = replay_genai
+    model_router.genai = replay_genai
+
+
+def run_stages(args, fixtures):
+    """Aşamaları sırayla `iterations` kez çalıştırır; {aşama: [(süre sn, başarılı, not)]} döner."""
+    from channels import FOLLOWED_CHANNELS, get_latest_video
+    from market import get_market_data
+    from summarizer import summarize
+    from transcripts import fetch_transcript
+
+    channel_url = next(iter(FOLLOWED_CHANNELS.values()))
+    results = {stage: [] for stage in STAGES}
+    text = None
+
+    def timed(stage, func):
+        started = time.perf_counter()
+        try:
+            ok, note = func()
+        except Exception as e:
+            ok, note = False, f"{type(e).__name__}: {e}"[:80]
+        results[stage].append((time.perf_counter() - started, ok, note))
+
+    for i in range(args.iterations):
+        video_id = fixtures.video_ids[i % len(fixtures.video_ids)]
+
+        def get_transcript():
+            nonlocal text
+            result = fetch_transcript(video_id, mode=args.mode)
+            if not result:
+                return False, "altyazı yok"
+            text = result[0].text
+            return True, result[1]
+
+        def latest_video():
+            videos, _ = get_latest_video(channel_url)
+            return videos is not None, f"{len(videos or [])} video"
+
+        def market_data():
+            return get_market_data() is not None, ""
+
+        def summarize_text():
+            if not text:
+                return False, "metin yok"
+            # Özet önbelleğini atlamak için her turda metin farklı
+            on_text = (lambda piece: None) if args.stream else None
+            result = summarize(f"{text}\n[tur {i}]", "bench", on_text=on_text)
+            return True, result["model"]
+
+        for stage, func in zip(STAGES, (get_transcript, latest_video, market_data, summarize_text)):
+            if stage in args.stages:
+                timed(stage, func)
+    return results
+
+
+def report(results, requests):
+    """Aşama başına süre yüzdelikleri ve sonuç dağılımı."""
+    print(f"{'aşama':<17} {'n':>4} {'hata':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'ort ms':>9}  sonuçlar")
+    for stage, rows in results.items():
+        if not rows:
+            continue
+        durations = [duration * 1000 for duration, _, _ in rows]
+        failures = sum(1 for _, ok, _ in rows if not ok)
+        notes = {}
+        for _, _, note in rows:
+            if note:
+                notes[note] = notes.get(note, 0) + 1
+        summary = ", ".join(f"{note} x{count}" for note, count in sorted(notes.items(), key=lambda item: -item[1]))
+        print(f"{stage:<17} {len(rows):>4} {failures:>5} {percentile(durations, 50):>9.1f} {percentile(durations, 95):>9.1f} "
+              f"{percentile(durations, 99):>9.1f} {sum(durations) / len(durations):>9.1f}  {summary}")
+    print("sunucuya giden istekler: " + ", ".join(f"{route}={count}" for route, count in sorted(requests.items())))
+
+
+def parse_pairs(items, parse_value):
+    pairs = {}
+    for item in items or []:
+        name, _, value = item.partition("=")
+        pairs[name] = parse_value(value)
+    return pairs
+
+
+def parse_latency(value):
+    mean, _, jitter = value.partition(":")
+    return float(mean), float(jitter or 0)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Çevrimdışı boru hattı kıyaslaması")
+    parser.add_argument("--iterations", type=int, default=10, help="Her aşamanın kaç kez ölçüleceği")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES, help="Ölçülecek aşamalar")
+    parser.add_argument("--mode", choices=["race", "sequential"], default=None, help="Altyazı çekme modu (varsayılan: TRANSCRIPT_FETCH_MODE)")
+    parser.add_argument("--hedge-delay", type=float, help="TRANSCRIPT_HEDGE_DELAY (sn)")
+    parser.add_argument("--scale", type=float, default=1.0, help="Varsayılan gecikmelerin çarpanı (0 = gecikmesiz)")
+    parser.add_argument("--latency", action="append", metavar="ROTA=MS[:SAPMA]", help="Rota gecikmesi, örn. gemini=3000:500")
+    parser.add_argument("--fail", action="append", metavar="ROTA=ORAN", help="Hata oranı (0-1), örn. ytdlp=1 veya inv/a=0.5")
+    parser.add_argument("--chunk-delay", type=float, default=None, help="Gemini akışında parçalar arası gecikme (ms)")
+    parser.add_argument("--stream", action="store_true", help="Özeti akış modunda iste (arayüzdeki gibi)")
+    parser.add_argument("--minutes", type=float, default=20, help="Üretilen altyazının video süresi (dk)")
+    parser.add_argument("--videos", type=int, default=3, help="Farklı video sayısı")
+    parser.add_argument("--fixtures", help="Kayıtlı fixture klasörü (captions.json3, captions.vtt, feed.xml, market.json, gemini.txt)")
+    parser.add_argument("--json", help="Ham ölçümlerin yazılacağı JSON dosyası")
+    args = parser.parse_args(argv)
+
+    # Uygulama modülleri içe aktarılmadan önce: kalıcı önbellekler geçici klasöre yazılsın
+    os.environ["YOUTEKONOMI_DATA_DIR"] = tempfile.mkdtemp(prefix="youtekonomi-bench-")
+    os.environ["PREFETCH_ENABLED"] = "0"
+    if args.hedge_delay is not None:
+        os.environ["TRANSCRIPT_HEDGE_DELAY"] = str(args.hedge_delay)
+
+    fixtures = Fixtures(args.fixtures, minutes=args.minutes, video_ids=[f"benchvid{i:04d}" for i in range(args.videos)])
+    faults = build_faults(parse_pairs(args.latency, parse_latency), parse_pairs(args.fail, float), scale=args.scale)
+    stub = StubServer(fixtures, faults)
+    if args.chunk_delay is not None:
+        stub.chunk_delay_ms = args.chunk_delay
+    stub.start()
+    try:
+        install_shims(stub.base_url)
+        started = time.perf_counter()
+        results = run_stages(args, fixtures)
+        print(f"{args.iterations} tur, {time.perf_counter() - started:.1f} sn; sunucu: {stub.base_url}")
+        report(results, stub.requests)
+    finally:
+        stub.stop()
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({stage: [{"seconds": d, "ok": ok, "note": note} for d, ok, note in rows]
+                       for stage, rows in results.items()}, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,309 @@
+"""Kıyaslama için yerel sahte (stub) HTTP sunucusu.
+
+YouTube (yt-dlp bilgi JSON'u, json3/VTT altyazı, RSS), Invidious/Piped API'leri, piyasa verisi ve Gemini
+yanıtlarını kayıtlı ya da üretilmiş fixture'lardan tekrar oynatır. Her rota için gecikme (ortalama ±
+sapma) ve hata oranı ayarlanabilir; böylece yedek zincirindeki bir değişikliğin etkisi ağa çıkmadan
+ölçülebilir.
+
+Rotalar (yol önekleri):
+    yt/info/<id>                yt-dlp'nin extract_info çıktısı
+    yt/api/timedtext?v=&fmt=    altyazı gövdesi (json3, vtt, list)
+    yt/feeds/videos.xml         kanal RSS'i (ETag ile 304 destekli)
+    inv/<ad>/api/v1/captions/   Invidious altyazı listesi ve VTT
+    piped/<ad>/streams/<id>     Piped akış bilgisi
+    market                      piyasa kapanış fiyatları
+    gemini/models               erişilebilir model listesi
+    gemini/<model>              Gemini yanıtı (POST; stream=true ise satır satır JSON)
+"""
+import hashlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_caption_parsers import generate_lines, make_json3, make_vtt  # noqa: E402
+
+# Kısa adlar -> rota önekleri
+ROUTE_ALIASES = {
+    "ytdlp": "yt/info",
+    "captions": "yt/api/timedtext",
+    "rss": "yt/feeds",
+    "invidious": "inv",
+    "piped": "piped",
+    "market": "market",
+    "gemini": "gemini",
+}
+
+# Canlı servislere yakın varsayılan gecikmeler (ms): (ortalama, ± sapma)
+DEFAULT_LATENCY = {
+    "yt/info": (1500, 500),
+    "yt/api/timedtext": (200, 80),
+    "yt/feeds": (150, 50),
+    "inv": (400, 200),
+    "piped": (400, 200),
+    "market": (800, 300),
+    "gemini": (2000, 600),
+}
+# Gemini akışında parçalar arası gecikme (ms)
+DEFAULT_CHUNK_DELAY_MS = 40
+
+SUMMARY_REPLY = """### 🌍 GENEL PİYASA YORUMU
+- Konuşmacı faiz indirimlerinin ertelenmesini bekliyor.
+
+### 🟡 ALTIN & GÜMÜŞ
+- Ons altında 2.400 dolar direnç olarak görülüyor.
+
+### 🪙 KRİPTO PARALAR
+- Bitcoin için 60.000 dolar destek.
+
+### 📈 BORSA İSTANBUL (BIST)
+- BIST 100 için 10.000 puan hedefi.
+
+### 🇺🇸 ABD BORSALARI (NASDAQ/S&P)
+- Yorum yok.
+
+### 💵 DÖVİZ (DOLAR/EURO)
+- Dolar/TL'de kademeli artış bekleniyor.
+"""
+
+
+class Fault:
+    """Bir rotanın gecikme ve hata ayarı."""
+
+    def __init__(self, latency_ms=0.0, jitter_ms=0.0, failure_rate=0.0, status=503):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.failure_rate = failure_rate
+        self.status = status
+
+
+class Fixtures:
+    """Tekrar oynatılacak yanıt gövdeleri.
+
+    Klasör verilirse oradaki kayıtlı dosyalar (captions.json3, captions.vtt, feed.xml, market.json,
+    gemini.txt) kullanılır; olmayanlar `minutes` uzunluğunda bir video için üretilir.
+    """
+
+    def __init__(self, directory=None, minutes=20, video_ids=("benchvid0001",)):
+        self.video_ids = list(video_ids)
+        lines = generate_lines(minutes / 60.0)
+        self.json3 = self._load(directory, "captions.json3") or make_json3(lines)
+        self.vtt = self._load(directory, "captions.vtt") or make_vtt(lines)
+        self.transcript_list = json.dumps([
+            {"text": " ".join(words), "start": start / 1000.0, "duration": 2.0} for start, words in lines
+        ])
+        self.market = self._load(directory, "market.json") or json.dumps({
+            "USDTRY=X": 34.25, "EURTRY=X": 37.10, "XU100.IS": 9850.0, "GC=F": 2390.5, "BTC-USD": 64250.0,
+        })
+        self.summary = self._load(directory, "gemini.txt") or SUMMARY_REPLY
+        self.feed = self._load(directory, "feed.xml")
+        self.models = ["models/gemini-1.5-flash", "models/gemini-1.5-pro", "models/gemini-pro"]
+
+    @staticmethod
+    def _load(directory, name):
+        if not directory:
+            return None
+        path = os.path.join(directory, name)
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding="utf-8") as f:
+            return f.read()
+
+    def feed_xml(self, channel_id):
+        """Kayıtlı besleme yoksa bugün yayınlanmış videolarla bir Atom beslemesi üretir."""
+        if self.feed:
+            return self.feed
+        now = datetime.now(timezone.utc)
+        entries = []
+        for i, video_id in enumerate(self.video_ids):
+            published = (now - timedelta(minutes=5 * (i + 1))).isoformat()
+            entries.append(
+                f"<entry><yt:videoId>{video_id}</yt:videoId><title>Piyasa değerlendirmesi {i + 1}</title>"
+                f'<link rel="alternate" href="https://www.youtube.com/watch?v={video_id}"/>'
+                f"<published>{published}</published></entry>"
+            )
+        return ('<?xml version="1.0" encoding="UTF-8"?>'
+                '<feed xmlns:yt="http://www.youtube.com/xml/schemas/2015" xmlns="http://www.w3.org/2005/Atom">'
+                f"<title>{channel_id}</title>{''.join(entries)}</feed>")
+
+
+class StubServer:
+    """Arka planda çalışan ThreadingHTTPServer; `base_url` üzerinden erişilir."""
+
+    def __init__(self, fixtures, faults=None, chunk_delay_ms=DEFAULT_CHUNK_DELAY_MS, seed=1):
+        self.fixtures = fixtures
+        self.faults = faults or {}
+        self.chunk_delay_ms = chunk_delay_ms
+        self.requests = {}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="stub-http", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def fault_for(self, route):
+        """Rotaya en uzun önekle eşleşen ayar."""
+        best = None
+        for key, fault in self.faults.items():
+            if route.startswith(key) and (best is None or len(key) > len(best)):
+                best = key
+        return self.faults.get(best) if best is not None else Fault()
+
+    def _inject(self, route):
+        """Gecikmeyi uygular; hata enjekte edilecekse durum kodunu döner."""
+        fault = self.fault_for(route)
+        with self._lock:
+            self.requests[route.split("/")[0]] = self.requests.get(route.split("/")[0], 0) + 1
+            delay = max(0.0, self._random.gauss(fault.latency_ms, fault.jitter_ms / 2)) if fault.latency_ms else 0.0
+            failed = self._random.random() < fault.failure_rate
+        if delay:
+            time.sleep(delay / 1000.0)
+        return fault.status if failed else None
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                self._dispatch(None)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                self._dispatch(json.loads(self.rfile.read(length) or b"{}"))
+
+            def _dispatch(self, body):
+                parts = urlsplit(self.path)
+                route = parts.path.lstrip("/")
+                query = {key: values[0] for key, values in parse_qs(parts.query).items()}
+                status = stub._inject(route)
+                if status:
+                    return self._send(status, "text/plain", "injected failure")
+                try:
+                    stub._route(self, route, query, body)
+                except Exception as e:
+                    self._send(500, "text/plain", str(e))
+
+            def _send(self, status, content_type, text, headers=None):
+                data = text.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
+
+    def _route(self, handler, route, query, body):
+        fx = self.fixtures
+        segments = route.split("/")
+        if route.startswith("yt/info/"):
+            video_id = segments[2]
+            caption = f"{self.base_url}/yt/api/timedtext?v={video_id}&lang=tr"
+            info = {
+                "id": video_id,
+                "title": f"Video {video_id}",
+                "subtitles": {},
+                "automatic_captions": {"tr": [
+                    {"ext": "json3", "url": caption + "&fmt=json3"},
+                    {"ext": "vtt", "url": caption + "&fmt=vtt"},
+                ]},
+            }
+            return handler._send(200, "application/json", json.dumps(info))
+        if route == "yt/api/timedtext":
+            fmt = query.get("fmt", "json3")
+            if fmt == "vtt":
+                return handler._send(200, "text/vtt", fx.vtt)
+            if fmt == "list":
+                return handler._send(200, "application/json", fx.transcript_list)
+            return handler._send(200, "application/json", fx.json3)
+        if route == "yt/feeds/videos.xml":
+            feed = fx.feed_xml(query.get("channel_id", ""))
+            etag = '"' + hashlib.md5(feed.encode("utf-8")).hexdigest() + '"'
+            if handler.headers.get("If-None-Match") == etag:
+                handler.send_response(304)
+                handler.send_header("ETag", etag)
+                handler.send_header("Content-Length", "0")
+                return handler.end_headers()
+            return handler._send(200, "application/atom+xml", feed, {"ETag": etag})
+        if route.startswith("inv/") and "/api/v1/captions/" in route:
+            video_id = segments[-1]
+            if "label" in query:
+                return handler._send(200, "text/vtt", fx.vtt)
+            captions = [{"label": "Turkish", "languageCode": "tr", "url": f"/api/v1/captions/{video_id}?label=Turkish"}]
+            return handler._send(200, "application/json", json.dumps(captions))
+        if route.startswith("piped/") and "/streams/" in route:
+            video_id = segments[-1]
+            subtitles = [{"code": "tr", "url": f"{self.base_url}/yt/api/timedtext?v={video_id}&fmt=vtt"}]
+            return handler._send(200, "application/json", json.dumps({"subtitles": subtitles}))
+        if route == "market":
+            return handler._send(200, "application/json", fx.market)
+        if route == "gemini/models":
+            return handler._send(200, "application/json", json.dumps(fx.models))
+        if route.startswith("gemini/"):
+            return self._gemini(handler, body or {})
+        handler._send(404, "text/plain", f"bilinmeyen rota: {route}")
+
+    def _gemini(self, handler, body):
+        text = self.fixtures.summary
+        if not body.get("stream"):
+            return handler._send(200, "application/json", json.dumps({"text": text}))
+        # Akış: her satır bir JSON parça; parçalar arasında gecikme
+        handler.send_response(200)
+        handler.send_header("Content-Type", "application/x-ndjson")
+        handler.send_header("Connection", "close")
+        handler.end_headers()
+        handler.close_connection = True
+        for line in text.splitlines(keepends=True):
+            handler.wfile.write((json.dumps({"text": line}) + "\n").encode("utf-8"))
+            handler.wfile.flush()
+            if self.chunk_delay_ms:
+                time.sleep(self.chunk_delay_ms / 1000.0)
+
+
+def build_faults(latency=None, failures=None, scale=1.0):
+    """Varsayılan gecikmeleri `scale` ile çarpar, sonra verilen ayarları (kısa adlar kabul edilir) uygular.
+
+    latency: {"gemini": (3000, 500)}, failures: {"inv/a": 1.0}
+    """
+    faults = {route: Fault(mean * scale, jitter * scale) for route, (mean, jitter) in DEFAULT_LATENCY.items()}
+    for name, (mean, jitter) in (latency or {}).items():
+        route = ROUTE_ALIASES.get(name, name)
+        base = faults.get(route) or Fault()
+        faults[route] = Fault(mean, jitter, base.failure_rate, base.status)
+    for name, rate in (failures or {}).items():
+        route = ROUTE_ALIASES.get(name, name)
+        base = faults.get(route)
+        if base is None:
+            # Alt rota (örn. inv/a): üst rotanın gecikmesini devral
+            parent = max((key for key in faults if route.startswith(key)), key=len, default=None)
+            base = faults[parent] if parent else Fault()
+        faults[route] = Fault(base.latency_ms, base.jitter_ms, rate, base.status)
+    return faults
@@ -0,0 +1,339 @@
+"""Tek geçişli altyazı ayrıştırıcıları (json3, WebVTT, TTML/srv3).
+
+Her ayrıştırıcı girdiyi tek regex taramasıyla (json3'te json.loads ile) bir kez okur. Tekrar ayıklaması
+gerekmeyen izlerde (json3, srv3/TTML) satırlar toplu temizlenir (etiket silme + HTML entity çözme tüm satırlar
+için birer kez) ve Transcript doğrudan kurulur. Kayan (rolling) otomatik altyazılarda (WebVTT) satırlar
+CaptionWriter'dan geçer; o da önceki satırla zamanı çakışan satırlarda tekrar eden kelimeleri atar.
+Metin tek tek += ile büyütülmez; parçalar en sonda bir kez birleşir.
+"""
+import html
+import json
+import re
+from array import array
+from itertools import accumulate, compress
+from operator import add, methodcaller, sub
+
+from segments import Transcript
+
+# Satır içi etiketler (<c>, <00:00:01.500>, <font ...>, <br/> ...)
+TAG_PATTERN = re.compile(r'<[^>]*>')
+
+# Kayan altyazı tekrarında geriye doğru bakılacak en fazla metin uzunluğu (karakter)
+DEDUP_WINDOW_CHARS = 512
+
+
+# Sık görülen entity'ler str.replace ile çözülür; başka entity kalırsa html.unescape'e düşülür
+COMMON_ENTITIES = (("&lt;", "<"), ("&gt;", ">"), ("&quot;", '"'), ("&#39;", "'"), ("&apos;", "'"))
+
+
+def unescape(text):
+    """html.unescape'in hızlı yolu: sadece &amp; &lt; &gt; &quot; &#39; &apos; içeren metinlerde regex çalışmaz."""
+    if "&" not in text:
+        return text
+    result = text
+    for entity, char in COMMON_ENTITIES:
+        if entity in result:
+            result = result.replace(entity, char)
+    if "&" in result.replace("&amp;", ""):
+        return html.unescape(text)
+    return result.replace("&amp;", "&")
+
+
+# Toplu temizlikte satırları ayıran karakter (altyazı metninde geçmez)
+LINE_BREAK = "\x00"
+
+
+def clean_lines(texts):
+    """clean_text'in toplu hali: satırlar birleştirilip etiketler ve entity'ler tek seferde çözülür."""
+    joined = LINE_BREAK.join(texts)
+    if "<" in joined:
+        joined = TAG_PATTERN.sub(" ", joined)
+    return list(map(" ".join, map(str.split, unescape(joined).split(LINE_BREAK))))
+
+
+def build_transcript(starts, durations, texts):
+    """Tekrar ayıklaması gerekmeyen satırlardan Transcript kurar (hızlı yol).
+
+    Satırlar clean_lines ile toplu temizlenir; boş satır eleme ve konum hesabı compress/accumulate ile
+    C tarafında yapılır, satır başına Python fonksiyon çağrısı yoktur.
+    """
+    lines = clean_lines(texts)
+    keep = list(map(bool, lines))
+    return _transcript(list(compress(starts, keep)), list(compress(durations, keep)), list(compress(lines, keep)))
+
+
+def _transcript(starts, durations, parts):
+    """Boş olmayan, temizlenmiş satırlardan Transcript (konumlar accumulate ile, satırlar tek boşlukla ayrılır)."""
+    return Transcript(
+        " ".join(parts),
+        array("i", map(int, starts)),
+        array("i", map(int, durations)),
+        array("i", map(add, accumulate(map(len, parts)), range(len(parts)))),
+    )
+
+
+def clean_text(text):
+    """Altyazı satırını temizler: etiketler silinir, entity'ler çözülür, boşluklar tek boşluğa iner.
+
+    Etiket veya entity yoksa (çoğu satır) regex hiç çalışmaz.
+    """
+    if "<" in text:
+        text = TAG_PATTERN.sub(" ", text)
+    return " ".join(unescape(text).split())
+
+
+class CaptionWriter:
+    """Temizlenmiş satırları alır, önceki satırın sonuyla örtüşen kelimeleri atıp Transcript'e ekler.
+
+    Otomatik altyazılarda her işaret (cue) bir önceki satırı tekrar eder ("piyasalar bugün" ->
+    "piyasalar bugün yükselişte"). Yeni satırın başı, yazılmış son metinle kelime sınırında örtüşüyorsa
+    sadece yeni kısım eklenir. Konuşmadaki gerçek tekrarları ("evet", ardından "evet evet") silmemek
+    için sadece önceki satır hâlâ ekrandayken başlayan (zamanı çakışan ya da bitişik) satırlara bakılır ve
+    örtüşme en az son yazılan satırın tamamını kapsamalıdır; kayan altyazıda tekrar edilen kısım hep
+    önceki satırın bütünüdür. Karşılaştırma kelime listeleri yerine doğrudan string'ler üzerinde yapılır.
+    """
+
+    def __init__(self, dedupe=True, window=DEDUP_WINDOW_CHARS):
+        # Satırlar listelerde toplanır, Transcript build() ile bir kez kurulur
+        self.starts = []
+        self.durations = []
+        self.parts = []
+        self.dedupe = dedupe
+        self.window = window
+        # Yazılmış son metin (en fazla ~2 pencere) ve son yazılan satır
+        self.tail = ""
+        self.last = ""
+        # Son satırın bitişi (ms)
+        self.end_ms = None
+        self.dropped_words = 0
+
+    def add(self, start_ms, duration_ms, raw_text):
+        self.write(start_ms, duration_ms, clean_text(raw_text))
+
+    def write(self, start_ms, duration_ms, text):
+        """Önceden temizlenmiş (clean_text/clean_lines) satırı ekler."""
+        if not text:
+            return
+        if self.dedupe:
+            overlapping = self.end_ms is not None and start_ms <= self.end_ms
+            self.end_ms = start_ms + duration_ms
+            overlap = self._overlap(text) if overlapping else 0
+            if overlap:
+                self.dropped_words += text.count(" ", 0, overlap) + 1
+                text = text[overlap + 1:]
+                if not text:
+                    return
+            tail = f"{self.tail} {text}" if self.tail else text
+            if len(tail) > self.window * 2:
+                cut = tail.find(" ", len(tail) - self.window)
+                if cut > 0:
+                    tail = tail[cut + 1:]
+            self.tail = tail
+            self.last = text
+        self.starts.append(start_ms)
+        self.durations.append(duration_ms)
+        self.parts.append(text)
+
+    def _overlap(self, text):
+        """Yazılmış son metinle yeni satırın başının kelime sınırında örtüştüğü en uzun kısmın uzunluğu (karakter)."""
+        tail, last = self.tail, self.last
+        if not tail or len(last) > len(text):
+            return 0
+        # Örtüşme tail'in soneki ve en az son satır kadar uzun olduğundan son satırla biter: son satırın yeni
+        # satırdaki geçişleri sağdan sola (en uzun örtüşmeden başlayarak) C tarafında aranır.
+        position = text.rfind(last, 0, min(len(text), len(tail)))
+        while position >= 0:
+            size = position + len(last)
+            if ((size == len(text) or text[size] == " ")
+                    and (size == len(tail) or tail[-size - 1] == " ")
+                    and tail.endswith(text[:size])):
+                return size
+            position = text.rfind(last, 0, size - 1)
+        return 0
+
+    def build(self):
+        return _transcript(self.starts, self.durations, self.parts)
+
+
+# --- json3 ---------------------------------------------------------------------------------------
+
+JSON3_TEXT = methodcaller("get", "utf8", "")
+JSON3_START = methodcaller("get", "tStartMs", 0)
+JSON3_DURATION = methodcaller("get", "dDurationMs", 0)
+
+
+def parse_json3(content, dedupe=False):
+    """YouTube json3 altyazısını (bytes/str) Transcript'e çevirir.
+
+    json3 olayları kelime zamanlıdır ve satır tekrarı içermez; dedupe varsayılan olarak kapalıdır.
+    """
+    data = json.loads(content)
+    events = [event for event in data.get('events', ()) if event.get('segs')]
+    # Otomatik altyazıda kelimeler kendi baştaki boşluklarıyla gelir; alanlar map ile (satır başına Python çağrısı olmadan) okunur
+    texts = ["".join(map(JSON3_TEXT, event['segs'])) for event in events]
+    starts = list(map(JSON3_START, events))
+    durations = list(map(JSON3_DURATION, events))
+    if not dedupe:
+        return build_transcript(starts, durations, texts)
+    writer = CaptionWriter()
+    for start, duration, text in zip(starts, durations, clean_lines(texts)):
+        writer.write(start, duration, text)
+    return writer.build()
+
+
+# --- WebVTT --------------------------------------------------------------------------------------
+
+VTT_CLOCKS = r'(?:(\d+):)?(\d{2}):(\d{2})[.,](\d{3})[ \t]+-->[ \t]+(?:(\d+):)?(\d{2}):(\d{2})[.,](\d{3})'
+VTT_TIMING = re.compile(VTT_CLOCKS)
+# Belgenin tamamı için: zaman satırı + boş satıra kadar gelen metin satırları (YouTube'un " " satırları dahil)
+VTT_CUE = re.compile(r'^' + VTT_CLOCKS + r'[^\n]*\n((?:[^\n]+\n?)*)', re.M)
+
+
+def _clock_ms(hours, minutes, seconds, millis):
+    return ((int(hours or 0) * 60 + int(minutes)) * 60 + int(seconds)) * 1000 + int(millis)
+
+
+def _clocks_ms(hours, minutes, seconds, millis):
+    """_clock_ms'in sütun hali: aynı uzunluktaki string dizilerinden milisaniye listesi (satır başına çağrı yok)."""
+    return [
+        ((h * 60 + m) * 60 + s) * 1000 + f
+        for h, m, s, f in zip(map(int, map("0".__add__, hours)), map(int, minutes), map(int, seconds), map(int, millis))
+    ]
+
+
+def parse_vtt(lines, dedupe=True):
+    """WebVTT altyazısını Transcript'e çevirir.
+
+    `lines` bir metin ya da satır satır gelen (str/bytes) bir akış olabilir; örn. stream=True ile açılmış
+    bir yanıtın iter_lines() çıktısı. Böylece altyazı tamamen indirilmeden ayrıştırma başlar. Metin
+    verilirse satır döngüsü yerine işaretler tek regex taramasıyla okunur.
+    """
+    writer = CaptionWriter(dedupe=dedupe)
+    if isinstance(lines, (str, bytes)):
+        content = lines.decode("utf-8", errors="replace") if isinstance(lines, bytes) else lines
+        if "\r" in content:
+            content = content.replace("\r\n", "\n")
+        cues = VTT_CUE.findall(content)
+        if not cues:
+            return writer.build()
+        columns = list(zip(*cues))
+        starts = _clocks_ms(*columns[:4])
+        durations = list(map(sub, _clocks_ms(*columns[4:8]), starts))
+        if not dedupe:
+            return build_transcript(starts, durations, columns[8])
+        for start, duration, text in zip(starts, durations, clean_lines(columns[8])):
+            writer.write(start, duration, text)
+        return writer.build()
+
+    start = end = None
+    cue = []
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode("utf-8", errors="replace")
+        if "-->" in line:
+            timing = VTT_TIMING.search(line)
+            if timing:
+                groups = timing.groups()
+                start, end = _clock_ms(*groups[:4]), _clock_ms(*groups[4:])
+                cue = []
+                continue
+        if not line.rstrip("\r\n"):
+            # Boş satır: işaret (cue) bitti (YouTube'un " " satırları metin sayılır, işareti bitirmez)
+            if start is not None and cue:
+                writer.add(start, end - start, " ".join(cue))
+            start, cue = None, []
+        elif start is not None:
+            cue.append(line)
+
+    if start is not None and cue:
+        writer.add(start, end - start, " ".join(cue))
+    return writer.build()
+
+
+# --- TTML / srv3 ---------------------------------------------------------------------------------
+
+def _ttml_time_ms(value):
+    """TTML zaman ifadesi: "00:01:02.500", "62.5s", "1500ms" veya srv3'teki düz milisaniye."""
+    if not value:
+        return 0
+    if ":" in value:
+        parts = value.split(":")
+        seconds = float(parts[-1])
+        minutes = int(parts[-2])
+        hours = int(parts[-3]) if len(parts) > 2 else 0
+        return int(((hours * 60 + minutes) * 60 + seconds) * 1000)
+    if value.endswith("ms"):
+        return int(float(value[:-2]))
+    if value.endswith("s"):
+        return int(float(value[:-1]) * 1000)
+    return int(float(value))
+
+
+# <p ...>...</p> blokları ve öznitelikleri (kendinden kapanan boş <p/> atlanır); TTML'de <p> iç içe olamaz.
+# srv3'ün baştaki t/d öznitelikleri doğrudan yakalanır, diğer biçimlerde öznitelikler ayrıca okunur.
+# İçerik "(.*?)" yerine açılmış döngüyle okunur (her karakterde kapanış etiketi denenmez).
+TTML_PARAGRAPH = re.compile(
+    r'<(?:\w+:)?p\b(?:\s+t="(\d+)")?(?:\s+d="(\d+)")?([^>]*)(?<!/)>([^<]*(?:<(?!/(?:\w+:)?p>)[^<]*)*)</(?:\w+:)?p>'
+)
+TTML_ATTRIBUTE = re.compile(r'([\w:]+)="([^"]*)"')
+# YouTube srv3: <p t="..." d="..."> başlangıçları; belge "</p>" ile satırlara bölünür, etiketler toplu silinir
+SRV3_TIMING = re.compile(r'<p t="(\d+)" d="(\d+)"')
+
+
+def _ttml_timing(t, d, attributes):
+    """(başlangıç ms, süre ms): srv3'te t/d milisaniye, TTML'de begin/end/dur zaman ifadeleri."""
+    if t:
+        return int(t), int(d or 0)
+    attrs = dict(TTML_ATTRIBUTE.findall(attributes))
+    if "t" in attrs:
+        return int(attrs["t"]), int(attrs.get("d", 0))
+    start = _ttml_time_ms(attrs.get("begin"))
+    end = attrs.get("end")
+    return start, (_ttml_time_ms(end) - start if end else _ttml_time_ms(attrs.get("dur")))
+
+
+def parse_ttml(content, dedupe=False):
+    """TTML veya YouTube srv3 (timedtext format=3) altyazısını Transcript'e çevirir.
+
+    Belge ağacı kurulmaz: <p> blokları tek regex taramasıyla sırayla okunur, iç etiketler (<s>, <span>,
+    <br/>) satır temizliğinde silinir. srv3/TTML satırları tekrar içermez; dedupe varsayılan olarak kapalıdır.
+    """
+    if isinstance(content, bytes):
+        content = content.decode("utf-8", errors="replace")
+    if not dedupe and '<p t="' in content:
+        timings = SRV3_TIMING.findall(content)
+        texts = content.split("</p>")
+        # Her "</p>" kapanışına bir t/d'li <p> düşüyorsa (zamansız ya da kendinden kapanan <p> yok) paragraf regex'i gerekmez
+        if timings and len(timings) == len(texts) - 1:
+            ts, ds = zip(*timings)
+            return build_transcript(list(map(int, ts)), list(map(int, ds)), texts[:-1])
+    paragraphs = TTML_PARAGRAPH.findall(content)
+    if not paragraphs:
+        return Transcript()
+    ts, ds, others, texts = zip(*paragraphs)
+    if all(ts) and all(ds):
+        # srv3: t ve d milisaniye cinsinden
+        starts, durations = list(map(int, ts)), list(map(int, ds))
+    else:
+        starts, durations = zip(*map(_ttml_timing, ts, ds, others))
+    if not dedupe:
+        return build_transcript(starts, durations, texts)
+    writer = CaptionWriter()
+    for start, duration, text in zip(starts, durations, clean_lines(texts)):
+        writer.write(start, duration, text)
+    return writer.build()
+
+
+def parse_caption(content, ext, dedupe=None):
+    """Altyazı biçimine (json3, vtt, ttml, srv3) göre uygun ayrıştırıcıyı çağırır; tanınmayan biçimde None.
+
+    dedupe verilmezse biçimin varsayılanı kullanılır (sadece kayan satırlı WebVTT'de açık).
+    """
+    options = {} if dedupe is None else {"dedupe": dedupe}
+    if ext == "json3":
+        return parse_json3(content, **options)
+    if ext == "vtt":
+        return parse_vtt(content, **options)
+    if ext in ("ttml", "srv3", "srv2", "srv1", "xml"):
+        return parse_ttml(content, **options)
+    return None
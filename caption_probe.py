@@ -0,0 +1,118 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import yt_dlp
+
+from metrics import metrics
+
+# 1 (varsayılan): sadece altyazı haritası okunur; format listesi, manifestolar ve oynatıcı JS'i (imza çözme) atlanır.
+# 0: eski davranış, tam extract_info.
+YTDLP_CAPTION_ONLY = os.getenv("YTDLP_CAPTION_ONLY", "1") != "0"
+# Süreç genelinde aynı anda çalışabilecek (ve tekrar kullanılan) YoutubeDL örneği sayısı
+YTDLP_POOL_SIZE = int(os.getenv("YTDLP_POOL_SIZE", "2"))
+# Video başına bulunan altyazı izleri bu süre saklanır (altyazı URL'leri birkaç saat geçerli)
+CAPTION_TRACK_TTL_SECONDS = float(os.getenv("CAPTION_TRACK_TTL_SECONDS", "1800"))
+# Altyazısı olmayan videolar için kısa süreli (negatif) önbellek: yeni yüklenen videonun altyazısı dakikalar içinde çıkabilir
+CAPTION_TRACK_NEGATIVE_TTL_SECONDS = float(os.getenv("CAPTION_TRACK_NEGATIVE_TTL_SECONDS", "60"))
+CAPTION_TRACK_CACHE_SIZE = 512
+
+# User-Agent ekleyerek 429 hatasını azaltmaya çalışalım
+YTDLP_OPTIONS = {
+    'skip_download': True,
+    'quiet': True,
+    'no_warnings': True,
+    'http_headers': {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+    },
+}
+CAPTION_ONLY_OPTIONS = {
+    'extractor_args': {'youtube': {'skip': ['dash', 'hls'], 'player_skip': ['js']}},
+}
+
+
+class CaptionProbe:
+    """yt-dlp ile videonun altyazı izlerini bulur.
+
+    YoutubeDL örnekleri havuzda tutulup istekler arasında tekrar kullanılır (extractor ve oynatıcı
+    önbellekleri korunur). Sadece altyazı modunda format çözümlemesi yapılmaz (`process=False`).
+    Tercih edilen dillerdeki izler video başına LRU + TTL önbellekte saklanır; iz bulunamadıysa
+    sonuç sadece kısa süre (negative_ttl) saklanır.
+    """
+
+    def __init__(self, languages, pool_size=YTDLP_POOL_SIZE, ttl=CAPTION_TRACK_TTL_SECONDS,
+                 negative_ttl=CAPTION_TRACK_NEGATIVE_TTL_SECONDS, max_entries=CAPTION_TRACK_CACHE_SIZE,
+                 caption_only=YTDLP_CAPTION_ONLY):
+        self.languages = list(languages)
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.caption_only = caption_only
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max(1, pool_size))
+        self._idle = []
+        # video kimliği -> (zaman, izler, video bilgileri)
+        self._tracks = OrderedDict()
+
+    def _options(self):
+        options = dict(YTDLP_OPTIONS)
+        if self.caption_only:
+            options.update(CAPTION_ONLY_OPTIONS)
+        else:
+            options.update({'writesubtitles': True, 'writeautomaticsub': True, 'subtitleslangs': self.languages})
+        return options
+
+    def _extract(self, video_url):
+        with self._slots:
+            with self._lock:
+                ydl = self._idle.pop() if self._idle else None
+            if ydl is None:
+                ydl = yt_dlp.YoutubeDL(self._options())
+            try:
+                return ydl.extract_info(video_url, download=False, process=not self.caption_only)
+            finally:
+                with self._lock:
+                    self._idle.append(ydl)
+
+    def tracks(self, video_id, video_url):
+        """[(dil, {uzantı: url})] listesi; tercih sırası: dil sırasıyla önce manuel, sonra otomatik altyazı."""
+        now = time.time()
+        with self._lock:
+            entry = self._tracks.get(video_id)
+            if entry and now - entry[0] < (self.ttl if entry[1] else self.negative_ttl):
+                self._tracks.move_to_end(video_id)
+                metrics.inc("cache", cache="caption_tracks", result="hit")
+                return entry[1]
+        metrics.inc("cache", cache="caption_tracks", result="miss")
+
+        with metrics.span("caption_probe", mode="captions" if self.caption_only else "full"):
+            info = self._extract(video_url)
+        subtitles = info.get('subtitles') or {}
+        auto_captions = info.get('automatic_captions') or {}
+        tracks = []
+        for lang in self.languages:
+            for captions in (subtitles, auto_captions):
+                formats = {fmt.get('ext'): fmt['url'] for fmt in captions.get(lang) or [] if fmt.get('url')}
+                if formats:
+                    tracks.append((lang, formats))
+
+        meta = {"title": info.get('title'), "channel": info.get('channel') or info.get('uploader'),
+                "published": info.get('upload_date')}
+        with self._lock:
+            self._tracks[video_id] = (time.time(), tracks, meta)
+            self._tracks.move_to_end(video_id)
+            while len(self._tracks) > self.max_entries:
+                self._tracks.popitem(last=False)
+        return tracks
+
+    def meta(self, video_id):
+        """Son yoklamada okunan video bilgileri (başlık, kanal, yayın tarihi); bilinmiyorsa boş sözlük."""
+        with self._lock:
+            entry = self._tracks.get(video_id)
+            return dict(entry[2]) if entry else {}
+
+    def invalidate(self, video_id):
+        """İz URL'si artık çalışmıyorsa (süresi dolmuş vb.) kaydı siler."""
+        with self._lock:
+            self._tracks.pop(video_id, None)
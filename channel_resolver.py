@@ -0,0 +1,111 @@
+import json
+import os
+import re
+import threading
+
+from http_client import session as http_session
+from storage import data_path
+
+CHANNEL_ID_PATTERNS = [
+    re.compile(r'"channelId":"(UC[\w-]+)"'),
+    # Alternatif regex
+    re.compile(r'itemprop="channelId" content="(UC[\w-]+)"'),
+]
+# Parça sınırına bölünen eşleşmeler kaçmasın diye bir önceki parçanın sonundan bu kadar karakter tutulur
+OVERLAP_CHARS = 128
+# Kanal sayfasında ID bulunmazsa en fazla bu kadar bayt okunur
+MAX_SCAN_BYTES = 2 * 1024 * 1024
+
+
+def channel_key(channel_url):
+    """URL'yi/handle'ı karşılaştırılabilir bir anahtara çevirir (https://www.youtube.com/@Ad -> @ad)."""
+    key = channel_url.strip().rstrip("/")
+    key = re.sub(r'^https?://', '', key)
+    key = re.sub(r'^(www\.|m\.)', '', key)
+    if "@" in key:
+        # Handle'lar büyük/küçük harf duyarsızdır
+        return "@" + key.split("@", 1)[1].split("/")[0].split("?")[0].lower()
+    return key
+
+
+class ChannelResolver:
+    """Kanal handle/URL -> UC... ID eşlemesini kalıcı olarak tutar; bilinen kanal asla tekrar çözülmez."""
+
+    def __init__(self, filename="channels.json"):
+        self.path = data_path(filename)
+        self._lock = threading.Lock()
+        self._ids = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self):
+        with self._lock:
+            snapshot = json.dumps(self._ids, ensure_ascii=False, indent=1)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(snapshot)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Kanal kaydı yazılamadı: {e}")
+
+    def seed(self, mapping):
+        """{kanal URL: UC ID} eşlemelerini ekler (örn. KNOWN_CHANNELS)."""
+        changed = False
+        with self._lock:
+            for channel_url, channel_id in mapping.items():
+                key = channel_key(channel_url)
+                if self._ids.get(key) != channel_id:
+                    self._ids[key] = channel_id
+                    changed = True
+        if changed:
+            self._save()
+
+    def resolve(self, channel_url):
+        """Kanal ID'sini döner; bilinmiyorsa kanal sayfasını akışla okuyup ID bulunduğu anda keser."""
+        # 1. Yöntem: URL'de zaten ID varsa
+        if "/channel/" in channel_url:
+            return channel_url.split("/channel/")[1].split("/")[0]
+
+        key = channel_key(channel_url)
+        with self._lock:
+            if key in self._ids:
+                return self._ids[key]
+
+        # 2. Yöntem: Sayfa kaynağından regex ile bul (tüm sayfayı indirmeden)
+        channel_id = self._scan_page(channel_url)
+        if channel_id:
+            with self._lock:
+                self._ids[key] = channel_id
+            self._save()
+        return channel_id
+
+    def _scan_page(self, channel_url):
+        response = http_session.get(channel_url, headers={'User-Agent': 'Mozilla/5.0'}, stream=True)
+        try:
+            if response.status_code != 200:
+                return None
+            buffer = ""
+            read = 0
+            for chunk in response.iter_content(chunk_size=16384):
+                read += len(chunk)
+                buffer = buffer[-OVERLAP_CHARS:] + chunk.decode("utf-8", errors="ignore")
+                for pattern in CHANNEL_ID_PATTERNS:
+                    match = pattern.search(buffer)
+                    if match:
+                        return match.group(1)
+                if read >= MAX_SCAN_BYTES:
+                    break
+            return None
+        finally:
+            # Okunmayan gövde bırakılır, bağlantı kapatılır
+            response.close()
+
+
+# Süreç genelinde tek örnek
+channel_resolver = ChannelResolver()
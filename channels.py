@@ -0,0 +1,127 @@
+import os
+from datetime import datetime, timedelta, timezone
+
+from channel_resolver import channel_resolver
+from feeds import feed_cache
+
+# Bilinen Kanal Bilgileri (ID ve Resim)
+KNOWN_CHANNELS = {
+    "https://www.youtube.com/@cihatecicek": {
+        "id": "UCHExW8VqaE0a3W0kwSe_BXg",
+        "image": "https://yt3.googleusercontent.com/qR4VTRrsvkQvIoHUX7rZ7cZD-HEeBjXZsYvlXvc6J0dIfPkhfQUEfCJBXG9nd9cguIo-qokd6Q=s900-c-k-c0x00ffffff-no-rj"
+    },
+    "https://www.youtube.com/@TuncSatiroglu": {
+        "id": "UCOPEaE2I8pf5vHtIIxGT0Rw",
+        "image": "https://yt3.googleusercontent.com/2fRcIUMYxzT5KVlxZKyEPuVgHFbWa-PXAsX1_7Xecw7S2GNRvdKFpb8jnxZ-mNUPG4rFYxWY=s900-c-k-c0x00ffffff-no-rj"
+    }
+}
+
+# Takip edilen kanallar (Otomatik Takip sekmesi ve toplu özetleme aracı)
+FOLLOWED_CHANNELS = {
+    "Cihat E. Çiçek": "https://www.youtube.com/@cihatecicek",
+    "Tunç Şatıroğlu": "https://www.youtube.com/@TuncSatiroglu"
+}
+
+# Kalıcı handle -> ID kaydı, bilinen kanallarla önceden doldurulur
+channel_resolver.seed({channel_url: info["id"] for channel_url, info in KNOWN_CHANNELS.items()})
+
+def get_channel_id(channel_url):
+    """Kanal URL'sinden Channel ID'yi (UC...) bulur."""
+    try:
+        # Kayıtta varsa ağa çıkılmaz; yoksa kanal sayfası ID bulunana kadar akışla okunur
+        return channel_resolver.resolve(channel_url)
+    except:
+        return None
+
+# Kanal taramasında aynı anda kontrol edilecek en fazla kanal sayısı
+CHANNEL_SCAN_CONCURRENCY = int(os.getenv("CHANNEL_SCAN_CONCURRENCY", "8"))
+
+def get_latest_video(channel_url, debug=False, log=None):
+    """RSS Beslemesi üzerinden kanalın BUGÜN yayınlanan videolarını bulur.
+
+    debug açıksa hata ayıklama mesajları (seviye, mesaj) olarak log listesine eklenir; arayüz bunları
+    ana thread'de st.write / st.error / st.warning ile gösterir.
+    """
+    def report(level, message):
+        if debug and log is not None:
+            log.append((level, message))
+
+    try:
+        channel_id = get_channel_id(channel_url)
+        
+        report("write", f"🆔 Kanal ID: {channel_id}")
+            
+        if not channel_id:
+            report("error", f"Kanal ID bulunamadı: {channel_url}")
+            return None, None
+
+        rss_url = f"https://www.youtube.com/feeds/videos.xml?channel_id={channel_id}"
+        # Koşullu GET: besleme değişmediyse (304) önceki ayrıştırılmış liste kullanılır
+        entries, status_code = feed_cache.fetch(rss_url, timeout=5)
+        
+        if entries is None:
+            report("error", f"RSS çekilemedi: {status_code}")
+            return None, None
+        if status_code == 304:
+            report("write", "♻️ RSS değişmemiş (304), önceki liste kullanıldı.")
+
+        found_videos = []
+        last_found_video = None
+        
+        # Türkiye saati (UTC+3)
+        tr_timezone = timezone(timedelta(hours=3))
+        now = datetime.now(tr_timezone)
+        
+        for entry in entries:
+            try:
+                title = entry['title']
+                link = entry['url']
+                published_str = entry['published'] # Örn: 2025-12-01T15:30:00+00:00
+                
+                # Tarihi parse et (ISO formatı)
+                # Basit ISO parse (Z veya +00:00 için)
+                if published_str.endswith('Z'):
+                    published_str = published_str[:-1] + '+00:00'
+                
+                published_dt = datetime.fromisoformat(published_str)
+                
+                # Eğer timezone bilgisi yoksa UTC varsay
+                if published_dt.tzinfo is None:
+                    published_dt = published_dt.replace(tzinfo=timezone.utc)
+                
+                # Türkiye saatine çevir
+                published_tr = published_dt.astimezone(tr_timezone)
+                
+                report("write", f"🔍 RSS: {title} | Tarih: {published_tr.strftime('%d.%m.%Y %H:%M')} (TR)")
+                
+                # Son videoyu kaydet
+                if last_found_video is None:
+                    last_found_video = {
+                        'title': title,
+                        'date': published_tr.strftime("%d.%m.%Y %H:%M")
+                    }
+                
+                # Bugün mü?
+                if published_tr.date() == now.date():
+                    found_videos.append({
+                        'title': title,
+                        'url': link,
+                        'type': 'Video/Canlı', # RSS ayrım yapmaz ama genelde Video'dur
+                        'date': published_tr.strftime("%d.%m.%Y")
+                    })
+                    
+            except Exception as e:
+                report("warning", f"Tarih hatası: {e}")
+                continue
+
+        return found_videos, last_found_video
+
+    except Exception as e:
+        report("error", f"RSS Genel Hata: {e}")
+        return None, None
+
+def check_channel(channel_url, debug=False):
+    """Thread içinde çalıştırılmak üzere: (bugünkü videolar, son video, hata ayıklama mesajları) döner."""
+    log = []
+    latest_videos, last_video = get_latest_video(channel_url, debug=debug, log=log)
+    return latest_videos, last_video, log
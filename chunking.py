@@ -0,0 +1,62 @@
+import re
+
+# Kaba token tahmini: Türkçe metinde ortalama ~3.5 karakter = 1 token
+CHARS_PER_TOKEN = 3.5
+
+# Cümle sonu: . ! ? … ve ardından boşluk
+SENTENCE_END = re.compile(r'(?<=[.!?…])\s+')
+
+
+def estimate_tokens(text):
+    """Metnin yaklaşık token sayısı."""
+    return int(len(text) / CHARS_PER_TOKEN) + 1
+
+
+def split_sentences(text, max_tokens):
+    """Metni cümlelere böler; noktalaması olmayan (otomatik altyazı) uzun parçaları kelime sınırından keser."""
+    max_chars = int(max_tokens * CHARS_PER_TOKEN)
+    pieces = []
+    for sentence in SENTENCE_END.split(text):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(" ", 0, max_chars)
+            if cut <= 0:
+                cut = max_chars
+            pieces.append(sentence[:cut])
+            sentence = sentence[cut:].strip()
+        if sentence:
+            pieces.append(sentence)
+    return pieces
+
+
+def chunk_text(text, max_tokens=4000, overlap_tokens=200):
+    """Metni cümle sınırlarına uyan, birbiriyle biraz örtüşen parçalara böler.
+
+    Örtüşme, parça sınırına denk gelen bir yorumun iki parçada da bağlamıyla görünmesini sağlar.
+    """
+    # Noktalamasız uzun akışlar örtüşme boyutunda kesilir ki parçalar arasında bağlam taşınabilsin
+    sentences = split_sentences(text, min(max_tokens, max(overlap_tokens // 2, 25)))
+    chunks = []
+    current, current_tokens = [], 0
+
+    for sentence in sentences:
+        tokens = estimate_tokens(sentence)
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append(" ".join(current))
+            # Son birkaç cümleyi bir sonraki parçanın başına taşı
+            overlap, overlap_size = [], 0
+            for previous in reversed(current):
+                size = estimate_tokens(previous)
+                if overlap_size + size > overlap_tokens:
+                    break
+                overlap.insert(0, previous)
+                overlap_size += size
+            current, current_tokens = overlap, overlap_size
+        current.append(sentence)
+        current_tokens += tokens
+
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
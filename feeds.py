@@ -0,0 +1,74 @@
+import threading
+import time
+import xml.etree.ElementTree as ET
+
+from http_client import session as http_session
+from metrics import metrics
+
+ATOM_NS = '{http://www.w3.org/2005/Atom}'
+YT_NS = '{http://www.youtube.com/xml/schemas/2015}'
+
+
+def parse_feed(content):
+    """YouTube RSS (Atom) içeriğini [{'title', 'url', 'video_id', 'published'}] listesine çevirir."""
+    root = ET.fromstring(content)
+    entries = []
+    for entry in root.findall(f'{ATOM_NS}entry'):
+        title = entry.find(f'{ATOM_NS}title')
+        link = entry.find(f'{ATOM_NS}link')
+        published = entry.find(f'{ATOM_NS}published')
+        video_id = entry.find(f'{YT_NS}videoId')
+        entries.append({
+            'title': title.text if title is not None else None,
+            'url': link.attrib.get('href') if link is not None else None,
+            'video_id': video_id.text if video_id is not None else None,
+            'published': published.text if published is not None else None,
+        })
+    return entries
+
+
+class FeedCache:
+    """RSS beslemelerini koşullu GET (ETag / If-Modified-Since) ile çeker, son ayrıştırılmış hali saklar.
+
+    Besleme değişmediyse sunucu 304 döner; gövde indirilmez ve tekrar ayrıştırılmaz.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._feeds = {}
+
+    def fetch(self, url, timeout=5):
+        """(entries, status_code) döner; 304'te önceki ayrıştırılmış liste döner. Hata durumunda entries None."""
+        with self._lock:
+            cached = self._feeds.get(url)
+
+        headers = {}
+        if cached:
+            if cached['etag']:
+                headers['If-None-Match'] = cached['etag']
+            if cached['last_modified']:
+                headers['If-Modified-Since'] = cached['last_modified']
+
+        with metrics.span("rss_fetch") as span:
+            response = http_session.get(url, headers=headers, timeout=timeout)
+            span.outcome = str(response.status_code)
+        if response.status_code == 304 and cached:
+            with self._lock:
+                cached['checked_at'] = time.time()
+            return cached['entries'], 304
+        if response.status_code != 200:
+            return None, response.status_code
+
+        entries = parse_feed(response.content)
+        with self._lock:
+            self._feeds[url] = {
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'entries': entries,
+                'checked_at': time.time(),
+            }
+        return entries, 200
+
+
+# Süreç genelinde tek örnek
+feed_cache = FeedCache()
@@ -0,0 +1,80 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+
+def race(tasks, hedge_delay=0.0, rank=None, timeout=None, on_poll=None, poll_interval=0.5, final=None, grace=None):
+    """Görevleri yarıştırır; en iyi sıradaki (rank == 0) ilk sonucu döner, diğerlerini iptal eder.
+
+    Her görev bir `threading.Event` (iptal bayrağı) alan bir fonksiyondur ve başarısızsa None döner.
+    `hedge_delay` > 0 ise görevler bu aralıkla kademeli başlatılır; çalışan görev erken biterse ya da
+    başarısız olursa (None/hata) sıradaki beklemeden başlar. Tercih edilen sonuç gelmezse en iyi sıradaki
+    döner: `final(sonuç)` doğruysa (kalan görevler daha iyisini bulamaz) hemen, `grace` verilmişse ilk
+    geçerli sonuçtan en fazla bu kadar sn sonra, yoksa hepsi bitince. on_poll verilirse beklerken en fazla `poll_interval` sn arayla çağıran thread'den
+    çağrılır (görev thread'lerinin bıraktığı durumu bildirmek için).
+    """
+    if rank is None:
+        rank = lambda result: 0
+
+    cancel = threading.Event()
+    executor = ThreadPoolExecutor(max_workers=max(1, len(tasks)), thread_name_prefix="race")
+    deadline = time.monotonic() + timeout if timeout else None
+    pending = set()
+    next_index = 0
+    next_start = time.monotonic()
+    best = None
+
+    try:
+        while True:
+            now = time.monotonic()
+            if deadline and now >= deadline:
+                break
+
+            # Sıradaki görevi başlatma zamanı geldiyse (ya da çalışan kalmadıysa) başlat
+            if next_index < len(tasks) and (now >= next_start or not pending):
+                pending.add(executor.submit(tasks[next_index], cancel))
+                next_index += 1
+                next_start = now + hedge_delay
+                continue
+
+            if not pending:
+                break
+            if on_poll:
+                on_poll()
+
+            wait_for = None
+            if next_index < len(tasks):
+                wait_for = max(0.0, next_start - now)
+            if deadline:
+                wait_for = min(wait_for, deadline - now) if wait_for is not None else deadline - now
+            if on_poll:
+                wait_for = min(wait_for, poll_interval) if wait_for is not None else poll_interval
+
+            done, pending = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"Yarış görevi hatası: {e}")
+                    result = None
+                if not result:
+                    # Başarısız görev: sıradaki kaynak gecikme beklenmeden hemen başlasın
+                    next_start = now
+                    continue
+                result_rank = rank(result)
+                if result_rank == 0:
+                    return result
+                if best is None and grace is not None:
+                    # Daha iyi sıradaki sonuç için kısa bir süre daha beklenir
+                    grace_deadline = time.monotonic() + grace
+                    deadline = min(deadline, grace_deadline) if deadline else grace_deadline
+                if best is None or result_rank < best[0]:
+                    best = (result_rank, result)
+                if final and final(result):
+                    return best[1]
+
+        return best[1] if best else None
+    finally:
+        # Kaybedenleri durdur: başlamamış olanlar iptal, çalışanlar bayrağı görünce çıkar
+        cancel.set()
+        executor.shutdown(wait=False, cancel_futures=True)
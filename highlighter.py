@@ -0,0 +1,140 @@
+import json
+import os
+import re
+
+# Vurgulanacak terimler: ana terim -> eş anlamlılar / kısaltmalar. HIGHLIGHT_TERMS_FILE ile verilen JSON
+# dosyası ({"altın": ["ons", "gram altın"], "tesla": ["TSLA"]}) bu listeye eklenir.
+DEFAULT_TERMS = {
+    "altın": ["ons", "gram altın", "çeyrek altın", "XAU"],
+    "gümüş": ["XAG"],
+    "borsa": ["BIST", "BIST 100", "Borsa İstanbul"],
+    "nasdaq": ["Nasdaq 100"],
+    "s&p": ["S&P 500", "SPX"],
+    "dow jones": ["Dow"],
+    "kripto": ["kripto para"],
+    "bitcoin": ["BTC"],
+    "ethereum": ["ETH"],
+    "dolar": ["USD", "dolar/tl"],
+    "euro": ["EUR", "avro"],
+    "petrol": ["brent"],
+    "fed": [],
+    "faiz": [],
+    "enflasyon": [],
+}
+HIGHLIGHT_TERMS_FILE = os.getenv("HIGHLIGHT_TERMS_FILE")
+
+# Kısa kısaltmalar (ons, BTC, Fed) sadece tam kelime olarak eşleşir; daha uzun terimler Türkçe ekleri
+# kabul eder ("altının", "doları")
+SHORT_TERM_LENGTH = 3
+
+HIGHLIGHT_TEMPLATE = '<span style="background-color: #ffd700; color: black; padding: 0px 4px; border-radius: 3px; font-weight: bold;">{}</span>'
+
+# Türkçe büyük/küçük harf: İ, I, ı, i aynı harf sayılır ("ALTIN" = "altın", "BİST" = "bist")
+TURKISH_FOLD = str.maketrans({"İ": "i", "I": "i", "ı": "i"})
+
+
+def fold(text):
+    """Türkçe duyarlı küçük harfe çevirme; uzunluk korunur (eşleşme konumları orijinal metne aynen uyar)."""
+    folded = text.translate(TURKISH_FOLD).lower()
+    if len(folded) != len(text):
+        # Nadir: küçük harfi birden fazla karakter olan harfler
+        folded = "".join(ch.translate(TURKISH_FOLD).lower()[:1] or ch for ch in text)
+    return folded
+
+
+def load_terms(path=HIGHLIGHT_TERMS_FILE):
+    """Varsayılan terimlere (varsa) dosyadakileri ekleyip düz bir terim listesi döner."""
+    terms = {key: list(values) for key, values in DEFAULT_TERMS.items()}
+    if path:
+        try:
+            with open(path, encoding="utf-8") as f:
+                for key, values in json.load(f).items():
+                    terms.setdefault(key, []).extend(values)
+        except Exception as e:
+            print(f"Vurgulama terimleri okunamadı ({path}): {e}")
+    words = set()
+    for key, values in terms.items():
+        words.add(key)
+        words.update(values)
+    return sorted(words)
+
+
+class Highlighter:
+    """Tüm terimleri tek bir önceden derlenmiş regex ile metin üzerinde tek geçişte vurgular.
+
+    Eşleşme Türkçe katlanmış (fold) kopya üzerinde yapılır, vurgu orijinal metne uygulanır; böylece
+    eklenen <span> etiketleri hiç taranmaz.
+    """
+
+    def __init__(self, terms):
+        alternatives = []
+        # Uzun terimler önce: "gram altın" tek vurgu olsun, "altın" ayrıca eşleşmesin
+        for term in sorted({fold(t) for t in terms if t}, key=len, reverse=True):
+            escaped = r"\s+".join(re.escape(part) for part in term.split())
+            if len(term) <= SHORT_TERM_LENGTH:
+                escaped += r"(?!\w)"
+            alternatives.append(escaped)
+        # Kelime başında başlamalı (\w'den sonra gelemez); sondaki Türkçe ekler vurguya dahil edilir
+        self.pattern = re.compile(r"(?<!\w)(?:" + "|".join(alternatives) + r")\w*") if alternatives else None
+        self.max_words = max((len(t.split()) for t in terms if t), default=1)
+
+    def spans(self, text):
+        """Metindeki terimlerin (başlangıç, bitiş) konumları."""
+        if not text or self.pattern is None:
+            return []
+        return [match.span() for match in self.pattern.finditer(fold(text))]
+
+    def highlight(self, text):
+        """Metindeki terimleri sarı ile vurgular."""
+        parts = []
+        last = 0
+        for start, end in self.spans(text):
+            parts.append(text[last:start])
+            parts.append(HIGHLIGHT_TEMPLATE.format(text[start:end]))
+            last = end
+        if not parts:
+            return text
+        parts.append(text[last:])
+        return "".join(parts)
+
+
+class StreamingHighlighter:
+    """Akışla gelen özeti parça parça vurgular.
+
+    Sadece tamamlanmış kelimeler vurgulanır; yarım kalan son kelime (ve çok kelimeli terimler için
+    önündeki birkaç kelime) bir sonraki parçayı bekler. Böylece parça sınırına bölünen bir terim
+    ("al" + "tın", "gram" + " altın") da doğru vurgulanır ve vurgulanmış kısım tekrar taranmaz.
+    """
+
+    def __init__(self, highlighter=None):
+        self.highlighter = highlighter or default_highlighter
+        self.highlighted = []
+        self.pending = ""
+
+    def feed(self, piece):
+        """Yeni parçayı ekler; şu ana kadarki metnin vurgulanmış halini döner."""
+        self.pending += piece
+        cut = len(self.pending)
+        for _ in range(self.highlighter.max_words):
+            cut = max(self.pending.rfind(" ", 0, cut), self.pending.rfind("\n", 0, cut))
+            if cut < 0:
+                break
+        if cut >= 0:
+            # Sınırın üstüne denk gelen bir terim varsa ("gram | altın") sınırı terimin önüne çek
+            for start, end in self.highlighter.spans(self.pending):
+                if start <= cut < end:
+                    cut = start - 1
+                    break
+        if cut >= 0:
+            self.highlighted.append(self.highlighter.highlight(self.pending[:cut + 1]))
+            self.pending = self.pending[cut + 1:]
+        return "".join(self.highlighted) + self.pending
+
+
+# Süreç genelinde tek örnek (desen bir kez derlenir)
+default_highlighter = Highlighter(load_terms())
+
+
+def highlight_keywords(text):
+    """Metindeki önemli finansal terimleri sarı ile vurgular."""
+    return default_highlighter.highlight(text)
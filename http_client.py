@@ -0,0 +1,75 @@
+import os
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import MaxRetryError, ResponseError
+from urllib3.util import make_headers
+from urllib3.util.retry import Retry
+
+# Bağlantı ve okuma zaman aşımları (sn)
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3.05"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "15"))
+# 429 / 5xx için tekrar deneme ayarları
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "3"))
+HTTP_BACKOFF = float(os.getenv("HTTP_BACKOFF", "0.5"))
+# Retry-After bundan uzunsa beklenmez, yanıt hemen döner (Streamlit iş parçacığı dakikalarca beklemesin)
+HTTP_MAX_RETRY_AFTER = float(os.getenv("HTTP_MAX_RETRY_AFTER", "10"))
+# Host başına açık tutulacak bağlantı sayısı
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "20"))
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+
+class CappedRetry(Retry):
+    """Retry-After başlığına uyar; HTTP_MAX_RETRY_AFTER'dan uzun bekleme istenirse hiç beklemeden vazgeçer.
+
+    Sunucu o süre dolmadan gelen denemeyi yine reddedeceğinden kısaltılmış beklemeyle tekrar denemek
+    sadece zaman kaybıdır: 429/503 yanıtı çağırana hemen döner (raise_on_status=False).
+    """
+
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        if response is not None:
+            retry_after = self.get_retry_after(response)
+            if retry_after is not None and retry_after > HTTP_MAX_RETRY_AFTER:
+                raise MaxRetryError(_pool, url, ResponseError(f"Retry-After {retry_after:.0f} sn > {HTTP_MAX_RETRY_AFTER:.0f} sn"))
+        return super().increment(method, url, response, error, _pool, _stacktrace)
+
+
+class TimeoutSession(requests.Session):
+    """Zaman aşımı verilmeyen isteklere varsayılan (bağlantı, okuma) zaman aşımı ekler."""
+
+    def request(self, method, url, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+        return super().request(method, url, **kwargs)
+
+
+def build_session(retries=HTTP_RETRIES):
+    """Host başına keep-alive havuzlu, tekrar denemeli bir oturum oluşturur."""
+    session = TimeoutSession()
+    retry = CappedRetry(
+        total=retries,
+        connect=retries,
+        read=0,
+        status=retries,
+        backoff_factor=HTTP_BACKOFF,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE, max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({
+        "User-Agent": USER_AGENT,
+        # gzip/deflate her zaman; brotli paketi kuruluysa "br" de eklenir
+        "Accept-Encoding": make_headers(accept_encoding=True)["accept-encoding"],
+    })
+    return session
+
+
+# Süreç genelinde paylaşılan oturumlar
+session = build_session()
+# Ayna sunucular için: tekrar deneme yok, başarısız sunucudan hızla diğerine geçilir
+mirror_session = build_session(retries=0)
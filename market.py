@@ -0,0 +1,110 @@
+import os
+import threading
+import time
+
+import yfinance as yf
+
+from metrics import metrics
+
+# Piyasa verisinin arka planda yenilenme aralığı (sn)
+MARKET_REFRESH_SECONDS = float(os.getenv("MARKET_REFRESH_SECONDS", "300"))
+
+
+def get_market_data():
+    """Anlık piyasa verilerini çeker."""
+    try:
+        tickers = {
+            "USDTRY=X": "Dolar",
+            "EURTRY=X": "Euro",
+            "XU100.IS": "BIST 100",
+            "GC=F": "Ons Altın",
+            "BTC-USD": "Bitcoin"
+        }
+
+        # Son 5 günlük veriyi alıp, eksik verileri (hafta sonu/tatil) önceki günle dolduruyoruz (ffill)
+        with metrics.span("market_fetch"):
+            data = yf.download(list(tickers.keys()), period="5d", interval="1d", progress=False)['Close'].ffill().iloc[-1]
+
+        # Gram Altın Hesabı: (Ons * Dolar) / 31.1035
+        dolar = data["USDTRY=X"]
+        ons = data["GC=F"]
+        gram_altin = (ons * dolar) / 31.1035
+
+        market_info = {
+            "Dolar": f"{dolar:.2f} ₺",
+            "Euro": f"{data['EURTRY=X']:.2f} ₺",
+            "Gram Altın": f"{gram_altin:.0f} ₺",
+            "BIST 100": f"{data['XU100.IS']:.0f}",
+            "Bitcoin": f"${data['BTC-USD']:.0f}"
+        }
+        return market_info
+    except Exception:
+        return None
+
+
+def get_price_history(days=730):
+    """Görüş varlıklarının günlük kapanışları (tarih indeksli, sütunlar: altin, doviz, bist, kripto, abd); hata olursa None."""
+    try:
+        with metrics.span("market_history"):
+            data = yf.download(["GC=F", "USDTRY=X", "XU100.IS", "BTC-USD", "^GSPC"], period=f"{days}d",
+                               interval="1d", progress=False)['Close'].ffill()
+        prices = data.rename(columns={"USDTRY=X": "doviz", "XU100.IS": "bist", "BTC-USD": "kripto", "^GSPC": "abd"})
+        # Gram altın (TL), özetlerdeki hedefler çoğunlukla bu cinsten
+        prices["altin"] = data["GC=F"] * data["USDTRY=X"] / 31.1035
+        if prices.index.tz is not None:
+            prices.index = prices.index.tz_localize(None)
+        return prices[["altin", "doviz", "bist", "kripto", "abd"]]
+    except Exception:
+        return None
+
+
+class MarketTicker:
+    """Piyasa verisini süreç genelinde tutar ve arka plandaki bir thread ile yeniler.
+
+    Sayfa çizimi hiçbir zaman ağı beklemez: elde ne varsa (eski de olsa) onu gösterir
+    (stale-while-revalidate). Yenileme başarısız olursa son iyi veri korunur.
+    """
+
+    def __init__(self, fetch=get_market_data, interval=MARKET_REFRESH_SECONDS):
+        self.fetch = fetch
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._data = None
+        self._fetched_at = None
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Yenileme thread'ini (bir kez) başlatır."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="market-ticker", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            data = self.fetch()
+            if data:
+                with self._lock:
+                    self._data = data
+                    self._fetched_at = time.time()
+            # Hata sonrası daha erken tekrar dene
+            self._wakeup.wait(self.interval if data else min(30, self.interval))
+            self._wakeup.clear()
+
+    def refresh(self):
+        """Bir sonraki döngüyü beklemeden yenilemeyi tetikler."""
+        self._wakeup.set()
+
+    def snapshot(self):
+        """(veri, yaş saniye) döner; henüz veri yoksa (None, None). Ağa çıkmaz."""
+        self.start()
+        with self._lock:
+            if self._data is None:
+                return None, None
+            return self._data, time.time() - self._fetched_at
+
+
+# Süreç genelinde tek örnek: tüm oturumlar aynı Yahoo isteğini paylaşır
+market_ticker = MarketTicker()
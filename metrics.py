@@ -0,0 +1,197 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Ayarlanırsa /metrics (Prometheus metni) ve /metrics.json bu portta sunulur
+METRICS_PORT = os.getenv("METRICS_PORT")
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+
+# Süre histogramı kovaları (sn)
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+# Kenar çubuğundaki yüzdelikler için seri başına tutulan son ölçüm sayısı
+RECENT_SAMPLES = 200
+
+
+def error_outcome(error):
+    """İstisnayı kısa bir sonuç etiketine çevirir (429, 404, timeout, error)."""
+    message = str(error)
+    if "429" in message:
+        return "429"
+    if "404" in message:
+        return "404"
+    if "timed out" in message.lower() or "timeout" in type(error).__name__.lower():
+        return "timeout"
+    return "error"
+
+
+class Span:
+    """Bir aşamanın süresini ölçer; sonuç etiketi blok içinde `outcome` ile değiştirilebilir."""
+
+    def __init__(self, registry, stage, labels):
+        self.registry = registry
+        self.stage = stage
+        self.labels = labels
+        self.outcome = "ok"
+
+
+class Metrics:
+    """Aşama süreleri (histogram) ve sayaçlar; süreç genelinde thread-safe toplanır."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (aşama, etiketler) -> {'count', 'sum', 'buckets', 'recent'}
+        self._histograms = {}
+        # (ad, etiketler) -> değer
+        self._counters = {}
+        self._server = None
+        # Port açılamadıysa her Streamlit yeniden çalıştırmasında tekrar denenmez
+        self._server_failed = False
+
+    @contextmanager
+    def span(self, stage, **labels):
+        """`with metrics.span("rss_fetch") as s:` şeklinde kullanılır; istisnada sonuç hata türü olur.
+
+        Exception dışındaki kesintiler (Streamlit'in RerunException/StopException'ı, KeyboardInterrupt)
+        hata sayılmaz: "cancelled" olarak kaydedilip olduğu gibi yeniden fırlatılır.
+        """
+        span = Span(self, stage, labels)
+        started = time.perf_counter()
+        try:
+            yield span
+        except Exception as e:
+            span.outcome = error_outcome(e)
+            raise
+        except BaseException:
+            span.outcome = "cancelled"
+            raise
+        finally:
+            self.observe(stage, time.perf_counter() - started, span.outcome, **labels)
+
+    def observe(self, stage, seconds, outcome="ok", **labels):
+        key = (stage, tuple(sorted(dict(labels, outcome=outcome).items())))
+        with self._lock:
+            series = self._histograms.get(key)
+            if series is None:
+                series = self._histograms[key] = {
+                    "count": 0, "sum": 0.0, "buckets": [0] * len(BUCKETS), "recent": deque(maxlen=RECENT_SAMPLES),
+                }
+            series["count"] += 1
+            series["sum"] += seconds
+            for i, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    series["buckets"][i] += 1
+            series["recent"].append(seconds)
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def snapshot(self):
+        """JSON'a çevrilebilir anlık görüntü."""
+        with self._lock:
+            stages = [
+                {"stage": stage, "labels": dict(labels), "count": s["count"], "sum": s["sum"],
+                 "buckets": dict(zip(map(str, BUCKETS), s["buckets"]))}
+                for (stage, labels), s in self._histograms.items()
+            ]
+            counters = [{"name": name, "labels": dict(labels), "value": value} for (name, labels), value in self._counters.items()]
+        return {"stages": stages, "counters": counters}
+
+    def prometheus(self):
+        """Prometheus metin biçimi."""
+        lines = ["# TYPE youtekonomi_stage_seconds histogram"]
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            counters = sorted(self._counters.items())
+        for (stage, labels), s in histograms:
+            base = _label_text(dict(labels, stage=stage))
+            for bound, count in zip(BUCKETS, s["buckets"]):
+                lines.append(f'youtekonomi_stage_seconds_bucket{{{base},le="{bound}"}} {count}')
+            lines.append(f'youtekonomi_stage_seconds_bucket{{{base},le="+Inf"}} {s["count"]}')
+            lines.append(f"youtekonomi_stage_seconds_sum{{{base}}} {s['sum']:.6f}")
+            lines.append(f"youtekonomi_stage_seconds_count{{{base}}} {s['count']}")
+        for name in sorted({name for (name, _), _ in counters}):
+            lines.append(f"# TYPE youtekonomi_{name}_total counter")
+            for (counter_name, labels), value in counters:
+                if counter_name == name:
+                    lines.append(f"youtekonomi_{name}_total{{{_label_text(dict(labels))}}} {value}")
+        return "\n".join(lines) + "\n"
+
+    def table(self):
+        """Kenar çubuğu tablosu: aşama/etiket başına sayı ve son ölçümlerden p50/p95 (ms)."""
+        rows = []
+        with self._lock:
+            for (stage, labels), s in sorted(self._histograms.items()):
+                recent = sorted(s["recent"])
+                labels = dict(labels)
+                outcome = labels.pop("outcome")
+                rows.append({
+                    "Aşama": stage,
+                    "Etiket": ", ".join(f"{k}={v}" for k, v in labels.items()),
+                    "Sonuç": outcome,
+                    "Sayı": s["count"],
+                    "p50 (ms)": round(recent[len(recent) // 2] * 1000) if recent else None,
+                    "p95 (ms)": round(recent[min(len(recent) - 1, int(len(recent) * 0.95))] * 1000) if recent else None,
+                })
+        return rows
+
+    def counter_table(self):
+        with self._lock:
+            return [
+                {"Sayaç": name, "Etiket": ", ".join(f"{k}={v}" for k, v in labels), "Değer": value}
+                for (name, labels), value in sorted(self._counters.items())
+            ]
+
+    def start_server(self, port=METRICS_PORT, host=METRICS_HOST):
+        """METRICS_PORT ayarlıysa ölçüm uç noktasını (bir kez) arka planda başlatır."""
+        if not port:
+            return None
+        with self._lock:
+            if self._server is not None or self._server_failed:
+                return self._server
+            registry = self
+
+            class Handler(BaseHTTPRequestHandler):
+                def log_message(self, *args):
+                    pass
+
+                def do_GET(self):
+                    if self.path.startswith("/metrics.json"):
+                        body, content_type = json.dumps(registry.snapshot()), "application/json"
+                    elif self.path.startswith("/metrics"):
+                        body, content_type = registry.prometheus(), "text/plain; version=0.0.4"
+                    else:
+                        self.send_error(404)
+                        return
+                    data = body.encode("utf-8")
+                    self.send_response(200)
+                    self.send_header("Content-Type", content_type)
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+
+            try:
+                self._server = ThreadingHTTPServer((host, int(port)), Handler)
+            except OSError as e:
+                # Streamlit birden çok süreçte çalışırsa port dolu olabilir; uygulama çalışmaya devam etsin
+                print(f"Ölçüm sunucusu başlatılamadı ({host}:{port}): {e}")
+                self._server_failed = True
+                return None
+            self._server.daemon_threads = True
+            threading.Thread(target=self._server.serve_forever, name="metrics", daemon=True).start()
+            return self._server
+
+
+def _label_text(labels):
+    def escape(value):
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return ",".join(f'{key}="{escape(value)}"' for key, value in sorted(labels.items()))
+
+
+# Süreç genelinde tek örnek
+metrics = Metrics()
@@ -0,0 +1,152 @@
+import json
+import os
+import threading
+import time
+
+from storage import data_path
+
+# Sağlık takibi ayarları
+MIRROR_EWMA_ALPHA = float(os.getenv("MIRROR_EWMA_ALPHA", "0.3"))
+MIRROR_FAILURE_THRESHOLD = int(os.getenv("MIRROR_FAILURE_THRESHOLD", "3"))
+MIRROR_OPEN_SECONDS = float(os.getenv("MIRROR_OPEN_SECONDS", "300"))
+MIRROR_MAX_OPEN_SECONDS = 3600
+# Yarı açık (half-open) devrede tek bir deneme isteğinin en uzun süresi
+MIRROR_PROBE_SECONDS = 30
+
+# Hiç ölçülmemiş sunucular için başlangıç tahmini
+DEFAULT_LATENCY = 1.5
+DEFAULT_SUCCESS = 0.5
+
+
+class MirrorRegistry:
+    """Invidious/Piped ayna sunucularının gecikme ve başarı oranlarını takip eder.
+
+    Gecikme ve başarı hareketli ortalama (EWMA) ile tutulur. Üst üste başarısız olan sunucu için
+    devre kesici açılır; süre dolunca tek bir deneme (half-open) isteğine izin verilir.
+    """
+
+    def __init__(self, filename="mirrors.json", alpha=MIRROR_EWMA_ALPHA,
+                 failure_threshold=MIRROR_FAILURE_THRESHOLD, open_seconds=MIRROR_OPEN_SECONDS):
+        self.path = data_path(filename)
+        self.alpha = alpha
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self._lock = threading.Lock()
+        self._last_save = 0.0
+        self._stats = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save(self):
+        """Durumu diske yazar (yarım kalmış dosya oluşmaması için önce geçici dosyaya)."""
+        with self._lock:
+            snapshot = json.dumps(self._stats)
+            self._last_save = time.time()
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(snapshot)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Ayna kaydı yazılamadı: {e}")
+
+    def _entry(self, host):
+        entry = self._stats.get(host)
+        if entry is None:
+            entry = self._stats[host] = {
+                "latency": DEFAULT_LATENCY,
+                "success": DEFAULT_SUCCESS,
+                "failures": 0,
+                "trips": 0,
+                "open_until": 0.0,
+                "probe_until": 0.0,
+                "attempts": 0,
+                "last_seen": 0.0,
+            }
+        return entry
+
+    def expected_cost(self, host):
+        """Beklenen gecikme: ortalama gecikme / başarı oranı (başarısız deneme tekrar demektir)."""
+        entry = self._stats.get(host)
+        if entry is None:
+            return DEFAULT_LATENCY / DEFAULT_SUCCESS
+        return entry["latency"] / max(entry["success"], 0.05)
+
+    def ordered(self, hosts):
+        """Şu an denenebilecek sunucuları beklenen gecikmeye göre sıralı döner.
+
+        Devresi açık olanlar atlanır; süresi dolmuş olanlar tek deneme için listenin sonuna eklenir.
+        """
+        now = time.time()
+        healthy, probes = [], []
+        with self._lock:
+            for host in hosts:
+                entry = self._stats.get(host)
+                if entry is None or entry["open_until"] == 0.0:
+                    healthy.append(host)
+                elif now >= entry["open_until"] and now >= entry["probe_until"]:
+                    # Yarı açık: bu istek deneme hakkını alır, diğerleri beklemeye devam eder
+                    entry["probe_until"] = now + MIRROR_PROBE_SECONDS
+                    probes.append(host)
+        healthy.sort(key=self.expected_cost)
+        return healthy + probes
+
+    def record(self, host, ok, latency):
+        """Bir denemenin sonucunu kaydeder."""
+        now = time.time()
+        with self._lock:
+            entry = self._entry(host)
+            entry["attempts"] += 1
+            entry["last_seen"] = now
+            # İlk ölçüm başlangıç tahmininin yerine geçer, sonrakiler ortalamaya katılır
+            alpha = 1.0 if entry["attempts"] == 1 else self.alpha
+            entry["success"] += alpha * ((1.0 if ok else 0.0) - entry["success"])
+            if ok:
+                entry["latency"] += alpha * (latency - entry["latency"])
+                entry["failures"] = 0
+                entry["trips"] = 0
+                entry["open_until"] = 0.0
+                entry["probe_until"] = 0.0
+            else:
+                entry["failures"] += 1
+                half_open = entry["open_until"] != 0.0
+                if half_open or entry["failures"] >= self.failure_threshold:
+                    # Devreyi aç; her yeni açılışta bekleme süresi ikiye katlanır
+                    entry["trips"] += 1
+                    wait = min(self.open_seconds * 2 ** (entry["trips"] - 1), MIRROR_MAX_OPEN_SECONDS)
+                    entry["open_until"] = now + wait
+                    entry["probe_until"] = 0.0
+            should_save = now - self._last_save > 10
+        if should_save:
+            self.save()
+
+    def scoreboard(self):
+        """Kenar çubuğunda gösterilecek tablo satırları."""
+        now = time.time()
+        rows = []
+        with self._lock:
+            for host in sorted(self._stats, key=self.expected_cost):
+                entry = self._stats[host]
+                if entry["open_until"] == 0.0:
+                    state = "🟢 Kapalı"
+                elif now < entry["open_until"]:
+                    state = f"🔴 Açık ({int(entry['open_until'] - now)} sn)"
+                else:
+                    state = "🟡 Yarı açık"
+                rows.append({
+                    "Sunucu": host.replace("https://", ""),
+                    "Durum": state,
+                    "Gecikme (sn)": round(entry["latency"], 2),
+                    "Başarı": f"%{entry['success'] * 100:.0f}",
+                    "Deneme": entry["attempts"],
+                })
+        return rows
+
+
+# Süreç genelinde tek örnek
+mirror_registry = MirrorRegistry()
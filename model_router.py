@@ -0,0 +1,280 @@
+import hashlib
+import os
+import re
+import threading
+import time
+
+import google.generativeai as genai
+
+from hedging import race
+from metrics import error_outcome
+from rate_limiter import RATE_LIMIT_REPORT_SECONDS, RateLimitCancelled, rate_limiter
+
+# Model kataloğu (list_models) API anahtarı başına bu süre saklanır
+MODEL_CATALOG_TTL_SECONDS = float(os.getenv("MODEL_CATALOG_TTL_SECONDS", "21600"))
+# 404 veren model bu süre boyunca denenmez
+MODEL_DEAD_SECONDS = float(os.getenv("MODEL_DEAD_SECONDS", "86400"))
+# 429 hatasında bekleme süresi hata mesajından okunamazsa kullanılacak süre
+MODEL_COOLDOWN_SECONDS = float(os.getenv("MODEL_COOLDOWN_SECONDS", "60"))
+# Tüm modeller kota beklemesindeyse en fazla bu kadar beklenip tekrar denenir; daha uzunsa hata verilir
+MODEL_MAX_COOLDOWN_WAIT = float(os.getenv("MODEL_MAX_COOLDOWN_WAIT", "10"))
+# > 0 ise yanıt bu süre (sn) içinde gelmezse sıradaki model de paralel denenir (akışsız çağrılarda)
+MODEL_HEDGE_AFTER_SECONDS = float(os.getenv("MODEL_HEDGE_AFTER_SECONDS", "0"))
+MODEL_EWMA_ALPHA = 0.3
+
+# Hata mesajındaki bekleme süresi: "retry_delay { seconds: 17 }" veya "Please retry in 17.5s"
+RETRY_DELAY_PATTERNS = (
+    re.compile(r'retry_delay\s*\{\s*seconds:\s*(\d+)'),
+    re.compile(r'retry in ([\d.]+)\s*s', re.IGNORECASE),
+)
+
+
+def retry_delay(error):
+    """429 hatasından önerilen bekleme süresini (sn) çıkarır; bulunamazsa None."""
+    message = str(error)
+    for pattern in RETRY_DELAY_PATTERNS:
+        match = pattern.search(message)
+        if match:
+            return float(match.group(1))
+    return None
+
+
+class ModelCooldownError(Exception):
+    """Tüm modeller kota beklemesinde; `wait` en erken açılacak kotaya kalan süredir (sn)."""
+
+    def __init__(self, wait):
+        super().__init__(f"429 Tüm modeller kota beklemesinde, {wait:.0f} sn sonra tekrar deneyin.")
+        self.wait = wait
+
+
+class ModelRouter:
+    """Gemini modellerini sağlık durumuna göre sıralar.
+
+    API anahtarı başına model kataloğu (list_models) önbelleğe alınır; 404 veren modeller bir süre
+    denenmez, 429 veren modeller hata mesajındaki süre kadar beklemeye alınır. Sağlıklı modeller
+    gözlenen gecikmeye (EWMA) göre, hiç ölçülmemişler tercih listesindeki sırayla denenir.
+    """
+
+    def __init__(self, preferred):
+        self.preferred = list(preferred)
+        self._lock = threading.Lock()
+        self._configure_lock = threading.Lock()
+        self._api_key = None
+        # anahtar kimliği -> {'models': [...] | None, 'fetched_at'}
+        self._catalogs = {}
+        # (anahtar kimliği, model) -> bitiş zamanı
+        self._dead = {}
+        self._cooldowns = {}
+        # model -> {'latency', 'calls', 'errors'}
+        self._stats = {}
+
+    @staticmethod
+    def _key_id(api_key):
+        return hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()[:12]
+
+    def configure(self, api_key):
+        """genai.configure'u sadece anahtar değiştiğinde çağırır."""
+        with self._configure_lock:
+            if api_key != self._api_key:
+                genai.configure(api_key=api_key)
+                self._api_key = api_key
+
+    def catalog(self, refresh=False):
+        """Geçerli anahtarla erişilebilen (generateContent destekli) model adları; alınamazsa None."""
+        key_id = self._key_id(self._api_key)
+        now = time.time()
+        with self._lock:
+            cached = self._catalogs.get(key_id)
+            if cached and not refresh and now - cached["fetched_at"] < MODEL_CATALOG_TTL_SECONDS:
+                return cached["models"]
+        try:
+            models = [m.name for m in genai.list_models() if 'generateContent' in m.supported_generation_methods]
+            ttl_start = now
+        except Exception as e:
+            print(f"Model listesi alınamadı: {e}")
+            models = None
+            # Başarısız liste isteği her özette tekrarlanmasın: 1 dk sonra yeniden denenir
+            ttl_start = now - MODEL_CATALOG_TTL_SECONDS + 60
+        with self._lock:
+            self._catalogs[key_id] = {"models": models, "fetched_at": ttl_start}
+            if models is not None:
+                # Katalog tazelendi: katalogda olan modellerin "yok" işaretini kaldır
+                for dead_key in [k for k in self._dead if k[0] == key_id and k[1] in models]:
+                    del self._dead[dead_key]
+        return models
+
+    def candidates(self):
+        """(denenecek modeller, en erken kota bitişine kalan sn) döner."""
+        catalog = self.catalog()
+        key_id = self._key_id(self._api_key)
+        now = time.time()
+        models = self.preferred
+        if catalog is not None:
+            models = [m for m in self.preferred if m in catalog]
+            if not models:
+                # Tercih listesindeki modellerin hepsi kalkmış: katalogdaki Gemini modellerine geç (flash önce)
+                models = sorted((m for m in catalog if "gemini" in m), key=lambda m: ("flash" not in m, m))[:3]
+
+        healthy, soonest = [], None
+        with self._lock:
+            for model in models:
+                if self._dead.get((key_id, model), 0) > now:
+                    continue
+                cooldown_until = self._cooldowns.get((key_id, model), 0)
+                if cooldown_until > now:
+                    soonest = cooldown_until - now if soonest is None else min(soonest, cooldown_until - now)
+                    continue
+                healthy.append(model)
+            order = {model: i for i, model in enumerate(models)}
+            measured = [m for m in healthy if m in self._stats and self._stats[m]["latency"] is not None]
+            unmeasured = [m for m in healthy if m not in measured]
+            measured.sort(key=lambda m: self._stats[m]["latency"])
+            unmeasured.sort(key=order.get)
+        return measured + unmeasured, soonest
+
+    def record(self, model, latency, error=None):
+        key_id = self._key_id(self._api_key)
+        now = time.time()
+        with self._lock:
+            stats = self._stats.setdefault(model, {"latency": None, "calls": 0, "errors": 0})
+            stats["calls"] += 1
+            if error is None:
+                previous = stats["latency"]
+                stats["latency"] = latency if previous is None else MODEL_EWMA_ALPHA * latency + (1 - MODEL_EWMA_ALPHA) * previous
+                self._cooldowns.pop((key_id, model), None)
+                return
+            stats["errors"] += 1
+            outcome = error_outcome(error)
+            if outcome == "404":
+                self._dead[(key_id, model)] = now + MODEL_DEAD_SECONDS
+            elif outcome == "429":
+                self._cooldowns[(key_id, model)] = now + (retry_delay(error) or MODEL_COOLDOWN_SECONDS)
+
+    def _attempt(self, model, call, tokens=0, on_wait=None, cancel=None):
+        # Kota kuyruğunda bekleme gecikmeye sayılmaz
+        key_id = self._key_id(self._api_key)
+        if cancel is not None and cancel.is_set():
+            raise RateLimitCancelled(f"{model} isteği başlamadan iptal edildi.")
+        rate_limiter.acquire(key_id, model, tokens, on_wait, cancel)
+        if cancel is not None and cancel.is_set():
+            # Sıra gelirken yarış bitti: istek gönderilmez, hak kotaya geri verilir
+            rate_limiter.release(key_id, model, tokens)
+            raise RateLimitCancelled(f"{model} isteği gönderilmeden iptal edildi.")
+        started = time.monotonic()
+        try:
+            result = call(model)
+        except Exception as e:
+            self.record(model, time.monotonic() - started, e)
+            raise
+        self.record(model, time.monotonic() - started)
+        return result
+
+    def run(self, call, tokens=0, on_wait=None, hedge_after=0.0, fatal=()):
+        """call(model_adı) sağlıklı modellerde sırayla denenir; (sonuç, model adı) döner.
+
+        Her deneme öncesinde modelin hız sınırı kuyruğunda sıra beklenir (`tokens`: tahmini girdi
+        token'ı, `on_wait`: kuyruk konumu bildirimi). `fatal` türündeki hatalarda sıradaki modele
+        geçilmez. hedge_after > 0 ise yanıt gecikince sıradaki model paralel başlatılır.
+        """
+        models, soonest = self.candidates()
+        if not models and soonest is not None and soonest <= MODEL_MAX_COOLDOWN_WAIT:
+            # Kota penceresi birazdan açılıyor: hata vermek yerine bekle
+            time.sleep(soonest)
+            models, soonest = self.candidates()
+        if not models:
+            if soonest is not None:
+                raise ModelCooldownError(soonest)
+            raise LookupError("404 Bu API anahtarıyla kullanılabilir model bulunamadı.")
+        # Kotası hemen müsait olan modeller öne (kendi aralarında gecikme sırası korunur)
+        key_id = self._key_id(self._api_key)
+        models.sort(key=lambda model: rate_limiter.estimate(key_id, model, tokens) > 0)
+
+        errors = []
+        if hedge_after > 0 and len(models) > 1:
+            # model -> (kuyruk konumu, tahmini sn); yarış thread'leri yazar, bildirim çağıran thread'den yapılır
+            # (Streamlit çağrıları yalnızca ana thread'de yapılabilir)
+            waiting = {}
+            reported = False
+            fatal_errors = []
+
+            def task(model, cancel):
+                def model_wait(position, eta):
+                    if position:
+                        waiting[model] = (position, eta)
+                    else:
+                        waiting.pop(model, None)
+                try:
+                    return self._attempt(model, call, tokens, model_wait if on_wait else None, cancel), model
+                except RateLimitCancelled:
+                    return None
+                except fatal as e:
+                    # Sıralı döngüdeki gibi sıradaki modele geçilmez: bekleyen denemeler de bırakılır
+                    fatal_errors.append(e)
+                    cancel.set()
+                    return None
+                except Exception as e:
+                    errors.append(e)
+                    return None
+                finally:
+                    waiting.pop(model, None)
+
+            def report():
+                nonlocal reported
+                queued = list(waiting.values())
+                if queued:
+                    # Yarışı ilk sırası gelen model bitirebilir: en öndeki konum ve en kısa bekleme
+                    on_wait(min(position for position, _ in queued), min(eta for _, eta in queued))
+                    reported = True
+                elif reported:
+                    on_wait(0, 0)
+                    reported = False
+
+            tasks = [lambda cancel, model=model: task(model, cancel) for model in models]
+            try:
+                result = race(tasks, hedge_delay=hedge_after, on_poll=report if on_wait else None,
+                              poll_interval=RATE_LIMIT_REPORT_SECONDS)
+            finally:
+                if reported:
+                    on_wait(0, 0)
+            if result:
+                return result
+            if fatal_errors:
+                raise fatal_errors[0]
+            raise errors[-1]
+
+        for model in models:
+            try:
+                return self._attempt(model, call, tokens, on_wait), model
+            except fatal:
+                raise
+            except Exception as e:
+                errors.append(e)
+        raise errors[-1]
+
+    def status(self):
+        """Kenar çubuğu tablosu: model başına durum, gecikme ve çağrı sayısı."""
+        key_id = self._key_id(self._api_key)
+        now = time.time()
+        rows = []
+        with self._lock:
+            catalog = self._catalogs.get(key_id, {}).get("models")
+            for model in self.preferred + [m for m in self._stats if m not in self.preferred]:
+                stats = self._stats.get(model, {})
+                if self._dead.get((key_id, model), 0) > now or (catalog is not None and model not in catalog):
+                    state = "❌ Erişilemiyor"
+                elif self._cooldowns.get((key_id, model), 0) > now:
+                    state = f"⏳ Kota ({self._cooldowns[(key_id, model)] - now:.0f} sn)"
+                else:
+                    state = "✅ Hazır"
+                latency = stats.get("latency")
+                queued, remaining = rate_limiter.snapshot(key_id, model)
+                rows.append({
+                    "Model": model.replace("models/", ""),
+                    "Durum": state,
+                    "Gecikme (sn)": round(latency, 2) if latency is not None else None,
+                    "Çağrı": stats.get("calls", 0),
+                    "Hata": stats.get("errors", 0),
+                    "Kuyruk": queued,
+                    "Kalan istek/dk": remaining,
+                })
+        return rows
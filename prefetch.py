@@ -0,0 +1,149 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from channels import FOLLOWED_CHANNELS, get_latest_video
+from search_index import search_index
+from summarizer import cached_summary, summarize, summary_error_message
+from transcript_cache import transcript_cache
+from transcripts import extract_video_id, load_transcript
+
+# Arka plan ön-hazırlık ayarları
+PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "1") == "1"
+PREFETCH_INTERVAL_SECONDS = float(os.getenv("PREFETCH_INTERVAL_SECONDS", "600"))
+# Altyazısı henüz yayınlanmamış videolar için bekleme: 5 dk, 10 dk, 20 dk ... en fazla 2 saat
+PREFETCH_RETRY_BASE_SECONDS = float(os.getenv("PREFETCH_RETRY_BASE_SECONDS", "300"))
+PREFETCH_RETRY_MAX_SECONDS = float(os.getenv("PREFETCH_RETRY_MAX_SECONDS", "7200"))
+PREFETCH_MAX_ATTEMPTS = int(os.getenv("PREFETCH_MAX_ATTEMPTS", "12"))
+# Bitmiş (hazır/başarısız) işlerin en fazla bu kadarı tutulur; RSS sadece günün videolarını verdiği için
+# silinen bir iş tekrar eklenirse de altyazı ve özet önbellekten gelir
+PREFETCH_JOB_HISTORY = int(os.getenv("PREFETCH_JOB_HISTORY", "256"))
+
+
+def ready_summary(video_url):
+    """Video için önbellekte hazır özet varsa döner (ağa çıkmaz)."""
+    digest = transcript_cache.digest(extract_video_id(video_url))
+    if not digest:
+        return None
+    return cached_summary(digest)
+
+
+class Prefetcher:
+    """Takip edilen kanalların RSS'ini aralıklarla kontrol eder, yeni videoların altyazı ve özetini önceden hazırlar.
+
+    Sonuçlar altyazı ve özet önbelleklerine yazılır; arayüz bunları düğmeye basılmadan gösterebilir.
+    """
+
+    def __init__(self, channels=FOLLOWED_CHANNELS, interval=PREFETCH_INTERVAL_SECONDS):
+        self.channels = channels
+        self.interval = interval
+        self.api_key = None
+        self._lock = threading.Lock()
+        self._thread = None
+        self._wakeup = threading.Event()
+        # video_id -> {'url', 'title', 'state', 'attempts', 'next_try', 'error'}; ekleme sırasıyla
+        self._jobs = OrderedDict()
+
+    def start(self, api_key):
+        """Arka plan thread'ini (bir kez) başlatır."""
+        with self._lock:
+            self.api_key = api_key
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="prefetch", daemon=True)
+            self._thread.start()
+
+    def status(self, video_url):
+        """Videonun ön-hazırlık durumu (yoksa None)."""
+        with self._lock:
+            job = self._jobs.get(extract_video_id(video_url))
+            return dict(job) if job else None
+
+    def _run(self):
+        next_poll = 0.0
+        while True:
+            now = time.time()
+            if now >= next_poll:
+                self._poll_channels()
+                next_poll = now + self.interval
+            self._process_due()
+            # Bir sonraki RSS kontrolü veya bekleyen yeniden denemeye kadar uyu
+            with self._lock:
+                retries = [job["next_try"] for job in self._jobs.values() if job["state"] == "waiting"]
+            wake_at = min([next_poll] + retries)
+            self._wakeup.wait(max(1.0, wake_at - time.time()))
+            self._wakeup.clear()
+
+    def _poll_channels(self):
+        for channel_name, channel_url in self.channels.items():
+            try:
+                latest_videos, _ = get_latest_video(channel_url)
+            except Exception as e:
+                print(f"Ön-hazırlık RSS hatası ({channel_name}): {e}")
+                continue
+            for video in latest_videos or []:
+                video_id = extract_video_id(video["url"])
+                search_index.annotate(video_id, title=video["title"], channel=channel_name,
+                                      published=video["date"], url=video["url"])
+                with self._lock:
+                    if not video_id or video_id in self._jobs:
+                        continue
+                    self._jobs[video_id] = {
+                        "url": video["url"],
+                        "title": video["title"],
+                        "state": "waiting",
+                        "attempts": 0,
+                        "next_try": 0.0,
+                        "error": None,
+                    }
+                    self._prune()
+
+    def _prune(self):
+        """En eski bitmiş işleri siler; bekleyen ve çalışan işlere dokunulmaz (kilit çağıranda)."""
+        finished = [key for key, job in self._jobs.items() if job["state"] in ("ready", "failed")]
+        for key in finished[:max(0, len(finished) - PREFETCH_JOB_HISTORY)]:
+            del self._jobs[key]
+
+    def _process_due(self):
+        now = time.time()
+        with self._lock:
+            due = [(video_id, job["url"]) for video_id, job in self._jobs.items()
+                   if job["state"] == "waiting" and job["next_try"] <= now]
+        for video_id, video_url in due:
+            self._prepare(video_id, video_url)
+
+    def _prepare(self, video_id, video_url):
+        with self._lock:
+            job = self._jobs[video_id]
+            job["state"] = "running"
+            job["attempts"] += 1
+            api_key = self.api_key
+
+        error = None
+        try:
+            # Ses tanıma burada denenmez: altyazı henüz yayınlanmamış olabilir, geri çekilmeyle tekrar denenir
+            text = load_transcript(video_url)
+            if text is None:
+                error = "Altyazı henüz yok"
+            else:
+                summarize(text, api_key)
+        except Exception as e:
+            error = summary_error_message(e)
+
+        with self._lock:
+            job["error"] = error
+            if error is None:
+                job["state"] = "ready"
+            elif job["attempts"] >= PREFETCH_MAX_ATTEMPTS:
+                job["state"] = "failed"
+            else:
+                # Üstel geri çekilme
+                wait = min(PREFETCH_RETRY_BASE_SECONDS * 2 ** (job["attempts"] - 1), PREFETCH_RETRY_MAX_SECONDS)
+                job["state"] = "waiting"
+                job["next_try"] = time.time() + wait
+            self._prune()
+
+
+# Süreç genelinde tek örnek
+prefetcher = Prefetcher()
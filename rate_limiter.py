@@ -0,0 +1,226 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+
+# Dakikalık istek (rpm) ve girdi token (tpm) sınırları: anahtar kimliği -> model -> sınırlar, "*" hepsi demek.
+# Varsayılanlar Gemini ÜCRETSİZ katman kotalarıdır: 1.5-flash ve diğerleri 15 rpm / 1M tpm, 1.5-pro 2 rpm / 32k tpm,
+# 2.5-pro önizleme 5 rpm / 250k tpm. Ücretli katmanda sınırlar çok daha yüksektir; ortam değişkenleriyle
+# (Streamlit'te secrets.toml'un kök anahtarları da ortam değişkeni olarak görünür) değiştirilir:
+#   GEMINI_RPM, GEMINI_TPM         tüm modellerin varsayılanlarını ezer, örn. GEMINI_RPM=1000
+#   GEMINI_RATE_LIMITS             aynı biçimde JSON, örn. '{"*": {"models/gemini-1.5-pro": {"rpm": 360}}}'
+#   GEMINI_RATE_LIMITS_FILE        aynı biçimde JSON dosyası, örn.
+#       {"*": {"models/gemini-1.5-flash": {"rpm": 2000, "tpm": 4000000}}, "a1b2c3d4e5f6": {"*": {"rpm": 15}}}
+# Sonra gelen öncekinin üzerine yazılır.
+DEFAULT_RATE_LIMITS = {
+    "*": {
+        "*": {"rpm": 15, "tpm": 1000000},
+        "models/gemini-1.5-pro": {"rpm": 2, "tpm": 32000},
+        "models/gemini-2.5-pro-preview-03-25": {"rpm": 5, "tpm": 250000},
+    },
+}
+# Kuyrukta bundan uzun beklenecekse istek hiç gönderilmeden kota hatası verilir
+RATE_LIMIT_MAX_WAIT_SECONDS = float(os.getenv("RATE_LIMIT_MAX_WAIT_SECONDS", "300"))
+# Bekleyenlere konum/tahmin bildirim aralığı (sn)
+RATE_LIMIT_REPORT_SECONDS = 0.5
+
+
+class RateLimitTimeout(Exception):
+    """Kuyruktaki tahmini bekleme izin verilen süreyi aşıyor."""
+
+
+class RateLimitCancelled(Exception):
+    """İstek sırası gelmeden iptal edildi (örn. yarışı başka model kazandı)."""
+
+
+def load_limits(path=None, inline=None):
+    """Varsayılan sınırlar + GEMINI_RPM/GEMINI_TPM + GEMINI_RATE_LIMITS + GEMINI_RATE_LIMITS_FILE.
+
+    Ortam değişkenleri çağrı anında okunur; okunamayan değer uyarıyla atlanır.
+    """
+    limits = {key: {model: dict(values) for model, values in models.items()} for key, models in DEFAULT_RATE_LIMITS.items()}
+    for name in ("rpm", "tpm"):
+        value = os.getenv(f"GEMINI_{name.upper()}")
+        if not value:
+            continue
+        try:
+            value = float(value)
+        except ValueError:
+            print(f"Gemini hız sınırı okunamadı (GEMINI_{name.upper()}={value!r})")
+            continue
+        for models in limits.values():
+            for values in models.values():
+                values[name] = value
+
+    sources = []
+    inline = os.getenv("GEMINI_RATE_LIMITS") if inline is None else inline
+    if inline:
+        sources.append(("GEMINI_RATE_LIMITS", lambda: json.loads(inline)))
+    path = os.getenv("GEMINI_RATE_LIMITS_FILE") if path is None else path
+    if path:
+        def read_file():
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        sources.append((path, read_file))
+    for source, read in sources:
+        try:
+            for key, models in read().items():
+                for model, values in models.items():
+                    limits.setdefault(key, {}).setdefault(model, {}).update(values)
+        except Exception as e:
+            print(f"Gemini hız sınırları okunamadı ({source}): {e}")
+    return limits
+
+
+class TokenBucket:
+    """Dakikada `per_minute` birim dolan, en fazla bir dakikalık birikim tutan kova."""
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def deficit_seconds(self, amount):
+        """`amount` birim için kalan bekleme süresi."""
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing / self.rate) if self.rate > 0 else 0.0
+
+
+class _Ticket:
+    __slots__ = ("tokens",)
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+
+
+class _Lane:
+    """Bir (anahtar, model) çifti için istek ve token kovaları ile FIFO bekleme sırası."""
+
+    def __init__(self, rpm, tpm):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.queue = deque()
+
+    def refill(self, now):
+        self.requests.refill(now)
+        self.tokens.refill(now)
+
+    def eta(self, position):
+        """Sıranın `position`. elemanının (0 = en önde) kovalardan pay alabilmesine kalan tahmini süre."""
+        ahead = list(self.queue)[:position + 1]
+        return max(self.requests.deficit_seconds(len(ahead)),
+                   self.tokens.deficit_seconds(sum(ticket.tokens for ticket in ahead)))
+
+
+class RateLimiter:
+    """Gemini çağrıları için süreç genelinde istek/token bütçesi.
+
+    Her (API anahtarı, model) için iki token kovası (rpm, tpm) tutulur. Çağıranlar adil bir FIFO
+    sırasında bekler: sıranın başındaki istek kovalarda yer açılınca geçer, arkadakiler sıralarını ve
+    tahmini bekleme sürelerini `on_wait(konum, sn)` ile öğrenir. Böylece aynı anda gelen özet istekleri
+    kotayı birlikte tüketip hep beraber 429 almak yerine sırayla geçer.
+    """
+
+    def __init__(self, limits=None, max_wait=RATE_LIMIT_MAX_WAIT_SECONDS):
+        self._limits = limits
+        self.max_wait = max_wait
+        self._cond = threading.Condition()
+        self._lanes = {}
+
+    @property
+    def limits(self):
+        # Sınırlar ilk kullanımda okunur: Streamlit secrets ortam değişkenlerine modül yüklendikten sonra yansır
+        if self._limits is None:
+            self._limits = load_limits()
+        return self._limits
+
+    def limits_for(self, key_id, model):
+        """(rpm, tpm): anahtar ve modele özel değerler genel olanları ezer."""
+        merged = {}
+        for key in ("*", key_id):
+            for name in ("*", model):
+                merged.update(self.limits.get(key, {}).get(name, {}))
+        return merged.get("rpm", 15), merged.get("tpm", 1000000)
+
+    def _lane(self, key_id, model):
+        lane = self._lanes.get((key_id, model))
+        if lane is None:
+            lane = self._lanes[(key_id, model)] = _Lane(*self.limits_for(key_id, model))
+        return lane
+
+    def estimate(self, key_id, model, tokens=0):
+        """Şimdi sıraya girecek bir isteğin tahmini bekleme süresi (sn)."""
+        with self._cond:
+            lane = self._lane(key_id, model)
+            lane.refill(time.monotonic())
+            lane.queue.append(_Ticket(tokens))
+            try:
+                return lane.eta(len(lane.queue) - 1)
+            finally:
+                lane.queue.pop()
+
+    def acquire(self, key_id, model, tokens=0, on_wait=None, cancel=None):
+        """Sıra gelip kovalarda yer açılana kadar bekler; beklenen süreyi (sn) döner.
+
+        on_wait(konum, tahmini sn) beklerken düzenli aralıklarla, bitince (0, 0) ile çağrılır. `cancel`
+        (threading.Event) beklerken kurulursa sıradaki yer bırakılır ve RateLimitCancelled fırlatılır.
+        """
+        ticket = _Ticket(tokens)
+        started = time.monotonic()
+        waited = False
+        with self._cond:
+            lane = self._lane(key_id, model)
+            lane.queue.append(ticket)
+        try:
+            while True:
+                with self._cond:
+                    if cancel is not None and cancel.is_set():
+                        raise RateLimitCancelled(f"{model} isteği sırada beklerken iptal edildi.")
+                    now = time.monotonic()
+                    lane.refill(now)
+                    position = lane.queue.index(ticket)
+                    if position == 0 and lane.eta(0) <= 0:
+                        lane.requests.level -= 1
+                        lane.tokens.level -= min(tokens, lane.tokens.capacity)
+                        return now - started
+                    eta = lane.eta(position)
+                    if now - started + eta > self.max_wait:
+                        raise RateLimitTimeout(f"429 {model} kuyruğunda tahmini bekleme {eta:.0f} sn; sınır {self.max_wait:.0f} sn.")
+                    self._cond.wait(min(max(lane.eta(0), 0.05), RATE_LIMIT_REPORT_SECONDS))
+                if on_wait:
+                    waited = True
+                    on_wait(position + 1, eta)
+        finally:
+            with self._cond:
+                lane.queue.remove(ticket)
+                self._cond.notify_all()
+            if waited:
+                on_wait(0, 0)
+
+    def release(self, key_id, model, tokens=0):
+        """acquire ile alınmış ama kullanılmayan hakkı (istek gönderilmediyse) kovalara geri koyar."""
+        with self._cond:
+            lane = self._lane(key_id, model)
+            lane.refill(time.monotonic())
+            lane.requests.level = min(lane.requests.capacity, lane.requests.level + 1)
+            lane.tokens.level = min(lane.tokens.capacity, lane.tokens.level + min(tokens, lane.tokens.capacity))
+            self._cond.notify_all()
+
+    def snapshot(self, key_id, model):
+        """(kuyruktaki istek sayısı, kovada kalan istek hakkı)"""
+        with self._cond:
+            lane = self._lanes.get((key_id, model))
+            if lane is None:
+                return 0, self.limits_for(key_id, model)[0]
+            lane.refill(time.monotonic())
+            return len(lane.queue), int(lane.requests.level)
+
+
+# Süreç genelinde tek örnek (tüm oturumlar ve arka plan işleri aynı kotayı paylaşır)
+rate_limiter = RateLimiter()
@@ -0,0 +1,295 @@
+import os
+import re
+import threading
+import time
+from datetime import datetime
+from html import escape
+
+from highlighter import fold
+from storage import open_db
+from summary_cache import text_hash
+
+# Altyazılar bu uzunluktaki zaman pencereleri halinde indekslenir (sonuçlar videonun o anına bağlanır)
+SEARCH_PASSAGE_SECONDS = float(os.getenv("SEARCH_PASSAGE_SECONDS", "60"))
+SEARCH_RESULT_LIMIT = 50
+SNIPPET_CHARS = 240
+
+# Varlık bölümleri: anahtar -> (etiket, katlanmış anahtar kelimeler). Özet başlıkları ve altyazı pencereleri
+# bu kelimelere göre etiketlenir; 3 harf ve altı kelimeler tam kelime, diğerleri ek alabilir ("altının").
+SECTIONS = {
+    "genel": ("🌍 Genel Piyasa", ["genel piyasa", "enflasyon", "faiz", "merkez bankasi", "fed", "resesyon"]),
+    "altin": ("🟡 Altın & Gümüş", ["altin", "gumus", "ons", "xau"]),
+    "kripto": ("🪙 Kripto", ["kripto", "bitcoin", "btc", "ethereum", "eth", "altcoin"]),
+    "bist": ("📈 BIST", ["borsa istanbul", "bist", "hisse"]),
+    "abd": ("🇺🇸 ABD Borsaları", ["abd borsa", "nasdaq", "s&p", "dow jones", "spx"]),
+    "doviz": ("💵 Döviz", ["doviz", "dolar", "euro", "avro", "kur"]),
+}
+
+# Türkçe harfleri ASCII karşılığına indirir; uzunluk korunur (eşleşme konumları orijinal metne uyar)
+TURKISH_ASCII = str.maketrans("şğçöüâîûŞĞÇÖÜÂÎÛ", "sgcouaiuSGCOUAIU")
+QUERY_TOKEN = re.compile(r"\w+")
+# Özel ada gelen ek kesme işaretinden sonra yazılır ("altın'ın", "BIST'te"); ek aramaya katılmaz
+QUERY_SUFFIX = re.compile(r"['’]\w*")
+# Alıntı st.markdown ile gösterilir: Markdown (ve $ ile LaTeX) işaretleri metin olarak kalmalı
+MARKDOWN_SPECIAL = re.compile(r"([\\`*_{}\[\]()#+\-.!|~$])")
+
+
+def search_fold(text):
+    """Arama için katlama: İ/I/ı -> i, Türkçe aksanlar atılır, küçük harf."""
+    return fold(text.translate(TURKISH_ASCII))
+
+
+def _keyword_pattern(words):
+    parts = [re.escape(word) + (r"(?!\w)" if len(word) <= 3 else "") for word in words]
+    return re.compile(r"(?<!\w)(?:" + "|".join(parts) + ")")
+
+
+SECTION_PATTERNS = {key: _keyword_pattern(words) for key, (_, words) in SECTIONS.items()}
+
+
+def tag_sections(folded):
+    """Katlanmış metinde geçen varlık bölümlerinin anahtarları."""
+    return [key for key, pattern in SECTION_PATTERNS.items() if pattern.search(folded)]
+
+
+def normalize_date(value):
+    """"18.10.2026", "18.10.2026 14:30", "20261018" veya "2026-10-18" -> "2026-10-18"; okunamazsa None."""
+    if not value:
+        return None
+    for pattern in ("%d.%m.%Y %H:%M", "%d.%m.%Y", "%Y%m%d", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(value, pattern).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    return None
+
+
+def summary_sections(summary):
+    """Özeti "###" başlıklarına göre [(bölüm anahtarı, metin)] parçalarına ayırır; boş bölümler atlanır."""
+    result = []
+    for block in re.split(r"(?m)^###\s*", summary):
+        header, _, body = block.partition("\n")
+        body = body.strip()
+        if not body or search_fold(body).strip("-. ") == "yorum yok":
+            continue
+        sections = tag_sections(search_fold(header))
+        result.append((sections[0] if sections else "genel", f"{header.strip()}\n{body}"))
+    return result
+
+
+def fts_query(text):
+    """Kullanıcı sorgusunu FTS5 sorgusuna çevirir: her kelime ön ek olarak aranır ("altın" -> altini, altinda)."""
+    tokens = QUERY_TOKEN.findall(search_fold(QUERY_SUFFIX.sub("", text)))
+    return " ".join(f'"{token}"*' for token in tokens), tokens
+
+
+def escape_text(text):
+    """Metni st.markdown(unsafe_allow_html=True) içinde olduğu gibi görünecek hale getirir."""
+    return escape(MARKDOWN_SPECIAL.sub(r"\\\1", text))
+
+
+def snippet(text, tokens, size=SNIPPET_CHARS):
+    """Eşleşen ilk kelimenin çevresinden kısa bir alıntı (HTML ve Markdown kaçışlı); eşleşmeler <mark> ile işaretlenir."""
+    folded = search_fold(text)
+    pattern = re.compile(r"(?<!\w)(?:" + "|".join(map(re.escape, tokens)) + r")\w*") if tokens else None
+    match = pattern.search(folded) if pattern else None
+    start = max(0, match.start() - size // 3) if match else 0
+    if start:
+        # Alıntı kelime ortasından başlamasın
+        start = min(text.find(" ", start) + 1 or start, match.start())
+    end = min(len(text), start + size)
+    parts, last = [], start
+    for m in pattern.finditer(folded, start, end) if pattern else []:
+        parts += [escape_text(text[last:m.start()]), "<mark>", escape_text(text[m.start():m.end()]), "</mark>"]
+        last = m.end()
+    parts.append(escape_text(text[last:end]))
+    return ("…" if start else "") + "".join(parts) + ("…" if end < len(text) else "")
+
+
+class SearchIndex:
+    """Altyazı ve özetler için yerel tam metin arama indeksi (SQLite FTS5).
+
+    Metinler Türkçe duyarlı katlanmış halde (İ/ı, ş/ğ/ç/ö/ü) indekslenir; görüntülenen metin ayrı
+    saklanır. Altyazılar zaman pencerelerine, özetler varlık bölümlerine ayrılır ve her parça varlık
+    etiketleriyle işaretlenir. Ekleme artımlıdır: aynı video/özet ikinci kez indekslenmez.
+    """
+
+    def __init__(self, filename="search.db"):
+        self._lock = threading.Lock()
+        self._conn = open_db(filename)
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS videos (
+                    video_id TEXT PRIMARY KEY,
+                    title TEXT,
+                    channel TEXT,
+                    published TEXT,
+                    url TEXT,
+                    transcript_digest TEXT,
+                    summary_digest TEXT,
+                    indexed_at REAL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_videos_transcript ON videos(transcript_digest)")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS passages (
+                    id INTEGER PRIMARY KEY,
+                    video_id TEXT,
+                    kind TEXT,
+                    start_ms INTEGER,
+                    sections TEXT,
+                    text TEXT
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_passages_video ON passages(video_id, kind)")
+            # Katlanmış metin sadece indekste (içeriksiz FTS); görüntülenecek metin passages'ta
+            self._conn.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS passages_fts USING fts5(
+                    body, sections, content='', tokenize='unicode61 remove_diacritics 2'
+                )
+            """)
+
+    def annotate(self, video_id, title=None, channel=None, published=None, url=None, overwrite=True):
+        """Video bilgilerini ekler/günceller; verilmeyen alanlar korunur.
+
+        overwrite=False ise sadece boş alanlar doldurulur (kanal listesindeki adlar yt-dlp'ninkilerle ezilmesin).
+        """
+        if not video_id:
+            return
+        columns = ("title", "channel", "published", "url")
+        updates = ", ".join(
+            f"{column} = COALESCE(excluded.{column}, {column})" if overwrite else f"{column} = COALESCE({column}, excluded.{column})"
+            for column in columns
+        )
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT INTO videos (video_id, {', '.join(columns)}) VALUES (?, ?, ?, ?, ?) "
+                f"ON CONFLICT(video_id) DO UPDATE SET {updates}",
+                (video_id, title, channel, normalize_date(published), url),
+            )
+
+    def _replace(self, video_id, kind, passages):
+        """Videonun `kind` türündeki parçalarını yenileriyle değiştirir (kilit ve işlem çağıranda)."""
+        old = self._conn.execute(
+            "SELECT id, sections, text FROM passages WHERE video_id = ? AND kind = ?", (video_id, kind)
+        ).fetchall()
+        for rowid, sections, text in old:
+            # İçeriksiz FTS tablosundan silmek için indekslenen değerlerin aynısı verilmeli
+            self._conn.execute(
+                "INSERT INTO passages_fts (passages_fts, rowid, body, sections) VALUES ('delete', ?, ?, ?)",
+                (rowid, search_fold(text), sections),
+            )
+        self._conn.execute("DELETE FROM passages WHERE video_id = ? AND kind = ?", (video_id, kind))
+        for start_ms, text in passages:
+            folded = search_fold(text)
+            sections = " ".join(tag_sections(folded))
+            cursor = self._conn.execute(
+                "INSERT INTO passages (video_id, kind, start_ms, sections, text) VALUES (?, ?, ?, ?, ?)",
+                (video_id, kind, start_ms, sections, text),
+            )
+            self._conn.execute(
+                "INSERT INTO passages_fts (rowid, body, sections) VALUES (?, ?, ?)",
+                (cursor.lastrowid, folded, sections),
+            )
+
+    def ingest_transcript(self, video_id, transcript, **meta):
+        """Altyazıyı zaman pencereleri halinde indeksler; aynı metin zaten indeksliyse sadece bilgileri günceller."""
+        if not video_id or not transcript:
+            return False
+        self.annotate(video_id, overwrite=False, **meta)
+        digest = text_hash(transcript.text)
+        with self._lock:
+            row = self._conn.execute("SELECT transcript_digest FROM videos WHERE video_id = ?", (video_id,)).fetchone()
+            if row and row[0] == digest:
+                return False
+            windows = transcript.windows(SEARCH_PASSAGE_SECONDS) if len(transcript) else [(0, 0, transcript.text)]
+            with self._conn:
+                self._replace(video_id, "transcript", [(start_ms, text) for start_ms, _, text in windows])
+                self._conn.execute(
+                    "UPDATE videos SET transcript_digest = ?, indexed_at = ? WHERE video_id = ?",
+                    (digest, time.time(), video_id),
+                )
+        return True
+
+    def ingest_summary(self, transcript_digest, summary):
+        """Özeti, altyazısı indeksli videoya bağlayıp bölüm bölüm indeksler; video bilinmiyorsa atlar."""
+        digest = text_hash(summary)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT video_id, summary_digest FROM videos WHERE transcript_digest = ?", (transcript_digest,)
+            ).fetchone()
+            if not row or row[1] == digest:
+                return False
+            with self._conn:
+                self._replace(row[0], "summary", [(None, text) for _, text in summary_sections(summary)])
+                self._conn.execute("UPDATE videos SET summary_digest = ? WHERE video_id = ?", (digest, row[0]))
+        return True
+
+    def video_for_digest(self, transcript_digest):
+        """Altyazı özeti bu olan videonun {'video_id', 'channel', 'published'} bilgileri; bilinmiyorsa None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT video_id, channel, published FROM videos WHERE transcript_digest = ?", (transcript_digest,)
+            ).fetchone()
+        return dict(zip(("video_id", "channel", "published"), row)) if row else None
+
+    def channels(self):
+        with self._lock:
+            return [row[0] for row in self._conn.execute(
+                "SELECT DISTINCT channel FROM videos WHERE channel IS NOT NULL ORDER BY channel"
+            )]
+
+    def stats(self):
+        """(indeksli video, parça) sayıları."""
+        with self._lock:
+            videos = self._conn.execute("SELECT COUNT(*) FROM videos WHERE transcript_digest IS NOT NULL").fetchone()[0]
+            passages = self._conn.execute("SELECT COUNT(*) FROM passages").fetchone()[0]
+        return videos, passages
+
+    def search(self, query, channels=None, date_from=None, date_to=None, section=None, kind=None, limit=SEARCH_RESULT_LIMIT):
+        """Sorguya en uygun parçaları (BM25) filtrelerle döner: [{'video_id', 'title', 'channel', ...}]."""
+        match, tokens = fts_query(query)
+        # Sorgu kelimeleri sadece metinde, bölüm anahtarı sadece etiketlerde aranır
+        terms = [f"body : ({match})"] if match else []
+        if section in SECTIONS:
+            terms.append(f"sections : {section}")
+        if not terms:
+            return []
+        match = " AND ".join(terms)
+        sql = """
+            SELECT p.video_id, p.kind, p.start_ms, p.sections, p.text, v.title, v.channel, v.published, v.url
+            FROM passages_fts f
+            JOIN passages p ON p.id = f.rowid
+            JOIN videos v ON v.video_id = p.video_id
+            WHERE passages_fts MATCH ?
+        """
+        params = [match]
+        if channels:
+            sql += f" AND v.channel IN ({', '.join('?' * len(channels))})"
+            params += list(channels)
+        if date_from:
+            sql += " AND v.published >= ?"
+            params.append(normalize_date(date_from))
+        if date_to:
+            sql += " AND v.published <= ?"
+            params.append(normalize_date(date_to))
+        if kind:
+            sql += " AND p.kind = ?"
+            params.append(kind)
+        sql += " ORDER BY f.rank LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [
+            {
+                "video_id": video_id, "kind": kind, "start_ms": start_ms, "sections": sections.split(),
+                "title": title, "channel": channel, "published": published,
+                "url": url or f"https://www.youtube.com/watch?v={video_id}",
+                "snippet": snippet(text, tokens),
+            }
+            for video_id, kind, start_ms, sections, text, title, channel, published, url in rows
+        ]
+
+
+# Süreç genelinde tek örnek
+search_index = SearchIndex()
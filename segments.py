@@ -0,0 +1,108 @@
+import struct
+import zlib
+from array import array
+from bisect import bisect_right
+
+
+class Transcript:
+    """Zaman damgalı altyazı: paralel başlangıç/süre dizileri ve tek bir birleşik metin.
+
+    Her altyazı satırı için ayrı sözlük tutmak yerine başlangıç (ms), süre (ms) ve metin içindeki bitiş
+    konumu sıkıştırılmış `array` dizilerinde saklanır; metnin kendisi tek bir string'dir. i. satırın metni
+    `text[ends[i-1] + 1 : ends[i]]` aralığıdır (satırlar tek boşlukla ayrılır). Düz metin `.text`'tir.
+    """
+
+    __slots__ = ("text", "starts", "durations", "ends")
+
+    def __init__(self, text="", starts=None, durations=None, ends=None):
+        self.text = text
+        self.starts = starts if starts is not None else array("i")
+        self.durations = durations if durations is not None else array("i")
+        self.ends = ends if ends is not None else array("i")
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __bool__(self):
+        return bool(self.text)
+
+    def __iter__(self):
+        for i in range(len(self.starts)):
+            yield self.segment(i)
+
+    def offset(self, i):
+        """i. satırın metin içindeki başlangıç konumu."""
+        return self.ends[i - 1] + 1 if i > 0 else 0
+
+    def segment(self, i):
+        """(başlangıç ms, süre ms, metin)"""
+        return self.starts[i], self.durations[i], self.text[self.offset(i):self.ends[i]]
+
+    def index_at(self, ms):
+        """Verilen andaki (ms) satırın sırası."""
+        return max(0, bisect_right(self.starts, ms) - 1)
+
+    def windows(self, seconds):
+        """Metni yaklaşık `seconds` uzunluğundaki zaman pencerelerine böler: [(başlangıç ms, bitiş ms, metin)]."""
+        result = []
+        if not self.starts:
+            return result
+        window_ms = int(seconds * 1000)
+        first = 0
+        for i in range(1, len(self.starts) + 1):
+            if i == len(self.starts) or self.starts[i] - self.starts[first] >= window_ms:
+                last = i - 1
+                end_ms = self.starts[last] + self.durations[last]
+                result.append((self.starts[first], end_ms, self.text[self.offset(first):self.ends[last]]))
+                first = i
+        return result
+
+    def to_bytes(self):
+        """Zaman dizilerini (metin hariç) sıkıştırılmış olarak serileştirir; metin ayrıca saklanır."""
+        raw = struct.pack("<I", len(self.starts))
+        for values in (self.starts, self.durations, self.ends):
+            raw += array("i", values).tobytes()
+        return zlib.compress(raw, 6)
+
+    @classmethod
+    def from_bytes(cls, text, data):
+        raw = zlib.decompress(data)
+        (count,) = struct.unpack_from("<I", raw)
+        size = count * 4
+        columns = []
+        for k in range(3):
+            values = array("i")
+            values.frombytes(raw[4 + k * size:4 + (k + 1) * size])
+            columns.append(values)
+        return cls(text, *columns)
+
+    @classmethod
+    def from_text(cls, text):
+        """Zaman bilgisi olmayan düz metni tek satırlık bir transcript'e çevirir."""
+        builder = TranscriptBuilder()
+        builder.add(0, 0, text)
+        return builder.build()
+
+
+class TranscriptBuilder:
+    """Transcript'i satır satır oluşturur; metin parçaları listede toplanıp en sonda bir kez birleştirilir."""
+
+    def __init__(self):
+        self.parts = []
+        self.starts = array("i")
+        self.durations = array("i")
+        self.ends = array("i")
+        self.length = -1
+
+    def add(self, start_ms, duration_ms, text):
+        """Temizlenmiş (boşlukları sadeleştirilmiş) bir satır ekler; boş satırlar atlanır."""
+        if not text:
+            return
+        self.length += len(text) + 1
+        self.parts.append(text)
+        self.starts.append(int(start_ms))
+        self.durations.append(int(duration_ms))
+        self.ends.append(self.length)
+
+    def build(self):
+        return Transcript(" ".join(self.parts), self.starts, self.durations, self.ends)
@@ -0,0 +1,62 @@
+import threading
+
+from metrics import metrics
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "abandoned")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.abandoned = False
+
+
+class SingleFlight:
+    """Aynı anahtarla eşzamanlı gelen çağrıları tek çalıştırmada birleştirir.
+
+    İlk çağıran işi yapar, o sürerken aynı anahtarla gelenler onun sonucunu bekler. Sonuç saklanmaz:
+    iş bitince anahtar serbest kalır. Hata bütün bekleyenlere aynen iletilir ve bir sonraki çağrıda
+    yeniden denenir. İlk çağıranın oturumu kapanır/yeniden çalışırsa (Streamlit'in BaseException tabanlı
+    durdurma istisnaları) bekleyenlerden biri işi devralır.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, func):
+        """func()'u anahtar başına en fazla bir kez eşzamanlı çalıştırır; (sonuç, paylaşıldı mı) döner."""
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                leader = call is None
+                if leader:
+                    call = self._calls[key] = _Call()
+
+            if leader:
+                metrics.inc("singleflight", flight=self.name, role="leader")
+                try:
+                    call.result = func()
+                    return call.result, False
+                except Exception as e:
+                    call.error = e
+                    raise
+                except BaseException:
+                    call.abandoned = True
+                    raise
+                finally:
+                    with self._lock:
+                        del self._calls[key]
+                    call.done.set()
+
+            call.done.wait()
+            if call.abandoned:
+                continue
+            metrics.inc("singleflight", flight=self.name, role="shared")
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
@@ -0,0 +1,382 @@
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from search_index import SECTIONS, search_fold
+from storage import data_path
+
+# Yapılandırılmış görüşler: DATA_DIR/stances/records/date=YYYY-MM-DD/part.parquet (yayın tarihine göre bölümlü),
+# konuşmacı/varlık başına birikimli toplamlar aggregates.parquet'te, isabet değerlendirmeleri evaluated.parquet'te.
+STANCE_DIR = "stances"
+# Konuşmacının güncel görüşü: her yeni kayıtta üstel ortalama (EWMA) bu katsayıyla güncellenir
+STANCE_EWMA_ALPHA = float(os.getenv("STANCE_EWMA_ALPHA", "0.3"))
+# Vade belirtilmemişse isabet bu kadar gün sonra ölçülür
+STANCE_DEFAULT_HORIZON_DAYS = int(os.getenv("STANCE_DEFAULT_HORIZON_DAYS", "30"))
+
+# Özet promptlarının sonuna eklenir; model özetin ardından tek bir JSON bloğu yazar
+STANCE_INSTRUCTIONS = """
+Özetin EN SONUNA, konuşmacının açıkça yön belirttiği her varlık için tek bir ```json kod bloğu ekle:
+```json
+{"stances": [{"asset": "altin", "direction": "yükseliş", "targets": [3100, 3250], "timeframe": "1 ay"}]}
+```
+- asset: genel, altin, kripto, bist, abd, doviz
+- direction: yükseliş, düşüş veya yatay
+- targets: konuşmacının verdiği fiyat/endeks seviyeleri (yoksa [])
+- timeframe: konuşmacının verdiği vade, örn. "1 hafta", "yıl sonu" (yoksa "")
+Yön belirtilmeyen varlıkları ekleme.
+"""
+
+STANCE_BLOCK = re.compile(r"```json\s*(.*?)(?:```|$)", re.DOTALL)
+STANCE_FENCE = "```json"
+
+DIRECTIONS = {
+    1: ("yukselis", "yukari", "artis", "alim", "pozitif", "boga", "up"),
+    -1: ("dusus", "asagi", "gerileme", "satis", "negatif", "ayi", "down"),
+    0: ("yatay", "notr", "flat"),
+}
+DIRECTION_LABELS = {1: "⬆️ Yükseliş", -1: "⬇️ Düşüş", 0: "➡️ Yatay"}
+TIMEFRAME_UNITS = {"gun": 1, "hafta": 7, "ay": 30, "yil": 365}
+TIMEFRAME_WORDS = {"kisa": 14, "orta": 90, "uzun": 365, "yil sonu": 180, "yilsonu": 180}
+TIMEFRAME_PATTERN = re.compile(r"(?<!\w)(\d+)?\s*(gun|hafta|ay|yil)(?!\s*sonu)")
+THOUSANDS = re.compile(r"\d{1,3}(?:\.\d{3})+")
+
+RECORD_COLUMNS = ["video_id", "channel", "published", "asset", "direction", "target_low", "target_high",
+                  "timeframe", "horizon_days", "recorded_at"]
+COUNT_COLUMNS = ["records", "up", "down", "flat", "evaluated", "hits"]
+AGGREGATE_COLUMNS = ["records", "up", "down", "flat", "ewma", "last_published", "evaluated", "hits"]
+
+
+def parse_direction(value):
+    folded = search_fold(str(value or ""))
+    for direction, words in DIRECTIONS.items():
+        if any(word in folded for word in words):
+            return direction
+    return None
+
+
+def parse_level(value):
+    """Hedef seviyesi: 3100, "3.100" (binlik nokta), "2,45" (ondalık virgül); okunamazsa None."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value).strip().replace(" ", "")
+    if "," in text or THOUSANDS.fullmatch(text):
+        text = text.replace(".", "").replace(",", ".")
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+def horizon_days(timeframe):
+    """"3 ay" -> 90, "1 hafta" -> 7, "kısa vade" -> 14; anlaşılamazsa varsayılan."""
+    folded = search_fold(timeframe or "")
+    match = TIMEFRAME_PATTERN.search(folded)
+    if match:
+        return int(match.group(1) or 1) * TIMEFRAME_UNITS[match.group(2)]
+    for word, days in TIMEFRAME_WORDS.items():
+        if word in folded:
+            return days
+    return STANCE_DEFAULT_HORIZON_DAYS
+
+
+def split_stances(text):
+    """Model çıktısını (markdown özet, [görüş sözlükleri]) olarak ayırır; JSON okunamazsa görüş listesi boştur."""
+    position = text.rfind(STANCE_FENCE)
+    if position < 0:
+        return text, []
+    summary, block = text[:position].rstrip(), text[position:]
+    stances = []
+    match = STANCE_BLOCK.search(block)
+    try:
+        data = json.loads(match.group(1)) if match else {}
+        items = data.get("stances", []) if isinstance(data, dict) else data
+    except ValueError:
+        items = []
+    for item in items if isinstance(items, list) else []:
+        if not isinstance(item, dict):
+            continue
+        asset = search_fold(str(item.get("asset", ""))).strip()
+        direction = parse_direction(item.get("direction"))
+        if asset not in SECTIONS or direction is None:
+            continue
+        targets = [level for level in map(parse_level, item.get("targets") or []) if level is not None]
+        stances.append({
+            "asset": asset,
+            "direction": direction,
+            "targets": targets,
+            "timeframe": str(item.get("timeframe") or ""),
+        })
+    return summary, stances
+
+
+class StanceStreamFilter:
+    """Akışta JSON bloğunu kullanıcıya göstermez: işaret ("```json") gelene kadar metni iletir.
+
+    İşaret iki parçaya bölünebileceği için son birkaç karakter bir sonraki parçaya kadar bekletilir; akış
+    bitince flush() ile bekletilen kuyruk iletilir.
+    """
+
+    def __init__(self, on_text):
+        self.on_text = on_text
+        self.pending = ""
+        self.stopped = False
+
+    def __call__(self, piece):
+        if self.stopped:
+            return
+        text = self.pending + piece
+        position = text.find(STANCE_FENCE)
+        if position >= 0:
+            self.stopped = True
+            if position:
+                self.on_text(text[:position])
+            return
+        keep = len(STANCE_FENCE) - 1
+        self.pending = text[-keep:]
+        if text[:-keep]:
+            self.on_text(text[:-keep])
+
+    def flush(self):
+        """Akış bitti: işaret gelmediyse bekletilen son karakterleri iletir."""
+        if not self.stopped and self.pending:
+            self.on_text(self.pending)
+        self.pending = ""
+
+
+def stance_rows(stances):
+    """Arayüz tablosu için görüş satırları."""
+    return [
+        {
+            "Varlık": SECTIONS[stance["asset"]][0],
+            "Yön": DIRECTION_LABELS[stance["direction"]],
+            "Hedefler": ", ".join(f"{target:,.2f}".rstrip("0").rstrip(".") for target in stance["targets"]),
+            "Vade": stance["timeframe"],
+        }
+        for stance in stances
+    ]
+
+
+class StanceStore:
+    """Konuşmacı/varlık görüşlerinin sütunlu (Parquet) geçmişi ve birikimli toplamları.
+
+    Kayıtlar yayın tarihine göre günlük bölümlere yazılır; bir video bir kez kaydedilir. Her yeni
+    kayıtta konuşmacı/varlık toplamları (sayılar, EWMA görüş, isabet) geçmiş yeniden okunmadan
+    güncellenir. Trend görünümü tüm sütunları bir kez okuyup pandas ile vektörel hesaplar; sonuç
+    toplamlar dosyası değişene kadar (yeni kayıt ya da değerlendirme) bellekte tutulur.
+    """
+
+    def __init__(self, directory=STANCE_DIR, alpha=STANCE_EWMA_ALPHA):
+        self.root = data_path(directory)
+        self.records_root = os.path.join(self.root, "records")
+        os.makedirs(self.records_root, exist_ok=True)
+        self.alpha = alpha
+        self._lock = threading.Lock()
+        self._recorded = None
+        # (toplamların sürümü, pencere, (tablo, kayan görüş))
+        self._trend = None
+
+    def _path(self, name):
+        return os.path.join(self.root, name)
+
+    @staticmethod
+    def _write(frame, path):
+        # Yarım yazılmış dosya okunmasın: önce gizli geçici dosya (Parquet okuyucusu atlar), sonra atomik değiştirme
+        directory, name = os.path.split(path)
+        os.makedirs(directory, exist_ok=True)
+        tmp = os.path.join(directory, f".{name}.tmp")
+        frame.to_parquet(tmp, index=False)
+        os.replace(tmp, path)
+
+    def _read(self, name, columns=None):
+        path = self._path(name)
+        return pd.read_parquet(path, columns=columns) if os.path.exists(path) else None
+
+    def records(self, columns=None):
+        """Tüm kayıtlar (bölüm sütunu `date` dahil); hiç kayıt yoksa boş DataFrame."""
+        if not any(entry.startswith("date=") for entry in os.listdir(self.records_root)):
+            return pd.DataFrame(columns=RECORD_COLUMNS + ["date"])
+        return pd.read_parquet(self.records_root, columns=columns)
+
+    def recorded(self, video_id):
+        with self._lock:
+            if self._recorded is None:
+                self._recorded = set(self.records(columns=["video_id"])["video_id"])
+            return video_id in self._recorded
+
+    def aggregates(self):
+        frame = self._read("aggregates.parquet")
+        if frame is None:
+            return pd.DataFrame(columns=["channel", "asset"] + AGGREGATE_COLUMNS)
+        return frame
+
+    def append(self, video_id, channel, published, stances):
+        """Videonun görüşlerini kaydeder ve toplamları günceller; video zaten kayıtlıysa False."""
+        if not stances or self.recorded(video_id):
+            return False
+        published = published or datetime.now().strftime("%Y-%m-%d")
+        now = time.time()
+        new = pd.DataFrame([
+            {
+                "video_id": video_id,
+                "channel": channel or "Bilinmeyen",
+                "published": published,
+                "asset": stance["asset"],
+                "direction": stance["direction"],
+                "target_low": min(stance["targets"]) if stance["targets"] else np.nan,
+                "target_high": max(stance["targets"]) if stance["targets"] else np.nan,
+                "timeframe": stance["timeframe"],
+                "horizon_days": horizon_days(stance["timeframe"]),
+                "recorded_at": now,
+            }
+            for stance in stances
+        ], columns=RECORD_COLUMNS).astype({"direction": "int8", "horizon_days": "int16"})
+
+        with self._lock:
+            # Aynı video iki oturumdan aynı anda gelmiş olabilir
+            if video_id in self._recorded:
+                return False
+            partition = os.path.join(self.records_root, f"date={published}", "part.parquet")
+            if os.path.exists(partition):
+                day = pd.read_parquet(partition)
+                new_day = pd.concat([day, new], ignore_index=True)
+            else:
+                new_day = new
+            self._write(new_day, partition)
+            self._update_aggregates(new)
+            self._recorded.add(video_id)
+        return True
+
+    def _update_aggregates(self, new):
+        """Yeni kayıtları konuşmacı/varlık toplamlarına ekler (kilit çağıranda)."""
+        aggregates = self.aggregates().set_index(["channel", "asset"])
+        counts = new.assign(
+            records=1,
+            up=(new["direction"] == 1).astype(int),
+            down=(new["direction"] == -1).astype(int),
+            flat=(new["direction"] == 0).astype(int),
+        ).groupby(["channel", "asset"])[["records", "up", "down", "flat"]].sum()
+        aggregates = aggregates.reindex(aggregates.index.union(counts.index))
+        aggregates[["records", "up", "down", "flat"]] = aggregates[["records", "up", "down", "flat"]].fillna(0).add(counts, fill_value=0)
+        aggregates[["evaluated", "hits"]] = aggregates[["evaluated", "hits"]].fillna(0)
+
+        # EWMA: aynı grupta yeni gelen k kayıt, eski değeri (1-a)^k ile söndürür
+        for key, group in new.sort_values("published").groupby(["channel", "asset"]):
+            ewma = aggregates.at[key, "ewma"]
+            for direction in group["direction"]:
+                ewma = float(direction) if pd.isna(ewma) else self.alpha * direction + (1 - self.alpha) * ewma
+            aggregates.at[key, "ewma"] = ewma
+            last = aggregates.at[key, "last_published"]
+            aggregates.at[key, "last_published"] = max(group["published"].max(), last) if isinstance(last, str) else group["published"].max()
+        aggregates[COUNT_COLUMNS] = aggregates[COUNT_COLUMNS].astype("int64")
+        self._write(aggregates.reset_index(), self._path("aggregates.parquet"))
+
+    def evaluate(self, prices):
+        """Vadesi dolmuş ve henüz değerlendirilmemiş görüşlerin isabetini fiyat geçmişiyle ölçer.
+
+        prices: tarih indeksli, sütunları varlık anahtarları (altin, doviz, ...) olan kapanış fiyatları.
+        Sadece yeni değerlendirmeler hesaplanır ve toplamlara eklenir; değerlendirilen kayıt sayısını döner.
+        """
+        records = self.records()
+        if records.empty or prices is None or prices.empty:
+            return 0
+        with self._lock:
+            evaluated = self._read("evaluated.parquet")
+            records = records[records["direction"] != 0]
+            if evaluated is not None:
+                done = pd.MultiIndex.from_frame(evaluated[["video_id", "asset"]])
+                records = records[~pd.MultiIndex.from_frame(records[["video_id", "asset"]]).isin(done)]
+            records = records[records["asset"].isin(prices.columns)]
+
+            start = pd.to_datetime(records["published"])
+            end = start + pd.to_timedelta(records["horizon_days"].astype(int), unit="D")
+            due = end <= prices.index.max()
+            records, start, end = records[due], start[due], end[due]
+            if records.empty:
+                return 0
+
+            # Başlangıç ve vade tarihindeki (ya da öncesindeki son) kapanış: varlık başına sıralı arama
+            closes = prices.sort_index().ffill()
+            start_price = np.full(len(records), np.nan)
+            end_price = np.full(len(records), np.nan)
+            assets = records["asset"].to_numpy()
+            for asset in np.unique(assets):
+                mask = assets == asset
+                series = closes[asset]
+                index = series.index.to_numpy()
+                start_price[mask] = series.to_numpy()[np.clip(np.searchsorted(index, start[mask].to_numpy(), side="right") - 1, 0, None)]
+                end_price[mask] = series.to_numpy()[np.clip(np.searchsorted(index, end[mask].to_numpy(), side="right") - 1, 0, None)]
+
+            change = end_price / start_price - 1
+            valid = ~np.isnan(change)
+            result = pd.DataFrame({
+                "video_id": records["video_id"].to_numpy()[valid],
+                "asset": assets[valid],
+                "channel": records["channel"].to_numpy()[valid],
+                "change": change[valid],
+                "hit": np.sign(change[valid]) == records["direction"].to_numpy()[valid],
+                "evaluated_at": time.time(),
+            })
+            if result.empty:
+                return 0
+            self._write(pd.concat([evaluated, result], ignore_index=True) if evaluated is not None else result,
+                        self._path("evaluated.parquet"))
+
+            aggregates = self.aggregates().set_index(["channel", "asset"])
+            scores = result.assign(evaluated=1, hits=result["hit"].astype(int)).groupby(["channel", "asset"])[["evaluated", "hits"]].sum()
+            aggregates[["evaluated", "hits"]] = aggregates[["evaluated", "hits"]].add(scores, fill_value=0).reindex(aggregates.index).fillna(0).astype("int64")
+            self._write(aggregates.reset_index(), self._path("aggregates.parquet"))
+        return len(result)
+
+    def version(self):
+        """Toplamlar dosyasının sürümü; her kayıt ve değerlendirme dosyayı yeniden yazar (başka süreçlerden de)."""
+        try:
+            stat = os.stat(self._path("aggregates.parquet"))
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def trend(self, window="90D"):
+        """(konuşmacı/varlık özet tablosu, zaman içinde kayan ortalama görüş) döner.
+
+        Özet tablo birikimli toplamlardan gelir; kayan görüş `window` penceresinde yön ortalamasıdır (-1..1).
+        Toplamlar değişmedikçe bölümler yeniden okunmaz; dönen tablolar oturumlar arasında paylaşılır, değiştirilmemelidir.
+        """
+        version = self.version()
+        with self._lock:
+            if self._trend is not None and self._trend[:2] == (version, window):
+                return self._trend[2]
+        result = self._compute_trend(window)
+        with self._lock:
+            self._trend = (version, window, result)
+        return result
+
+    def _compute_trend(self, window):
+        aggregates = self.aggregates()
+        table = aggregates.assign(
+            stance=aggregates["ewma"].astype(float).round(2),
+            up_ratio=(aggregates["up"] / aggregates["records"]).astype(float).round(2),
+            hit_rate=(aggregates["hits"] / aggregates["evaluated"].where(aggregates["evaluated"] > 0)).astype(float).round(2),
+        )
+
+        records = self.records(columns=["channel", "asset", "published", "direction"])
+        if records.empty:
+            return table, pd.DataFrame(columns=["channel", "asset", "published", "stance"])
+        records = records.assign(published=pd.to_datetime(records["published"]), direction=records["direction"].astype(float))
+        records = records.sort_values("published")
+        rolling = (
+            records.groupby(["channel", "asset"])
+            .rolling(window, on="published")["direction"].mean()
+            .rename("stance")
+            .reset_index()
+        )
+        return table, rolling
+
+
+# Süreç genelinde tek örnek
+stance_store = StanceStore()
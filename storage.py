@@ -0,0 +1,23 @@
+import os
+import sqlite3
+
+# Kalıcı verilerin (önbellekler, kayıtlar) tutulacağı klasör
+DATA_DIR = os.getenv(
+    "YOUTEKONOMI_DATA_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".youtekonomi")
+)
+
+
+def data_path(filename):
+    """Veri klasöründeki bir dosyanın tam yolunu döner (klasörü gerekirse oluşturur)."""
+    os.makedirs(DATA_DIR, exist_ok=True)
+    return os.path.join(DATA_DIR, filename)
+
+
+def open_db(filename):
+    """Veri klasöründe thread'ler arası paylaşılabilir bir SQLite bağlantısı açar."""
+    conn = sqlite3.connect(data_path(filename), timeout=30, check_same_thread=False)
+    # WAL: Birden fazla Streamlit süreci aynı dosyayı okurken yazma kilitlenmesin
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
@@ -0,0 +1,335 @@
+import hashlib
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import google.generativeai as genai
+
+from chunking import chunk_text, estimate_tokens
+from metrics import metrics
+from model_router import MODEL_HEDGE_AFTER_SECONDS, ModelCooldownError, ModelRouter
+from rate_limiter import RATE_LIMIT_REPORT_SECONDS, RateLimitTimeout
+from search_index import search_index
+from singleflight import SingleFlight
+from stances import STANCE_INSTRUCTIONS, StanceStreamFilter, split_stances, stance_store
+from summary_cache import summary_cache, text_hash
+
+# Denenecek modeller sırasıyla (En hızlı/ucuzdan -> pahalı/eskiye)
+# 'models/' öneki eklemek daha garantidir
+MODELS_TO_TRY = [
+    'models/gemini-1.5-flash', 
+    'models/gemini-1.5-pro', 
+    'models/gemini-2.5-pro-preview-03-25', # Kullanıcının özel modeli
+    'models/gemini-pro',
+    'models/gemini-1.0-pro'
+]
+
+# Model seçimi (katalog, 404/429 takibi, gecikmeye göre sıralama); süreç genelinde tek örnek
+model_router = ModelRouter(MODELS_TO_TRY)
+
+# Aynı metnin eşzamanlı özet istekleri tek Gemini çalıştırmasını paylaşır; süreç genelinde tek örnek
+summary_flight = SingleFlight("summary")
+
+# Bu boyutu aşan metinler parçalanıp paralel özetlenir (map-reduce)
+SUMMARY_CHUNK_TOKENS = int(os.getenv("SUMMARY_CHUNK_TOKENS", "4000"))
+SUMMARY_CHUNK_OVERLAP_TOKENS = int(os.getenv("SUMMARY_CHUNK_OVERLAP_TOKENS", "200"))
+# Aynı anda Gemini'ye gönderilecek en fazla parça sayısı (süreç genelinde, tüm özetler toplamı)
+SUMMARY_CONCURRENCY = int(os.getenv("SUMMARY_CONCURRENCY", "4"))
+# Parça özetleri için ortak havuz: eşzamanlı özetler (toplu araçtaki --summary-workers, arayüz oturumları)
+# kendi havuzlarını açıp sınırı çarpmaz, parçaları bu kuyrukta sıra bekler
+chunk_executor = ThreadPoolExecutor(max_workers=SUMMARY_CONCURRENCY, thread_name_prefix="gemini-chunk")
+
+SUMMARY_FORMAT = """
+### 🌍 GENEL PİYASA YORUMU
+- (Konuşmacının genel beklentisi buraya)
+
+### 🟡 ALTIN & GÜMÜŞ
+- (Ons/Gram tahminleri buraya)
+
+### 🪙 KRİPTO PARALAR
+- (Bitcoin/Altcoin yorumları buraya)
+
+### 📈 BORSA İSTANBUL (BIST)
+- (Endeks ve hisse yorumları buraya)
+
+### 🇺🇸 ABD BORSALARI (NASDAQ/S&P)
+- (Yurt dışı piyasa yorumları buraya)
+
+### 💵 DÖVİZ (DOLAR/EURO)
+- (Kur tahminleri buraya)
+"""
+
+SUMMARY_PROMPT = """
+Sen uzman bir ekonomi asistanısın. Aşağıdaki YouTube videosu metnini analiz et ve **KESİNLİKLE** aşağıdaki formatı kullanarak özetle.
+
+**ÖNEMLİ KURALLAR:**
+1. Her başlık için **Markdown formatında (###)** başlık kullan.
+2. Eğer konuşmacı o konu hakkında konuşmadıysa, o başlığın altına sadece "Yorum yok." yaz.
+3. Asla kendi yorumunu katma, sadece konuşmacının dediklerini aktar.
+
+**İSTENEN FORMAT:**
+{format}
+{stance}
+---
+**Metin:**
+{text}
+"""
+
+# Map adımı: uzun videonun bir bölümünden not çıkarır
+CHUNK_PROMPT = """
+Sen uzman bir ekonomi asistanısın. Aşağıdaki metin uzun bir YouTube videosunun {index}/{total}. bölümüdür.
+Bu bölümde konuşmacının söylediklerini aşağıdaki başlıklar altında kısa maddeler halinde not al.
+
+**ÖNEMLİ KURALLAR:**
+1. Rakamları (fiyat seviyeleri, hedefler, tarihler) aynen koru.
+2. Bu bölümde konuşulmayan başlıkları tamamen atla.
+3. Asla kendi yorumunu katma, sadece konuşmacının dediklerini aktar.
+
+**BAŞLIKLAR:** GENEL PİYASA, ALTIN & GÜMÜŞ, KRİPTO PARALAR, BORSA İSTANBUL (BIST), ABD BORSALARI, DÖVİZ
+
+---
+**Metin:**
+{text}
+"""
+
+# Reduce adımı: bölüm notlarını tek özet formatında birleştirir
+MERGE_PROMPT = """
+Sen uzman bir ekonomi asistanısın. Aşağıda uzun bir YouTube videosunun bölüm bölüm çıkarılmış notları var.
+Bu notları birleştir ve **KESİNLİKLE** aşağıdaki formatı kullanarak tek bir özet yaz.
+
+**ÖNEMLİ KURALLAR:**
+1. Her başlık için **Markdown formatında (###)** başlık kullan.
+2. Eğer hiçbir bölümde o konu konuşulmadıysa, o başlığın altına sadece "Yorum yok." yaz.
+3. Bölümler arasında tekrar eden maddeleri birleştir; konuşmacı fikrini değiştirdiyse son görüşünü belirt.
+4. Asla kendi yorumunu katma, sadece konuşmacının dediklerini aktar.
+
+**İSTENEN FORMAT:**
+{format}
+{stance}
+---
+**Bölüm Notları:**
+{notes}
+"""
+
+def generate_with_fallback(prompt, on_wait=None):
+    """Promptu sağlıklı modellerde sırayla dener; (metin, model adı) döner, hepsi başarısızsa son hatayı fırlatır.
+
+    Sıra ve atlanacak modeller (404 / kota beklemesi) model_router'dan gelir; on_wait(konum, sn) hız
+    sınırı kuyruğunda beklerken çağrılır.
+    """
+    def call(model_name):
+        with metrics.span("gemini", model=model_name, mode="single"):
+            model = genai.GenerativeModel(model_name)
+            return model.generate_content(prompt).text
+
+    return model_router.run(call, tokens=estimate_tokens(prompt), on_wait=on_wait, hedge_after=MODEL_HEDGE_AFTER_SECONDS)
+
+class StreamInterruptedError(Exception):
+    """Akış ilk parçadan sonra koptu; model değiştirmek yarım metni karıştıracağı için yedeğe geçilmez."""
+
+def generate_stream_with_fallback(prompt, on_text, on_wait=None):
+    """Promptu akış (stream) modunda dener; gelen her parça için on_text çağrılır. (metin, model adı) döner.
+
+    Akış ilk parçadan önce koparsa sıradaki modele geçilir; sonra koparsa StreamInterruptedError fırlatılır.
+    """
+    def call(model_name):
+        parts = []
+        try:
+            with metrics.span("gemini", model=model_name, mode="stream"):
+                started = time.perf_counter()
+                model = genai.GenerativeModel(model_name)
+                response = model.generate_content(prompt, stream=True)
+                for chunk in response:
+                    try:
+                        piece = chunk.text
+                    except ValueError:
+                        # Güvenlik filtresi vb. nedeniyle metinsiz parça
+                        continue
+                    if not piece:
+                        continue
+                    if not parts:
+                        # Kullanıcının ilk kelimeyi görene kadar beklediği süre
+                        metrics.observe("gemini_first_chunk", time.perf_counter() - started, model=model_name)
+                    parts.append(piece)
+                    on_text(piece)
+                if not parts:
+                    raise ValueError(f"{model_name} boş yanıt döndü.")
+                # Filtre (StanceStreamFilter) son birkaç karakteri bir sonraki parçaya kadar bekletir
+                flush = getattr(on_text, "flush", None)
+                if flush:
+                    flush()
+        except Exception as e:
+            if parts:
+                raise StreamInterruptedError(e) from e
+            raise
+        return "".join(parts)
+
+    return model_router.run(call, tokens=estimate_tokens(prompt), on_wait=on_wait, fatal=(StreamInterruptedError,))
+
+def summarize_chunks(chunks, generate_final=generate_with_fallback, on_wait=None, executor=chunk_executor):
+    """Parçaları eşzamanlı özetler (map), notları tek özette birleştirir (reduce). (özet, model, başarısız parça sayısı) döner.
+
+    Parçalar ortak `executor` havuzunda çalışır; aynı anda kaç özet yapılırsa yapılsın parça çağrıları
+    toplamda SUMMARY_CONCURRENCY ile sınırlıdır. Birleştirme çağrısı çağıran thread'de yapılır.
+    on_wait verilirse kuyrukta bekleyen parçaların en öndeki konumu ve en uzun tahmini bekleme süresi ana thread'den bildirilir.
+    """
+    notes = [None] * len(chunks)
+    last_error = None
+    # parça -> (kuyruk konumu, tahmini sn); işçiler yazar, ana thread okur
+    waiting = {}
+
+    def summarize_chunk(i, chunk):
+        def chunk_wait(position, eta):
+            if position:
+                waiting[i] = (position, eta)
+            else:
+                waiting.pop(i, None)
+        try:
+            return generate_with_fallback(CHUNK_PROMPT.format(index=i + 1, total=len(chunks), text=chunk), chunk_wait)
+        finally:
+            waiting.pop(i, None)
+
+    # Streamlit çağrıları yalnızca ana thread'de yapılabilir; işçiler sadece Gemini'yi çağırır
+    futures = {executor.submit(summarize_chunk, i, chunk): i for i, chunk in enumerate(chunks)}
+    pending = set(futures)
+    reported = False
+    while pending:
+        done, pending = wait(pending, timeout=RATE_LIMIT_REPORT_SECONDS, return_when=FIRST_COMPLETED)
+        for future in done:
+            try:
+                notes[futures[future]] = future.result()[0]
+            except Exception as e:
+                last_error = e
+        if on_wait:
+            queued = list(waiting.values())
+            if queued:
+                on_wait(min(position for position, _ in queued), max(eta for _, eta in queued))
+                reported = True
+            elif reported:
+                on_wait(0, 0)
+                reported = False
+
+    parts = [f"#### Bölüm {i + 1}/{len(chunks)}\n{note}" for i, note in enumerate(notes) if note]
+    if not parts:
+        if last_error is not None:
+            raise last_error
+        # Hiçbir parça hata vermedi ama not da çıkmadı (parça yok ya da hepsi boş yanıt)
+        raise ValueError(f"{len(chunks)} parçadan hiçbiri özetlenemedi: modeller boş not döndürdü.")
+
+    summary, model_name = generate_final(MERGE_PROMPT.format(format=SUMMARY_FORMAT, stance=STANCE_INSTRUCTIONS, notes="\n\n".join(parts)))
+    return summary, model_name, len(chunks) - len(parts)
+
+# Prompt şablonlarından türetilen sürüm: şablonlar değişince eski önbellek kayıtları kendiliğinden geçersiz olur
+PROMPT_VERSION = hashlib.sha256(
+    "\x00".join([SUMMARY_FORMAT, SUMMARY_PROMPT, CHUNK_PROMPT, MERGE_PROMPT, STANCE_INSTRUCTIONS, str(SUMMARY_CHUNK_TOKENS)]).encode("utf-8")
+).hexdigest()[:12]
+
+def cached_summary(digest):
+    """Özet önbelleğindeki kaydı summarize() sonucu biçiminde döner; yoksa None."""
+    cached = summary_cache.get(digest, PROMPT_VERSION)
+    if not cached:
+        return None
+    summary, stances = split_stances(cached["summary"])
+    return {
+        "summary": summary,
+        "stances": stances,
+        "model": cached["model"],
+        "cached": True,
+        "created_at": cached["created_at"],
+        "failed_chunks": 0,
+        "total_chunks": 1,
+    }
+
+def summarize(text, api_key, on_text=None, on_wait=None):
+    """Metni Gemini ile özetler (önce özet önbelleği, uzun metinlerde parçalı map-reduce).
+
+    on_text verilirse kullanıcının göreceği son çağrı akış modunda yapılır ve gelen her parça için çağrılır.
+    on_wait(konum, sn) Gemini hız sınırı kuyruğunda beklenirken çağrılır; (0, 0) beklemenin bittiğini bildirir.
+    Aynı metin başka bir oturumda o an özetleniyorsa onun sonucu beklenir ("shared": True).
+    Sonucu sözlük olarak döner; hiçbir model çalışmazsa son hatayı fırlatır.
+    """
+    digest = text_hash(text)
+    cached = cached_summary(digest)
+    metrics.inc("cache", cache="summary", result="hit" if cached else "miss")
+    if cached:
+        index_summary(digest, cached["summary"])
+        record_stances(digest, cached["stances"])
+        return dict(cached, shared=False)
+
+    def generate():
+        # Bekleme sırasında önceki uçuş bitmiş olabilir: önce önbelleğe tekrar bak
+        return cached_summary(digest) or generate_summary(text, digest, api_key, on_text, on_wait)
+
+    result, shared = summary_flight.do((digest, PROMPT_VERSION), generate)
+    index_summary(digest, result["summary"])
+    record_stances(digest, result["stances"])
+    return dict(result, shared=shared)
+
+def index_summary(digest, summary):
+    """Özeti, altyazısı indeksli videoya bağlayıp arama indeksine ekler; hata özet akışını bozmaz."""
+    try:
+        search_index.ingest_summary(digest, summary)
+    except Exception as e:
+        print(f"Arama indeksi hatası: {e}")
+
+def record_stances(digest, stances):
+    """Görüşleri, altyazısı indeksli videonun kanal ve yayın tarihiyle görüş geçmişine ekler (video başına bir kez)."""
+    if not stances:
+        return
+    video = search_index.video_for_digest(digest)
+    if not video:
+        return
+    try:
+        stance_store.append(video["video_id"], video["channel"], video["published"], stances)
+    except Exception as e:
+        print(f"Görüş kaydı hatası: {e}")
+
+def generate_summary(text, digest, api_key, on_text=None, on_wait=None):
+    """Önbelleğe bakmadan özeti üretir ve (eksiksizse) önbelleğe yazar."""
+    # genai.configure sadece anahtar değiştiğinde çağrılır
+    model_router.configure(api_key)
+
+    generate_final = generate_with_fallback
+    if on_text is not None:
+        # Sondaki görüş JSON bloğu kullanıcıya akıtılmaz
+        on_text = StanceStreamFilter(on_text)
+        generate_final = lambda prompt: generate_stream_with_fallback(prompt, on_text, on_wait)
+    elif on_wait is not None:
+        generate_final = lambda prompt: generate_with_fallback(prompt, on_wait)
+
+    failed, total = 0, 1
+    if estimate_tokens(text) <= SUMMARY_CHUNK_TOKENS:
+        summary, model_name = generate_final(SUMMARY_PROMPT.format(format=SUMMARY_FORMAT, stance=STANCE_INSTRUCTIONS, text=text))
+    else:
+        chunks = chunk_text(text, SUMMARY_CHUNK_TOKENS, SUMMARY_CHUNK_OVERLAP_TOKENS)
+        total = len(chunks)
+        summary, model_name, failed = summarize_chunks(chunks, generate_final, on_wait)
+
+    # Eksik parçalı özetler önbelleğe alınmaz, bir sonraki denemede tamamlanabilir.
+    # Önbelleğe görüş bloğuyla birlikte ham çıktı yazılır; okurken ayrılır.
+    if not failed:
+        summary_cache.put(digest, model_name, PROMPT_VERSION, summary)
+    summary, stances = split_stances(summary)
+    return {
+        "summary": summary,
+        "stances": stances,
+        "model": model_name,
+        "cached": False,
+        "created_at": time.time(),
+        "failed_chunks": failed,
+        "total_chunks": total,
+    }
+
+def summary_error_message(error):
+    """Özetleme hatasını kullanıcıya gösterilecek mesaja çevirir."""
+    if isinstance(error, StreamInterruptedError):
+        return f"Özet akışı yarıda kesildi, özet eksik olabilir.\nHata: {error}"
+    if isinstance(error, RateLimitTimeout):
+        return f"Gemini kota kuyruğu çok uzun (429), istek gönderilmedi. Birkaç dakika sonra tekrar deneyin.\n{error}"
+    if isinstance(error, ModelCooldownError):
+        return f"Tüm modeller için kota aşıldı (429). Yaklaşık {error.wait:.0f} sn sonra tekrar deneyin."
+    if "429" in str(error):
+        return "Tüm modeller için kota aşıldı (429). Lütfen 1-2 dakika bekleyin."
+    if "404" in str(error):
+        return "Modeller bulunamadı (404). API anahtarınızın yetkilerini kontrol edin."
+    return f"Tüm modeller denendi ancak başarısız oldu.\nSon hata: {error}"
@@ -0,0 +1,77 @@
+import hashlib
+import os
+import threading
+import time
+
+from storage import open_db
+
+SUMMARY_CACHE_TTL_HOURS = float(os.getenv("SUMMARY_CACHE_TTL_HOURS", "168"))
+SUMMARY_CACHE_MAX_ENTRIES = int(os.getenv("SUMMARY_CACHE_MAX_ENTRIES", "1000"))
+
+
+def text_hash(text):
+    """Altyazı metninin içerik adresi (SHA-256)."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class SummaryCache:
+    """Özetleri (metin özeti, model, prompt sürümü) anahtarıyla saklar; TTL ve LRU ile temizlenir."""
+
+    def __init__(self, filename="summaries.db", ttl_hours=SUMMARY_CACHE_TTL_HOURS, max_entries=SUMMARY_CACHE_MAX_ENTRIES):
+        self.ttl = ttl_hours * 3600
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = open_db(filename)
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS summaries (
+                    text_hash TEXT,
+                    model TEXT,
+                    prompt_version TEXT,
+                    summary TEXT,
+                    created_at REAL,
+                    accessed_at REAL,
+                    PRIMARY KEY (text_hash, model, prompt_version)
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_summaries_accessed ON summaries(accessed_at)")
+
+    def get(self, text_hash, prompt_version):
+        """Bu metin ve prompt sürümü için en yeni özeti döner (hangi model üretmiş olursa olsun)."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                """SELECT model, summary, created_at FROM summaries
+                   WHERE text_hash = ? AND prompt_version = ? AND created_at >= ?
+                   ORDER BY created_at DESC LIMIT 1""",
+                (text_hash, prompt_version, now - self.ttl)
+            ).fetchone()
+            if not row:
+                return None
+            model, summary, created_at = row
+            with self._conn:
+                self._conn.execute(
+                    "UPDATE summaries SET accessed_at = ? WHERE text_hash = ? AND model = ? AND prompt_version = ?",
+                    (now, text_hash, model, prompt_version)
+                )
+        return {"summary": summary, "model": model, "created_at": created_at}
+
+    def put(self, text_hash, model, prompt_version, summary):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO summaries VALUES (?, ?, ?, ?, ?, ?)",
+                (text_hash, model, prompt_version, summary, now, now)
+            )
+            # Süresi dolanları ve en az kullanılan fazlalıkları sil
+            self._conn.execute("DELETE FROM summaries WHERE created_at < ?", (now - self.ttl,))
+            self._conn.execute(
+                """DELETE FROM summaries WHERE rowid IN (
+                       SELECT rowid FROM summaries ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                   )""",
+                (self.max_entries,)
+            )
+
+
+# Süreç genelinde tek örnek
+summary_cache = SummaryCache()
@@ -0,0 +1,130 @@
+import os
+import threading
+import time
+import zlib
+
+from segments import Transcript
+from storage import open_db
+from summary_cache import text_hash
+
+# Önbellek sınırları (ortam değişkenleriyle değiştirilebilir)
+TRANSCRIPT_CACHE_MAX_AGE_DAYS = float(os.getenv("TRANSCRIPT_CACHE_MAX_AGE_DAYS", "30"))
+TRANSCRIPT_CACHE_MAX_MB = float(os.getenv("TRANSCRIPT_CACHE_MAX_MB", "200"))
+
+
+class TranscriptCache:
+    """Video ID'sine göre temizlenmiş altyazı metnini sıkıştırılmış olarak diskte saklar."""
+
+    def __init__(self, filename="transcripts.db", max_age_days=TRANSCRIPT_CACHE_MAX_AGE_DAYS, max_mb=TRANSCRIPT_CACHE_MAX_MB):
+        self.max_age = max_age_days * 86400
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._lock = threading.Lock()
+        self._conn = open_db(filename)
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS transcripts (
+                    video_id TEXT PRIMARY KEY,
+                    source TEXT,
+                    language TEXT,
+                    fetched_at REAL,
+                    accessed_at REAL,
+                    size INTEGER,
+                    data BLOB
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_transcripts_accessed ON transcripts(accessed_at)")
+            # Zaman damgaları sonradan eklendi: eski veritabanlarına kolonu ekle
+            columns = [row[1] for row in self._conn.execute("PRAGMA table_info(transcripts)")]
+            if "segments" not in columns:
+                self._conn.execute("ALTER TABLE transcripts ADD COLUMN segments BLOB")
+            # Metnin özeti (text_hash) de sonradan eklendi; eski kayıtlarda ilk digest() çağrısında doldurulur
+            if "digest" not in columns:
+                self._conn.execute("ALTER TABLE transcripts ADD COLUMN digest TEXT")
+
+    def get(self, video_id):
+        """Önbellekteki kaydı döner; yoksa veya süresi dolmuşsa None.
+
+        Zaman damgası olmadan kaydedilmiş eski kayıtlarda "segments" None'dır.
+        """
+        if not video_id:
+            return None
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT source, language, fetched_at, data, segments FROM transcripts WHERE video_id = ?",
+                (video_id,)
+            ).fetchone()
+            if not row:
+                return None
+            source, language, fetched_at, data, segments = row
+            if now - fetched_at > self.max_age:
+                with self._conn:
+                    self._conn.execute("DELETE FROM transcripts WHERE video_id = ?", (video_id,))
+                return None
+            with self._conn:
+                self._conn.execute("UPDATE transcripts SET accessed_at = ? WHERE video_id = ?", (now, video_id))
+        text = zlib.decompress(data).decode("utf-8")
+        return {
+            "text": text,
+            "segments": Transcript.from_bytes(text, segments) if segments else None,
+            "source": source,
+            "language": language,
+            "fetched_at": fetched_at,
+        }
+
+    def digest(self, video_id):
+        """Önbellekteki metnin text_hash'i; yoksa veya süresi dolmuşsa None.
+
+        Sadece okur (metni açmaz, accessed_at'i güncellemez): her karttaki "hazır özet var mı"
+        kontrolü için ucuzdur.
+        """
+        if not video_id:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fetched_at, digest, data FROM transcripts WHERE video_id = ?", (video_id,)
+            ).fetchone()
+            if not row or time.time() - row[0] > self.max_age:
+                return None
+            fetched_at, digest, data = row
+            if digest is None:
+                # Kolon eklenmeden önce kaydedilmiş: bir kez hesaplayıp yaz
+                digest = text_hash(zlib.decompress(data).decode("utf-8"))
+                with self._conn:
+                    self._conn.execute("UPDATE transcripts SET digest = ? WHERE video_id = ?", (digest, video_id))
+        return digest
+
+    def put(self, video_id, text, source, language, segments=None):
+        """Metni (ve varsa zaman damgalarını) sıkıştırıp kaydeder, ardından yaş ve boyut sınırlarını uygular."""
+        if not video_id or not text:
+            return
+        data = zlib.compress(text.encode("utf-8"), 6)
+        timing = segments.to_bytes() if segments is not None else None
+        size = len(data) + (len(timing) if timing else 0)
+        digest = text_hash(text)
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                """INSERT OR REPLACE INTO transcripts (video_id, source, language, fetched_at, accessed_at, size, data, segments, digest)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (video_id, source, language, now, now, size, data, timing, digest)
+            )
+            self._evict(now)
+
+    def _evict(self, now):
+        # 1. Süresi dolanları sil
+        self._conn.execute("DELETE FROM transcripts WHERE fetched_at < ?", (now - self.max_age,))
+        # 2. Toplam boyut sınırı aşıldıysa en uzun süredir okunmayanları sil
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM transcripts").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute("SELECT video_id, size FROM transcripts ORDER BY accessed_at").fetchall()
+        for video_id, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM transcripts WHERE video_id = ?", (video_id,))
+            total -= size
+
+
+# Süreç genelinde tek örnek (Streamlit her etkileşimde app.py'yi yeniden çalıştırır, modül ise bir kez yüklenir)
+transcript_cache = TranscriptCache()
@@ -0,0 +1,401 @@
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from youtube_transcript_api import YouTubeTranscriptApi
+
+from asr import ASR_BACKGROUND_JOBS, ASR_RECHECK_SECONDS, ASR_SOURCE, asr_available, transcript_from_asr
+from caption_parsers import CaptionWriter, parse_caption, parse_vtt
+from caption_probe import CaptionProbe
+from hedging import race
+from http_client import session as http_session, mirror_session
+from metrics import error_outcome, metrics
+from mirrors import mirror_registry
+from search_index import search_index
+from segments import Transcript
+from singleflight import SingleFlight
+from transcript_cache import transcript_cache
+
+# Süreç genelinde tek örnek (video ID başına eşzamanlı tek altyazı çekimi)
+transcript_flight = SingleFlight("transcript")
+
+def extract_video_id(url):
+    """YouTube URL'sinden Video ID'sini çeker."""
+    url = url.strip()
+    if "youtu.be/" in url:
+        return url.split("youtu.be/")[1].split("?")[0]
+    elif "youtube.com/shorts/" in url:
+        return url.split("shorts/")[1].split("?")[0]
+    elif "youtube.com/live/" in url:
+        return url.split("live/")[1].split("?")[0]
+    elif "v=" in url:
+        return url.split("v=")[1].split("&")[0]
+    elif re.fullmatch(r'[\w-]{11}', url):
+        # Sadece ID verilmişse
+        return url
+    return None
+
+def cache_is_fresh(cached):
+    """Önbellek kaydı olduğu gibi kullanılabilir mi.
+
+    Ses tanıma metinleri geçicidir: ASR_RECHECK_SECONDS geçince yayınlanmış altyazı yeniden aranır.
+    """
+    return cached["source"] != ASR_SOURCE or time.time() - cached["fetched_at"] < ASR_RECHECK_SECONDS
+
+def load_transcript_segments(video_url, asr=False, on_progress=None):
+    """Zaman damgalı altyazıyı (Transcript) döner (önce disk önbelleği, sonra Hibrit Yöntem); bulunamazsa None.
+
+    asr=True ise hiçbir altyazı kaynağı sonuç vermediğinde ses indirilip yerel olarak metne çevrilir
+    (dakikalar sürebilir; arayüz bunu asr_jobs ile arka planda yapar). on_progress(mesaj, oran) ses tanıma ilerlemesidir.
+    """
+    with metrics.span("video_id") as span:
+        video_id = extract_video_id(video_url)
+        if not video_id:
+            span.outcome = "invalid"
+
+    # 0. YÖNTEM: Disk önbelleği (Ağa hiç çıkmadan)
+    cached = transcript_cache.get(video_id)
+    metrics.inc("cache", cache="transcript", result="hit" if cached else "miss")
+    if cached and cache_is_fresh(cached):
+        transcript = cached["segments"] or Transcript.from_text(cached["text"])
+        index_transcript(video_id, transcript)
+        return transcript
+
+    def fetch_and_store():
+        # Bekleme sırasında önceki uçuş bitmiş olabilir: önce önbelleğe tekrar bak
+        cached = transcript_cache.get(video_id) if video_id else None
+        if cached and cache_is_fresh(cached):
+            return cached["segments"] or Transcript.from_text(cached["text"])
+        result = fetch_transcript(video_url)
+        if not result and cached:
+            # Altyazı hâlâ yok: ses tanıma metni kullanılmaya devam eder, bir sonraki kontrol süre dolunca
+            transcript = cached["segments"] or Transcript.from_text(cached["text"])
+            transcript_cache.put(video_id, transcript.text, ASR_SOURCE, cached["language"], segments=cached["segments"])
+            return transcript
+        if not result and asr and asr_available():
+            # Son çare: sesi indirip yerel olarak metne çevir
+            with metrics.span("transcript_source", source="asr") as span:
+                result = transcript_from_asr(video_url, on_progress=on_progress)
+                if not (result and result[0]):
+                    span.outcome = "miss"
+                    result = None
+        if result:
+            transcript, source, language = result
+            transcript_cache.put(video_id, transcript.text, source, language, segments=transcript)
+            return transcript
+        return None
+
+    # Aynı videoyu aynı anda isteyen oturumlar tek bir ağ çekimini paylaşır (ses tanıma ayrı uçuştur)
+    transcript, _ = transcript_flight.do((video_id or video_url, asr), fetch_and_store)
+    if transcript:
+        index_transcript(video_id, transcript)
+    return transcript
+
+def index_transcript(video_id, transcript):
+    """Altyazıyı arama indeksine ekler (zaten indeksliyse bir şey yapmaz); hata altyazı akışını bozmaz."""
+    try:
+        search_index.ingest_transcript(video_id, transcript, **caption_probe.meta(video_id))
+    except Exception as e:
+        print(f"Arama indeksi hatası ({video_id}): {e}")
+
+def load_transcript(video_url, asr=False):
+    """Altyazı metnini döner (önce disk önbelleği, sonra Hibrit Yöntem); bulunamazsa None."""
+    transcript = load_transcript_segments(video_url, asr=asr)
+    return transcript.text if transcript else None
+
+# Ses tanıma işlerinden bitmiş olanların en fazla bu kadarı (durum gösterimi için) tutulur
+ASR_JOB_HISTORY = 64
+
+class AsrJobs:
+    """Altyazısı bulunamayan videolar için ses tanımayı arka planda çalıştırır ve ilerlemesini tutar.
+
+    Streamlit thread'i beklemez; arayüz status() ile ilerlemeyi gösterir. Sonuç altyazı önbelleğine
+    "asr" kaynağıyla yazılır, video tekrar istendiğinde oradan gelir.
+    """
+
+    def __init__(self, workers=ASR_BACKGROUND_JOBS):
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="asr")
+        # video_id -> {'state': queued|running|done|failed, 'message', 'progress', 'error'}
+        self._jobs = OrderedDict()
+
+    def start(self, video_url):
+        """Video için (çalışmıyorsa) ses tanıma işi başlatır; işin durumunu döner."""
+        video_id = extract_video_id(video_url)
+        with self._lock:
+            job = self._jobs.get(video_id)
+            if job and job["state"] in ("queued", "running"):
+                return dict(job)
+            job = self._jobs[video_id] = {"state": "queued", "message": "Sırada", "progress": 0.0, "error": None}
+            self._jobs.move_to_end(video_id)
+            finished = [key for key, entry in self._jobs.items() if entry["state"] in ("done", "failed")]
+            for key in finished[:max(0, len(finished) - ASR_JOB_HISTORY)]:
+                del self._jobs[key]
+        self._executor.submit(self._run, video_url, job)
+        return dict(job)
+
+    def status(self, video_url):
+        """Videonun ses tanıma durumu (yoksa None)."""
+        with self._lock:
+            job = self._jobs.get(extract_video_id(video_url))
+            return dict(job) if job else None
+
+    def _run(self, video_url, job):
+        def on_progress(message, progress):
+            with self._lock:
+                job.update(state="running", message=message, progress=progress)
+
+        error = None
+        try:
+            if load_transcript_segments(video_url, asr=True, on_progress=on_progress) is None:
+                error = "Ses metne çevrilemedi (canlı yayın, çok uzun video veya indirme hatası)."
+        except Exception as e:
+            error = str(e)
+        with self._lock:
+            job.update(state="failed" if error else "done", error=error, progress=1.0)
+
+# Süreç genelinde tek örnek
+asr_jobs = AsrJobs()
+
+# Altyazı çekme modu: "race" (kaynaklar yarışır) veya "sequential" (eski sıralı zincir)
+TRANSCRIPT_FETCH_MODE = os.getenv("TRANSCRIPT_FETCH_MODE", "race")
+# Yarış modunda bir sonraki kaynağın başlatılmadan önce beklenecek süre (sn). 0 = hepsi aynı anda.
+TRANSCRIPT_HEDGE_DELAY = float(os.getenv("TRANSCRIPT_HEDGE_DELAY", "1.5"))
+# Tercih edilmeyen dilde ilk sonuç geldikten sonra daha iyisi için en fazla beklenecek süre (sn)
+TRANSCRIPT_RANK_GRACE_SECONDS = float(os.getenv("TRANSCRIPT_RANK_GRACE_SECONDS", "2"))
+
+# Dil tercihi: Türkçe > İngilizce
+PREFERRED_LANGUAGES = ['tr', 'en']
+# yt-dlp altyazı formatı tercihi
+CAPTION_FORMATS = ('json3', 'srv3', 'ttml', 'vtt')
+
+# Süreç genelinde tek örnek (YoutubeDL havuzu ve video başına iz önbelleği)
+caption_probe = CaptionProbe(PREFERRED_LANGUAGES)
+
+def language_rank(result):
+    """(Transcript, kaynak, dil) sonucunun dil tercih sırası (0 = en iyi)."""
+    language = result[2]
+    return PREFERRED_LANGUAGES.index(language) if language in PREFERRED_LANGUAGES else len(PREFERRED_LANGUAGES)
+
+def fetch_transcript(video_url, mode=None):
+    """Altyazıyı ağdan çeker; (Transcript, kaynak, dil) ya da None döner."""
+    mode = mode or TRANSCRIPT_FETCH_MODE
+
+    # URL düzeltme
+    if "youtube.com" not in video_url and "youtu.be" not in video_url:
+         video_url = f"https://www.youtube.com/watch?v={video_url}"
+
+    def run_source(source, cancel):
+        with metrics.span("transcript_source", source=source.__name__.replace("transcript_from_", "")) as span:
+            result = source(video_url, cancel)
+            # Boş altyazı geçerli sonuç sayılmaz
+            if not (result and result[0]):
+                span.outcome = "cancelled" if cancel is not None and cancel.is_set() else "miss"
+                return None
+            return result
+
+    sources = [transcript_from_ytdlp, transcript_from_api, transcript_from_invidious, transcript_from_piped]
+    tasks = [lambda cancel, source=source: run_source(source, cancel) for source in sources]
+
+    result = None
+    if mode == "race":
+        # Kaynakları kademeli başlat; ilk Türkçe sonuç kazanır, yoksa en iyi dil seçilir. yt-dlp videonun tüm
+        # iz listesinden seçtiği için onun sonucu (örn. sadece İngilizce varsa 'en') başka kaynakça geçilemez;
+        # diğer kaynaklardan gelen alt sıradaki sonuçta da aynalar sonuna kadar beklenmez.
+        result = race(tasks, hedge_delay=TRANSCRIPT_HEDGE_DELAY, rank=language_rank,
+                      final=lambda result: result[1] == "yt-dlp", grace=TRANSCRIPT_RANK_GRACE_SECONDS)
+    else:
+        # Sıralı mod: ilk başarılı kaynak kazanır
+        for task in tasks:
+            result = task(None)
+            if result:
+                break
+    return result
+
+def transcript_from_ytdlp(video_url, cancel=None):
+    """1. YÖNTEM: yt-dlp (Öncelikli)"""
+    video_id = extract_video_id(video_url) or video_url
+    try:
+        # Sadece altyazı haritası okunur; izler video başına önbellekte
+        tracks = caption_probe.tracks(video_id, video_url)
+        if cancel and cancel.is_set(): return None
+        if not tracks:
+            return None
+
+        # Tercih sırası: Türkçe (manuel, otomatik), sonra İngilizce (manuel, otomatik)
+        selected_lang, formats = tracks[0]
+        # Format tercihi: json3 (kelime zamanlı), sonra srv3/ttml, en son vtt
+        ext = next((ext for ext in CAPTION_FORMATS if ext in formats), None)
+        if ext is None:
+            return None
+
+        with metrics.span("caption_download", source="ytdlp"):
+            response = http_session.get(formats[ext])
+            if response.status_code != 200:
+                # Süresi dolmuş iz URL'si: bir sonraki denemede yeniden bulunsun
+                caption_probe.invalidate(video_id)
+            response.raise_for_status()
+        with metrics.span("caption_parse", format=ext):
+            transcript = parse_caption(response.content, ext)
+        if transcript is not None:
+            return transcript, "yt-dlp", selected_lang
+    except Exception as e:
+        print(f"yt-dlp hatası: {e}")
+        metrics.inc("source_error", source="ytdlp", kind=error_outcome(e))
+    return None
+
+def transcript_from_api(video_url, cancel=None):
+    """2. YÖNTEM: youtube-transcript-api (Yedek / Fallback)"""
+    try:
+        video_id = extract_video_id(video_url)
+        if not video_id:
+            return None
+            
+        transcript_list = YouTubeTranscriptApi.list_transcripts(video_id)
+        if cancel and cancel.is_set(): return None
+        
+        # Önce Türkçe, yoksa İngilizce, o da yoksa otomatik çeviri
+        try:
+            transcript = transcript_list.find_transcript(['tr', 'en'])
+        except:
+            # Bulamazsa herhangi birini alıp Türkçe'ye çevir
+            transcript = transcript_list.find_transcript(['en']).translate('tr')
+            
+        with metrics.span("caption_download", source="api"):
+            entries = transcript.fetch()
+        with metrics.span("caption_parse", format="api"):
+            writer = CaptionWriter()
+            for entry in entries:
+                writer.add(entry['start'] * 1000, entry['duration'] * 1000, entry['text'])
+            parsed = writer.build()
+        return parsed, "youtube-transcript-api", transcript.language_code
+
+    except Exception as e:
+        print(f"youtube-transcript-api hatası: {e}")
+        metrics.inc("source_error", source="api", kind=error_outcome(e))
+    return None
+
+# Invidious ve Piped ayna sunucuları (sıra, sağlık kaydına göre her çağrıda belirlenir)
+INVIDIOUS_INSTANCES = [
+    "https://inv.tux.pizza",
+    "https://invidious.projectsegfau.lt",
+    "https://vid.puffyan.us",
+    "https://invidious.fdn.fr",
+    "https://invidious.drgns.space",
+    "https://invidious.perennialteks.com",
+    "https://yt.artemislena.eu",
+    "https://invidious.flokinet.to",
+    "https://invidious.privacydev.net",
+    "https://iv.ggtyler.dev",
+    "https://invidious.lunar.icu",
+    "https://yewtu.be"
+]
+
+PIPED_INSTANCES = [
+    "https://pipedapi.kavin.rocks",
+    "https://pipedapi.tokhmi.xyz",
+    "https://pipedapi.moomoo.me",
+    "https://api.piped.privacy.com.de",
+    "https://pipedapi.smnz.de",
+    "https://pipedapi.adminforge.de",
+    "https://pipedapi.drgns.space",
+    "https://api.piped.projectsegfau.lt",
+    "https://pipedapi.in.projectsegfau.lt",
+    "https://pipedapi.us.projectsegfau.lt",
+    "https://lo.piped.video",
+    "https://pipedapi.ducks.party"
+]
+
+def mirror_get(instance, url, timeout):
+    """Ayna sunucusuna istek atar; süre ve sonucu sağlık kaydına işler. Başarısızsa None döner."""
+    started = time.monotonic()
+    try:
+        response = mirror_session.get(url, timeout=timeout)
+    except Exception:
+        mirror_registry.record(instance, False, time.monotonic() - started)
+        return None
+    ok = response.status_code == 200
+    mirror_registry.record(instance, ok, time.monotonic() - started)
+    return response if ok else None
+
+def transcript_from_invidious(video_url, cancel=None):
+    """3. YÖNTEM: Invidious API (Genişletilmiş Liste)"""
+    video_id = extract_video_id(video_url)
+    if not video_id: return None
+
+    # Hızlı ve sağlıklı sunucular önce; devresi açık olanlar atlanır
+    for instance in mirror_registry.ordered(INVIDIOUS_INSTANCES):
+        if cancel and cancel.is_set(): return None
+        try:
+            # Altyazı listesini çek
+            response = mirror_get(instance, f"{instance}/api/v1/captions/{video_id}", timeout=3) # Hızlı pes et, diğerine geç
+            if response is None: continue
+            
+            captions = response.json()
+            selected_caption = None
+            
+            for cap in captions:
+                if cap['languageCode'] == 'tr':
+                    selected_caption = cap
+                    break
+            if not selected_caption:
+                for cap in captions:
+                    if cap['languageCode'] == 'en':
+                        selected_caption = cap
+                        break
+            
+            if selected_caption:
+                cap_url = f"{instance}{selected_caption['url']}"
+                # Akış olarak oku: VTT satırları indikçe ayrıştırılır (ayrıştırma süresi indirmeyi de kapsar)
+                with metrics.span("caption_download", source="invidious") as span, \
+                        http_session.get(cap_url, timeout=5, stream=True) as cap_response:
+                    if cap_response.status_code == 200:
+                        with metrics.span("caption_parse", format="vtt"):
+                            parsed = parse_vtt(cap_response.iter_lines())
+                        return parsed, "invidious", selected_caption['languageCode']
+                    span.outcome = str(cap_response.status_code)
+        except Exception:
+            continue
+    return None
+
+def transcript_from_piped(video_url, cancel=None):
+    """4. YÖNTEM: Piped API (Genişletilmiş Liste)"""
+    video_id = extract_video_id(video_url)
+    if not video_id: return None
+
+    for instance in mirror_registry.ordered(PIPED_INSTANCES):
+        if cancel and cancel.is_set(): return None
+        try:
+            response = mirror_get(instance, f"{instance}/streams/{video_id}", timeout=3)
+            if response is None: continue
+            
+            data = response.json()
+            subtitles = data.get('subtitles', [])
+            
+            selected_sub = None
+            for sub in subtitles:
+                if sub['code'] == 'tr':
+                    selected_sub = sub
+                    break
+            if not selected_sub:
+                for sub in subtitles:
+                    if sub['code'] == 'en':
+                        selected_sub = sub
+                        break
+            
+            if selected_sub:
+                sub_url = selected_sub['url']
+                with metrics.span("caption_download", source="piped") as span, \
+                        http_session.get(sub_url, timeout=5, stream=True) as sub_response:
+                    if sub_response.status_code == 200:
+                        with metrics.span("caption_parse", format="vtt"):
+                            parsed = parse_vtt(sub_response.iter_lines())
+                        return parsed, "piped", selected_sub['code']
+                    span.outcome = str(sub_response.status_code)
+
+        except Exception:
+            continue
+    return None